@@ -1,13 +1,20 @@
 import streamlit as st
-import forallpeople as si
-import io
+import beam_format
 import beams
 import load_factors as lf
-import tempfile
-import plotly.graph_objects as go
 import plots
 import numpy as np
 import app_module
+import tracing
+import singleflight
+import serviceability
+import design_checks
+import units as u
+from model_cache import SHARED_CACHE
+from contextlib import nullcontext
+from diagrams import DIST_DIRECTIONS, POINT_DIRECTIONS
+from incremental import IncrementalAnalysis
+from utils import content_hash, read_csv_text
 
 st.set_page_config(layout='wide')
 
@@ -17,43 +24,71 @@ st.sidebar.subheader("Input parameters")
 
 tab1, tab2, tab3, tab4 = st.sidebar.tabs(['Beam properties', 'Material Properties', 'Supports and Loads', 'Analysis'])
 
-beam_data= {}
+beam_text = None
 
-fig_m = go.Figure()
-fig_s = go.Figure()
-fig_d = go.Figure()
+# Seconds the sidebar inputs must stay unchanged before the live preview analyzes them again.
+LIVE_PREVIEW_DEBOUNCE = 0.4
 
-temp_file_path = None
+# Stations along the beam at which the diagrams are evaluated (by the vectorized kernel in diagrams.py).
+# The charts are downsampled for display, keeping the peaks, so only the maxima and checks change.
+DIAGRAM_POINTS = 1000
+DIAGRAM_POINT_OPTIONS = [200, 1000, 10000, 100000]
 
-with tab1:
-    
-    beam_name = st.text_input('Beam name')
+# The app is split into fragments that only rerun when their own inputs change:
+#   sidebar inputs -> beam spec (one fragment per tab, sharing values through st.session_state)
+#   beam spec (live from the sidebar, or from an uploaded beam file) -> solved results (in model_cache.SHARED_CACHE, shared by all sessions)
+#   solved results -> one fragment per chart or check, each with its own display options
+# Editing a unit or a section property reruns only that fragment. In live preview, edits of the sidebar
+# inputs rerun the app once they settle (debounced), and the solve is only repeated for a new spec.
+# benchmarks/app_latency.py measures the rerun latency against its target.
 
-    beam_length = st.number_input("Beam lenght (mm)", value=3000)
-    
-    I_x = st.number_input("Ix ($mm^4$)", value=1000000)
-    Sx = st.number_input("Sx ($mm^3$)", value=150000)
+
+def sidebar_beam_spec() -> dict:
+    """
+    Returns the structured beam data (as beams.get_structured_beam_data would) of the sidebar inputs,
+    built in memory from the values the input fragments keep in st.session_state.
+    """
+    return {
+        'Name': st.session_state.get('beam_name') or 'Beam',
+        'L': float(st.session_state.get('beam_length', 3000)),
+        'E': float(st.session_state.get('E', 200000)),
+        'Iz': float(st.session_state.get('I_x', 1000000)),
+        'Iy': 1,
+        'A': 1,
+        'J': 1,
+        'nu': 1,
+        'rho': 1,
+        'Supports': dict(st.session_state.get('sidebar_supports', {})),
+        'Loads': list(st.session_state.get('sidebar_loads', [])),
+        'Cases': {load['Case']: {} for load in st.session_state.get('sidebar_loads', [])},
+    }
+
+
+@st.fragment
+def beam_properties_inputs():
     
+    st.text_input('Beam name', key='beam_name')
+
+    st.number_input("Beam lenght (mm)", value=3000, key='beam_length')
     
-    beam_data['beam_name'] = beam_name
-    beam_data['beam_length'] = beam_length
-    beam_data['I_x'] = I_x
+    st.number_input("Ix ($mm^4$)", value=1000000, key='I_x')
     
     
-with tab2:
+@st.fragment
+def material_inputs():
     
-    E = st.number_input("Young's Modulus (MPa)", value=200000)
-    Fy = st.number_input("Yield Strength (MPa)", value=150)
+    st.number_input("Young's Modulus (MPa)", value=200000, key='E')
     
-    beam_data['E'] = E
     
-with tab3:
+@st.fragment
+def supports_and_loads_inputs():
 
     st.subheader('Support Information')
     
     numb_of_sup = st.number_input('Amount of supports',1,10,step = 1)
     
-    support_data = []
+    supports = {}
+    loads = []
     
     for each_support in range(numb_of_sup):
         #st.sidebar.number_input(min_value = 0, max_value = beam_length)
@@ -62,7 +97,7 @@ with tab3:
         
         with col1:
             
-            support_loc = st.number_input(f'Support-{each_support + 1} location (mm)', min_value = 0, max_value = beam_length)
+            support_loc = st.number_input(f'Support-{each_support + 1} location (mm)', min_value = 0, max_value = st.session_state.get('beam_length', 3000))
             
         with col2:
             support_type = st.selectbox(f'Support-{each_support} type', ('Fixed', 'Pinned', 'Roller'))
@@ -74,9 +109,7 @@ with tab3:
         else:
             support_code = 'R'
             
-        support_data.append(f'{support_loc}:{support_code}')
-        
-    beam_data['Supports'] = support_data
+        supports[float(support_loc)] = support_code
     
     
     
@@ -84,12 +117,9 @@ with tab3:
     
     point_load_amount = st.number_input('Amount of point loads (inputs should be N and mm units)', 0, 10, step = 1)
     
-    
-    point_load_data = []
-    
     for each_point_load in range(point_load_amount):
         
-        col1, col2, col3 = st.columns([1,1,1])
+        col1, col2, col3, col4 = st.columns([1,1,1,1])
         
         with col1:
             
@@ -100,20 +130,27 @@ with tab3:
             point_load_value = st.number_input(f'P-{each_point_load + 1} value')
             
         with col3:
-            load_case = st.selectbox(f'P-{each_point_load+1} case', ('D', 'L', 'S', 'W'))
+            # Fy: shear force, Fx: axial force, Mz: bending moment and Mx: torque (N.mm)
+            point_load_dir = st.selectbox(f'P-{each_point_load+1} direction', POINT_DIRECTIONS, index=POINT_DIRECTIONS.index('Fy'))
             
+        with col4:
+            load_case = st.selectbox(f'P-{each_point_load+1} case', ('D', 'L', 'S', 'W'))
             
-        point_load_data.append(f'POINT:Fy,{point_load_value},{point_load_loc},case:{load_case}')
-        
-    beam_data['point_loads'] = point_load_data
+        loads.append(
+            {
+                "Type": "Point",
+                "Direction": point_load_dir,
+                "Magnitude": point_load_value,
+                "Location": float(point_load_loc),
+                "Case": load_case,
+            }
+        )
     
     line_load_amount = st.number_input('Amount of line loads (inputs should be N/mm units)', 0, 10, step=1)
     
-    line_load_data = []
-    
     for each_line_load in range(line_load_amount):
         
-        col1, col2, col3, col4, col5 = st.columns([1,1,1,1,1])
+        col1, col2, col3, col4, col5, col6 = st.columns([1,1,1,1,1,1])
         
         with col1:
             start_loc = st.number_input(f'L-{each_line_load+1} start loc', step = 1)
@@ -122,310 +159,328 @@ with tab3:
             end_loc = st.number_input(f'L-{each_line_load+1} end loc', step = 1)
             
         with col3:
-            line_load_value = st.number_input(f'L-{each_line_load+1} start value')
+            line_load_start_value = st.number_input(f'L-{each_line_load+1} start value')
             
         with col4:
             line_load_value = st.number_input(f'L-{each_line_load+1} end value')
             
         with col5:
-            line_load_case = st.selectbox(f'L-{each_line_load+1} case', ('D', 'L', 'S', 'W'))
+            line_load_dir = st.selectbox(f'L-{each_line_load+1} direction', DIST_DIRECTIONS, index=DIST_DIRECTIONS.index('Fy'))
             
-        
-            
-        line_load_data.append(f'DIST:Fy,{line_load_value},{line_load_value},{start_loc},{end_loc},case:{line_load_case}') 
-            
-            
-    beam_data['line_loads'] = line_load_data     
+        with col6:
+            line_load_case = st.selectbox(f'L-{each_line_load+1} case', ('D', 'L', 'S', 'W'))
             
-    
-    
-    
-   
-    
+        loads.append(
+            {
+                "Type": "Dist",
+                "Direction": line_load_dir,
+                "Start Magnitude": line_load_start_value,
+                "End Magnitude": line_load_value,
+                "Start Location": float(start_loc),
+                "End Location": float(end_loc),
+                "Case": line_load_case,
+            }
+        )
+
+    # The supports and loads of the live preview spec, in the structured form of beams.get_structured_beam_data
+    st.session_state['sidebar_supports'] = supports
+    st.session_state['sidebar_loads'] = loads
     
     if st.button('Generate Beam File'):
         
-        output = io.StringIO()
-        
-        output.write(f'{beam_data["beam_name"]}\n')
-        
-        output.write(f'{beam_data["beam_length"]},{beam_data["E"]},{beam_data["I_x"]}\n')
-        
-        output.write(f'{support_data[0]},{support_data[1]}\n')
-        
-        filename = f'{beam_data["beam_name"]}_beam.txt'
-        
-        for load in beam_data['point_loads']:
-            output.write(f'{load}\n')
-            
-        for line_load in beam_data['line_loads']:
-            output.write(f'{line_load}\n')
-                
-        file_content = output.getvalue()
-        output.close()
+        # Every support and load, with its direction and start and end values (beam file format version 2)
+        spec = sidebar_beam_spec()
+        file_content = beam_format.beam_file_text(spec)
         
         st.download_button(
         label="Download Beam File",
         data=file_content,
-        file_name=f"{beam_data['beam_name']}_beam.txt",
+        file_name=f"{spec['Name']}_beam.txt",
         mime="text/plain"
     )
+
+
+with tab1:
+    beam_properties_inputs()
+
+with tab2:
+    material_inputs()
+
+with tab3:
+    supports_and_loads_inputs()
     
                                
 with tab4:
     
-    uploaded_file = st.file_uploader("Upload your beam file (.txt) here", type = 'txt')
+    live_preview = st.toggle('Live preview of the sidebar inputs', key='live_preview')
+    uploaded_file = st.file_uploader("Upload your beam file (.txt) here", type = 'txt', disabled=live_preview)
+    n_points = st.select_slider('Stations per diagram', DIAGRAM_POINT_OPTIONS, value=DIAGRAM_POINTS, key='n_points')
+    profile_run = st.checkbox('Profile this run (stage timings)')
     
-    if uploaded_file is not None:
+    if uploaded_file is not None and not live_preview:
         try:
-            # Create a temporary file and save the uploaded content
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".txt") as tmp_file:
-                tmp_file.write(uploaded_file.read())
-                temp_file_path = tmp_file.name
-
-            # Now, pass the file path to your function
+            beam_text = uploaded_file.getvalue().decode()
             
             st.success("Beam model loaded successfully!")
-            
-            
-    
-            
-            
-            
-            
 
         except Exception as e:
             st.error(f"An error occurred: {e}")
-            
-            
-if temp_file_path is not None:
-            
-    Model = beams.load_beam_model(temp_file_path, lf.ec_eurocode_combs())          
-            
-    Model.analyze()
-
 
-    # MOMENT
-                
-    moment_array = Model.Members[f'{beam_name}'].moment_array('Mz', 1000, 'LC4a')
-    x_m = moment_array[0]
-    y_m = moment_array[1]
 
-    y_positive_m = np.where(y_m > 0, y_m, 0)  # Positive values of y_m
-    y_negative_m = np.where(y_m < 0, y_m, 0)  # Negative values of y_m
+DIAGRAMS = {
+    # result_type: (direction, combo family, units to choose from)
+    'moment': ('Mz', 'ULS', ['kN.m', 'kN.cm', 'N.mm']),
+    'shear': ('Fy', 'ULS', ['kN', 'N']),
+    'deflection': ('dy', 'characteristic', ['mm']),
+}
 
+COMBO_LIBRARY = lf.ec_combo_library()
 
 
-    fig_m.add_trace(
-                go.Scatter(
-                    x=x_m, 
-                    y=[0]*len(x_m),
-                    line={"color": "green"},
-                    name="Beam length"
-                    )
-                )
-                        
+@st.cache_data(max_entries=32)
+def beam_spec(beam_text: str) -> dict:
+    """
+    Returns the structured beam data of the beam file contents 'beam_text'.
+    """
+    return beams.get_structured_beam_data(read_csv_text(beam_text))
 
 
-    # Add trace for positive moment (blue fill)
-    fig_m.add_trace(
-        go.Scatter(
-            x=x_m, 
-            y=y_positive_m * 10e-4, #kN.cm
-            fill='tozeroy',  # Fill area to the x-axis
-            fillcolor='rgba(0, 0, 255, 0.3)',  # Blue fill with transparency
-            line=dict(color='blue'),  # Line color for positive moments
-            name="Positive Moment"
-        )
+def solve_uncached(spec: dict, n_points: int = DIAGRAM_POINTS) -> dict:
+    """
+    Returns the results of the beam 'spec' for every combo of COMBO_LIBRARY, at 'n_points' stations.
+    """
+    # Identical concurrent requests (same beam, same options) share one solve. The ULS and SLS
+    # combos are all derived from that one solve of the unit load cases.
+    return singleflight.solve_beam_data(
+        spec,
+        lf.flatten_combos(COMBO_LIBRARY),
+        {result_type: direction for result_type, (direction, *_) in DIAGRAMS.items()},
+        n_points,
     )
 
-    # Add trace for negative moment (red fill)
-    fig_m.add_trace(
-        go.Scatter(
-            x=x_m, 
-            y=y_negative_m * 10e-4, #kN.cm
-            fill='tozeroy',  # Fill area to the x-axis
-            fillcolor='rgba(255, 0, 0, 0.3)',  # Red fill with transparency
-            line=dict(color='red'),  # Line color for negative moments
-            name="Negative Moment"
-        )
-    )
 
-    fig_m.update_layout(
-        plot_bgcolor = 'white',  #Background color
-        xaxis=dict(
-            showgrid=True,
-            gridcolor='lightgray',
-            gridwidth=1,
-            tickmode='auto',  # Automatically add more tick values
-            nticks=20,        # Increase number of ticks on x-axis
-        ),
-        yaxis=dict(
-            showgrid=True,  # Show grid lines on y-axis
-            gridcolor='lightgray',  # Grid line color
-            gridwidth=1  # Grid line width
-        )
-    )
+def solve_incremental(spec: dict, n_points: int = DIAGRAM_POINTS) -> dict:
+    """
+    Returns the same as solve_uncached, from this session's incremental.IncrementalAnalysis: after an
+    edit of the sidebar loads, only the edited load cases are solved again.
+    """
+    analysis = st.session_state.get('incremental_analysis')
+    if analysis is None:
+        analysis = st.session_state['incremental_analysis'] = IncrementalAnalysis(lf.flatten_combos(COMBO_LIBRARY))
+    model = analysis.analyze(spec)
+    results = beams.extract_result_tensors(model, {result_type: direction for result_type, (direction, *_) in DIAGRAMS.items()}, n_points)
+    results['reactions'] = beams.extract_reactions(model)
+    return results
 
 
-    fig_m.layout.title.text = "Moment Diagram"
-    fig_m.layout.xaxis.title = "Beam Length, mm"
-    fig_m.layout.yaxis.title = "Resulting Moment, kN.cm"
+def solve(spec: dict, n_points: int = DIAGRAM_POINTS, incremental: bool = False) -> dict:
+    """
+    Returns solve_uncached(spec, n_points), cached on the beam spec and 'n_points' in the cache shared by
+    every session. The returned arrays are shared and read-only. With 'incremental' (the live preview),
+    a new spec is solved by solve_incremental instead, which gives the same results.
+    """
+    compute = solve_incremental if incremental else solve_uncached
+    return SHARED_CACHE.get_or_compute(content_hash('app solve', spec, n_points), compute, spec, n_points)
 
-    st.plotly_chart(fig_m)
 
-    st.write(f'Maximum positive moment: {round(max(y_positive_m) * 1e-6, 2)} kN.m')
-    st.write(f'Maximum negative moment: {round(min(y_negative_m) * 1e-6, 2)} kN.m')
+@st.fragment(run_every=LIVE_PREVIEW_DEBOUNCE)
+def live_preview_watcher(solved_spec_hash: str):
+    """
+    Reruns the app when the sidebar inputs have changed since 'solved_spec_hash' was solved and have then
+    stayed the same for LIVE_PREVIEW_DEBOUNCE seconds, so a burst of edits is analyzed once.
+    """
+    spec_hash = content_hash(sidebar_beam_spec())
+    if spec_hash != solved_spec_hash and spec_hash == st.session_state.get('pending_spec_hash'):
+        st.rerun(scope='app')
+    st.session_state['pending_spec_hash'] = spec_hash
 
-    #SHEAR
 
+@st.fragment
+def diagram_panel(spec: dict, result_type: str, n_points: int):
 
-    shear_array = Model.Members[f'{beam_name}'].shear_array('Fy', 1000, 'LC4a')
-    x_s = shear_array[0]
-    y_s = shear_array[1]
+    direction, family, unit_options = DIAGRAMS[result_type]
+    unit = st.selectbox(f'{result_type.title()} unit', unit_options, key=f'{result_type}_unit')
 
-    y_positive_s = np.where(y_s > 0, y_s, 0)  # Positive values of y_s
-    y_negative_s = np.where(y_s < 0, y_s, 0)  # Negative values of y_s
+    x_locs, combo_names, combo_results = solve(spec, n_points)[result_type]
+    family_rows = [combo_names.index(combo_name) for combo_name in COMBO_LIBRARY[family]]
+    results = combo_results[family_rows]
 
-    fig_s.add_trace(
-                go.Scatter(
-                    x=x_s, 
-                    y=[0]*len(x_s),
-                    line={"color": "green"},
-                    name="Beam length"
-                    )
-                )
-                        
+    fig = plots.plotly_diagram(x_locs, results, result_type, units=unit)
 
-    # Add trace for positive moment (blue fill)
-    fig_s.add_trace(
-        go.Scatter(
-            x=x_s, 
-            y=y_positive_s,
-            fill='tozeroy',  # Fill area to the x-axis
-            fillcolor='rgba(0, 0, 255, 0.3)',  # Blue fill with transparency
-            line=dict(color='blue'),  # Line color for positive moments
-            name="Positive Shear"
-        )
-    )
+    st.plotly_chart(fig)
 
-    # Add trace for negative moment (red fill)
-    fig_s.add_trace(
-        go.Scatter(
-            x=x_s, 
-            y=y_negative_s,
-            fill='tozeroy',  # Fill area to the x-axis
-            fillcolor='rgba(255, 0, 0, 0.3)',  # Red fill with transparency
-            line=dict(color='red'),  # Line color for negative moments
-            name="Negative Shear"
-        )
-    )
+    scale = u.result_scale(result_type, unit)
+    st.write(f'Maximum positive {result_type} ({family}): {round(max(results.max(), 0) * scale, 2)} {unit}')
+    st.write(f'Maximum negative {result_type} ({family}): {round(min(results.min(), 0) * scale, 2)} {unit}')
 
-    fig_s.update_layout(
-        plot_bgcolor = 'white',  #Background color
-        xaxis=dict(
-            showgrid=True,
-            gridcolor='lightgray',
-            gridwidth=1,
-            tickmode='auto',  # Automatically add more tick values
-            nticks=20,        # Increase number of ticks on x-axis
-        ),
-        yaxis=dict(
-            showgrid=True,  # Show grid lines on y-axis
-            gridcolor='lightgray',  # Grid line color
-            gridwidth=1  # Grid line width
+
+@st.fragment
+def serviceability_panel(spec: dict, n_points: int):
+
+    with st.expander('Serviceability checks'):
+        limit_columns = st.columns(len(lf.DEFLECTION_LIMITS))
+        limits = {
+            family: column.number_input(f'Limit L/x, {family}', min_value=1, value=limit, key=f'limit_{family}')
+            for column, (family, limit) in zip(limit_columns, lf.DEFLECTION_LIMITS.items())
+        }
+
+        solved = solve(spec, n_points)
+        x_locs, combo_names, deflections = solved['deflection']
+        checks = serviceability.deflection_checks(
+            x_locs, combo_names, deflections, solved['reactions']['locations'], limits=limits
+        )
+        st.table(
+            {
+                'Combos': [check['family'] for check in checks],
+                'Span': [check['span'] for check in checks],
+                'Max deflection (mm)': [round(check['deflection'], 2) for check in checks],
+                'Governing combo': [check['combo'] for check in checks],
+                'L/δ': [round(check['ratio']) if np.isfinite(check['ratio']) else '∞' for check in checks],
+                'Limit': [f"L/{check['limit']}" for check in checks],
+                'Check': ['OK' if check['ok'] else 'FAIL' for check in checks],
+            }
         )
-    )
 
 
-    fig_s.layout.title.text = "Shear Diagram"
-    fig_s.layout.xaxis.title = "Beam Length, mm"
-    fig_s.layout.yaxis.title = "Resulting Shear, N"
+@st.fragment
+def reactions_panel(spec: dict, n_points: int):
 
-    st.plotly_chart(fig_s)
+    with st.expander('Support reactions'):
+        col1, col2 = st.columns([1,1])
+        with col1:
+            force_unit = st.selectbox('Force unit', ['kN', 'N'], key='reaction_force_unit')
+        with col2:
+            moment_unit = st.selectbox('Moment unit', ['kN.m', 'kN.cm', 'N.mm'], key='reaction_moment_unit')
+
+        reactions = solve(spec, n_points)['reactions']
+        force_scale = u.output_scale('force', force_unit)
+        moment_scale = u.output_scale('moment', moment_unit)
+        st.table(
+            {
+                'Support': reactions['nodes'],
+                'Location (mm)': reactions['locations'],
+                f'Max FY ({force_unit})': reactions['max'][:, 1] * force_scale,
+                f'Min FY ({force_unit})': reactions['min'][:, 1] * force_scale,
+                f'Max MZ ({moment_unit})': reactions['max'][:, 5] * moment_scale,
+                f'Min MZ ({moment_unit})': reactions['min'][:, 5] * moment_scale,
+            }
+        )
 
-    st.write(f'Maximum positive shear: {round(max(y_positive_s) * 1e-3, 2)} kN')
-    st.write(f'Maximum negative shear: {round(min(y_negative_s) * 1e-3, 2)} kN')
 
-    #DEFLECTION
+@st.fragment
+def structural_checks_panel(spec: dict, n_points: int):
 
-    deflection_array = Model.Members[f'{beam_name}'].deflection_array('dy', 1000, 'LC4a')
-    x_d = deflection_array[0]
-    y_d = deflection_array[1]
+    C = st.expander('Structural checks')
 
-    y_positive_d = np.where(y_d > 0, y_d, 0)  # Positive values of y_s
-    y_negative_d = np.where(y_d < 0, y_d, 0)  # Negative values of y_s
+    with C:
+        col1, col2, col3 = st.columns([1,1,1])
+        with col1:
+            Sx = st.number_input("Sx ($mm^3$)", value=150000)
+        with col2:
+            Av = st.number_input("Shear area Av ($mm^2$)", value=1500)
+        with col3:
+            Fy = st.number_input("Yield Strength (MPa)", value=150)
+
+        check_ltb = st.checkbox('Check lateral-torsional buckling (braced at the supports)')
+        if check_ltb:
+            col1, col2, col3 = st.columns([1,1,1])
+            with col1:
+                I_y = st.number_input("Iy, minor axis ($mm^4$)", value=4000000)
+            with col2:
+                J = st.number_input("J ($mm^4$)", value=100000)
+            with col3:
+                I_w = st.number_input("Iw ($mm^6$)", value=10000000000)
 
-    fig_d.add_trace(
-                go.Scatter(
-                    x=x_d, 
-                    y=[0]*len(x_d),
-                    line={"color": "green"},
-                    name="Beam length"
-                    )
-                )
-                        
+        mr_latex, mr_value = app_module.calc_Mr2(Sx, Fy)
+        st.latex(mr_latex)
 
-    # Add trace for positive moment (blue fill)
-    fig_d.add_trace(
-        go.Scatter(
-            x=x_d, 
-            y=y_positive_d,
-            fill='tozeroy',  # Fill area to the x-axis
-            fillcolor='rgba(0, 0, 255, 0.3)',  # Blue fill with transparency
-            line=dict(color='blue'),  # Line color for positive moments
-            name="Positive deflection"
+        section = {'S': Sx, 'Fy': Fy, 'Av': Av}
+        if check_ltb:
+            section.update(E=spec['E'], G=beams.calc_shear_modulus(spec['E'], 0.3), Iy=I_y, J=J, Iw=I_w)
+
+        solved = solve(spec, n_points)
+        x_locs, combo_names, moments = solved['moment']
+        _, _, shears = solved['shear']
+        uls_rows = [combo_names.index(combo_name) for combo_name in COMBO_LIBRARY['ULS']]
+        checks = design_checks.design_checks(
+            x_locs,
+            list(COMBO_LIBRARY['ULS']),
+            moments[uls_rows],
+            shears[uls_rows],
+            section,
+            solved['reactions']['locations'],
         )
-    )
 
-    # Add trace for negative moment (red fill)
-    fig_d.add_trace(
-        go.Scatter(
-            x=x_d, 
-            y=y_negative_d,
-            fill='tozeroy',  # Fill area to the x-axis
-            fillcolor='rgba(255, 0, 0, 0.3)',  # Red fill with transparency
-            line=dict(color='red'),  # Line color for negative moments
-            name="Negative deflection"
+        governing = checks['governing']
+        st.table(
+            {
+                'Check': list(governing),
+                'Utilisation': [round(worst['utilisation'], 3) for worst in governing.values()],
+                'Location (mm)': [round(worst['location']) for worst in governing.values()],
+                'Governing combo': [worst['combo'] for worst in governing.values()],
+            }
         )
-    )
+        overall = governing['overall']
+        if overall['utilisation'] <= 1:
+            st.success(f"Member OK: governing utilisation {overall['utilisation']:.2f} ({overall['check']}) at {overall['location']:.0f} mm")
+        else:
+            st.error(f"Member fails: governing utilisation {overall['utilisation']:.2f} ({overall['check']}) at {overall['location']:.0f} mm")
+            
+            
+if live_preview:
+    spec = sidebar_beam_spec()
+elif beam_text is not None:
+    spec = beam_spec(beam_text)
+else:
+    spec = None
 
-    fig_d.update_layout(
-        plot_bgcolor = 'white',  #Background color
-        xaxis=dict(
-            showgrid=True,
-            gridcolor='lightgray',
-            gridwidth=1,
-            tickmode='auto',  # Automatically add more tick values
-            nticks=20,        # Increase number of ticks on x-axis
-        ),
-        yaxis=dict(
-            showgrid=True,  # Show grid lines on y-axis
-            gridcolor='lightgray',  # Grid line color
-            gridwidth=1  # Grid line width
-        )
-    )
+if spec is not None:
+            
+    tracer = tracing.Tracer() if profile_run else nullcontext()
 
+    with tracer:
 
-    fig_d.layout.title.text = "Deflection Diagram"
-    fig_d.layout.xaxis.title = "Beam Length, mm"
-    fig_d.layout.yaxis.title = "Resulting deflection, mm"
+        solved_ok = False
+        if not spec['Loads']:
+            st.info('Add at least one load to analyze the beam.')
+        else:
+            try:
+                if profile_run:
+                    # A profiled run solves again instead of reading the cache, so that every stage is timed.
+                    (solve_incremental if live_preview else solve_uncached)(spec, n_points)
+                solve(spec, n_points, incremental=live_preview)
+                solved_ok = True
+            except Exception as e:
+                st.error(f"The beam can't be analyzed: {e}")
 
-    st.plotly_chart(fig_d)
+        if solved_ok:
 
-    st.write(f'Maximum positive deflection: {round(max(y_positive_d), 2)} mm')
-    st.write(f'Maximum negative deflection: {round(min(y_negative_d), 2)} mm')
+            for result_type in DIAGRAMS:
+                diagram_panel(spec, result_type, n_points)
 
-    C = st.expander('Structural checks')
+            serviceability_panel(spec, n_points)
 
-    with C:
-        mr_latex, mr_value = app_module.calc_Mr2(Sx, Fy)
-        st.latex(mr_latex)
+            reactions_panel(spec, n_points)
+
+            structural_checks_panel(spec, n_points)
+
+    if live_preview:
+        live_preview_watcher(content_hash(spec))
+
+    if profile_run:
+
+        with st.expander('Profiling'):
+            st.table(tracer.summary())
+            cache_stats = SHARED_CACHE.stats()
+            st.caption(
+                f"Shared result cache: {cache_stats['entries']} beams, "
+                f"{cache_stats['bytes'] / 1024**2:.1f} of {cache_stats['max_bytes'] / 1024**2:.0f} MiB, "
+                f"hit rate {cache_stats['hit_rate']:.0%}, {cache_stats['evictions']} evictions"
+            )
+            st.download_button('Download Chrome trace', tracer.to_chrome_trace(), file_name='beam_trace.json', mime='application/json')
+            st.download_button('Download Prometheus metrics', tracer.to_prometheus(), file_name='beam_metrics.prom', mime='text/plain')
         
 else:
     st.warning(f'There is no imported file yet.\n'
-               f'Complete the inputs on the left sidebar, download the generated .txt file and then upload it in the Analysis section.')
-    
-    
-    
-    
+               f'Complete the inputs on the left sidebar and turn on the live preview in the Analysis section, '
+               f'or download the generated .txt file and upload it there.')
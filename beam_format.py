@@ -0,0 +1,280 @@
+"""
+Version 2 of the beam file format, and the columnar load table its loads are parsed into.
+
+A version 1 beam file (see beams.get_structured_beam_data) is the beam name, the beam attributes,
+the supports and then one line per load. A version 2 file starts with the FORMAT_HEADER line and may
+also have load case lines, in any order with the load lines:
+
+    BEAM_FORMAT:2
+    Balcony transfer
+    4800,24500,1200000000,1,1
+    1000:P,3800:R,6000:R
+    CASE:Dead,category:permanent,description:Self weight and finishes
+    CASE:Live,category:imposed
+    POINT:Fy,-10000,4800,case:Live
+    POINT:Mz,2.5e6,2400,case:Live
+    POINT:Mx,1e5,6000,case:Dead
+    DIST:Fy,-30,-20,0,4800,case:Dead
+    DIST:Fx,1.5,1.5,0,6000,case:Dead
+
+The lines are:
+    the beam name
+    the beam attributes, L,E,Iz[,Iy,A,J,nu,rho] (as in version 1)
+    every support, as location:type with type P (pinned), F (fixed) or R (roller)
+    'CASE:name' followed by any 'key:value' metadata of the load case (optional, one line per case). The
+        metadata is carried through to the 'Cases' of the structured beam data and written back by
+        beam_file_text, but not used in the analysis: e.g. a 'psi0' is not applied to the load combos,
+        whose factors already include it (see load_factors.PSI_FACTORS).
+    'POINT:direction,magnitude,location,case:name' with direction one of POINT_DIRECTIONS: Fy (shear),
+        Fx (axial force), Mz (bending moment) or Mx (torque)
+    'DIST:direction,start magnitude,end magnitude,start location,end location,case:name' with direction
+        one of DIST_DIRECTIONS: Fy or Fx (axial), over a length: the start and end locations differ
+
+The values are comma-separated as in any csv file, so a field with a comma in it (e.g. a name or a
+"key:value" of metadata) is quoted as a whole.
+beam_file_text writes the structured beam data back to this format.
+"""
+import csv
+import io
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from diagrams import DIST_DIRECTIONS, POINT_DIRECTIONS
+from utils import str_to_float
+
+
+FORMAT_HEADER = 'BEAM_FORMAT:2'
+
+ATTRIBUTE_KEYS = ["L", "E", "Iz", "Iy", "A", "J", "nu", "rho"]
+
+
+def format_version(raw_data: list[list[str]]) -> int:
+    """
+    Returns the format version (1 or 2) of the beam file rows 'raw_data', as returned by utils.read_csv_text.
+    """
+    if raw_data and raw_data[0] and raw_data[0][0].strip() == FORMAT_HEADER:
+        return 2
+    return 1
+
+
+
+def normalize_direction(direction: str) -> str:
+    """
+    Returns 'direction' in the form of POINT_DIRECTIONS (e.g. 'FY' or 'fy' -> 'Fy').
+    """
+    direction = direction.strip()
+    return direction[0].upper() + direction[1:].lower()
+
+
+
+@dataclass
+class LoadTable:
+    """
+    The loads of a beam as columns, one row per load in the order of the beam file:
+
+    'case_names': the load case names, in the order of their first load
+    'is_point': (n_loads,) True for the point loads, False for the distributed loads
+    'directions': (n_loads,) direction of each load, one of POINT_DIRECTIONS
+    'cases': (n_loads,) index of the case of each load in 'case_names'
+    'start_mags', 'end_mags': (n_loads,) start and end magnitudes (both the magnitude for a point load)
+    'start_locs', 'end_locs': (n_loads,) start and end locations (both the location for a point load)
+    """
+
+    case_names: list[str]
+    is_point: np.ndarray
+    directions: np.ndarray
+    cases: np.ndarray
+    start_mags: np.ndarray
+    end_mags: np.ndarray
+    start_locs: np.ndarray
+    end_locs: np.ndarray
+
+    def __post_init__(self):
+        zero_length = np.flatnonzero(~self.is_point & (self.start_locs == self.end_locs))
+        if len(zero_length):
+            idx = zero_length[0]
+            raise ValueError(
+                f"The distributed load at {self.start_locs[idx]} of case '{self.case_names[self.cases[idx]]}' has no length: "
+                "its start and end locations are the same"
+            )
+
+    def __len__(self) -> int:
+        return len(self.cases)
+
+    def __eq__(self, other) -> bool:
+        # The generated __eq__ compares the fields as a tuple, which is ambiguous for NumPy arrays
+        if not isinstance(other, LoadTable):
+            return NotImplemented
+        return self.case_names == other.case_names and all(
+            np.array_equal(getattr(self, field.name), getattr(other, field.name)) for field in fields(self) if field.name != 'case_names'
+        )
+
+    @classmethod
+    def from_rows(cls, load_rows: list[list[str]]) -> 'LoadTable':
+        """
+        Returns the LoadTable of the POINT and DIST lines 'load_rows' of a beam file. The numbers of all
+        of the point loads, and then of all of the distributed loads, are converted at once.
+
+        # Example input
+        [['POINT:Fy', '-10000', '4800', 'case:Live'], ['DIST:Fy', '-30', '-20', '0', '4800', 'case:Dead']]
+
+        # Example output
+        LoadTable(case_names=['Live', 'Dead'], is_point=array([True, False]), directions=array(['Fy', 'Fy']),
+                  cases=array([0, 1]), start_mags=array([-10000., -30.]), end_mags=array([-10000., -20.]),
+                  start_locs=array([4800., 0.]), end_locs=array([4800., 4800.]))
+        """
+        is_point, directions, case_labels = [], [], []
+        for row in load_rows:
+            load_type, direction = row[0].split(":")
+            load_type, direction = load_type.strip().upper(), normalize_direction(direction)
+            if load_type == "POINT":
+                n_fields, valid_directions = 4, POINT_DIRECTIONS
+            elif load_type == "DIST":
+                n_fields, valid_directions = 6, DIST_DIRECTIONS
+            else:
+                raise ValueError(f"Unknown load type '{load_type}' in line '{','.join(row)}'")
+            if len(row) != n_fields:
+                raise ValueError(f"A {load_type} line has {n_fields} values, not {len(row)}: '{','.join(row)}'")
+            if direction not in valid_directions:
+                raise ValueError(f"{load_type} loads are in one of the directions {', '.join(valid_directions)}, not '{direction}'")
+            is_point.append(load_type == "POINT")
+            directions.append(direction)
+            case_labels.append(row[-1].split(":", 1)[1].strip())
+
+        is_point = np.array(is_point, dtype=bool)
+        values = np.zeros((len(load_rows), 4))
+        point_rows, dist_rows = np.flatnonzero(is_point), np.flatnonzero(~is_point)
+        # (magnitude, location) of the point loads, spread over the start and end columns
+        values[point_rows] = np.array([load_rows[idx][1:3] for idx in point_rows], dtype=float).reshape(-1, 2)[:, [0, 0, 1, 1]]
+        values[dist_rows] = np.array([load_rows[idx][1:5] for idx in dist_rows], dtype=float).reshape(-1, 4)
+
+        case_names = list(dict.fromkeys(case_labels))
+        case_index = {case_name: idx for idx, case_name in enumerate(case_names)}
+        return cls(
+            case_names=case_names,
+            is_point=is_point,
+            directions=np.array(directions, dtype=object),
+            cases=np.array([case_index[case_label] for case_label in case_labels], dtype=int),
+            start_mags=values[:, 0],
+            end_mags=values[:, 1],
+            start_locs=values[:, 2],
+            end_locs=values[:, 3],
+        )
+
+    @classmethod
+    def from_dicts(cls, loads: list[dict]) -> 'LoadTable':
+        """
+        Returns the LoadTable of 'loads', the "Loads" of the structured beam data (see to_dicts).
+        """
+        is_point = np.array([load["Type"] == "Point" for load in loads], dtype=bool)
+        case_names = list(dict.fromkeys(load["Case"] for load in loads))
+        case_index = {case_name: idx for idx, case_name in enumerate(case_names)}
+
+        def column(point_key, dist_key):
+            return np.array([load[point_key] if load["Type"] == "Point" else load[dist_key] for load in loads], dtype=float)
+
+        return cls(
+            case_names=case_names,
+            is_point=is_point,
+            directions=np.array([normalize_direction(load["Direction"]) for load in loads], dtype=object),
+            cases=np.array([case_index[load["Case"]] for load in loads], dtype=int),
+            start_mags=column("Magnitude", "Start Magnitude"),
+            end_mags=column("Magnitude", "End Magnitude"),
+            start_locs=column("Location", "Start Location"),
+            end_locs=column("Location", "End Location"),
+        )
+
+    def to_dicts(self) -> list[dict]:
+        """
+        Returns the loads as the "Loads" of the structured beam data, a list of dicts as returned by
+        beams.parse_loads.
+
+        # Example output
+        [
+            {"Type": "Point", "Direction": "Fy", "Magnitude": -10000.0, "Location": 4800.0, "Case": "Live"},
+            {"Type": "Dist", "Direction": "Fy", "Start Magnitude": -30.0, "End Magnitude": -20.0,
+             "Start Location": 0.0, "End Location": 4800.0, "Case": "Dead"}
+        ]
+        """
+        loads = []
+        for idx in range(len(self)):
+            case_name = self.case_names[self.cases[idx]]
+            if self.is_point[idx]:
+                loads.append(
+                    {
+                        "Type": "Point",
+                        "Direction": self.directions[idx],
+                        "Magnitude": float(self.start_mags[idx]),
+                        "Location": float(self.start_locs[idx]),
+                        "Case": case_name,
+                    }
+                )
+            else:
+                loads.append(
+                    {
+                        "Type": "Dist",
+                        "Direction": self.directions[idx],
+                        "Start Magnitude": float(self.start_mags[idx]),
+                        "End Magnitude": float(self.end_mags[idx]),
+                        "Start Location": float(self.start_locs[idx]),
+                        "End Location": float(self.end_locs[idx]),
+                        "Case": case_name,
+                    }
+                )
+        return loads
+
+    def case_matrix(self) -> np.ndarray:
+        """
+        Returns the (n_loads, n_cases)-shaped array that is 1 where a load belongs to a case, so that
+        'magnitudes[:, None] * case_matrix()' gives the magnitude of every load under every case.
+        """
+        return np.eye(len(self.case_names))[self.cases]
+
+
+
+def parse_case_rows(case_rows: list[list[str]]) -> dict[str, dict]:
+    """
+    Returns the load case metadata of the CASE lines 'case_rows' of a beam file, keyed by case name.
+    Numeric values are converted to floats.
+
+    # Example input
+    [['CASE:Dead', 'category:permanent', 'description:Self weight'], ['CASE:Snow', 'psi0:0.7']]
+
+    # Example output
+    {'Dead': {'category': 'permanent', 'description': 'Self weight'}, 'Snow': {'psi0': 0.7}}
+    """
+    cases = {}
+    for row in case_rows:
+        metadata = {}
+        for field in row[1:]:
+            if ":" not in field:
+                raise ValueError(f"The metadata of a CASE line is written as key:value, not '{field}'")
+            key, value = field.split(":", 1)
+            metadata[key.strip()] = str_to_float(value.strip())
+        cases[row[0].split(":", 1)[1].strip()] = metadata
+    return cases
+
+
+
+def beam_file_text(beam_data: dict) -> str:
+    """
+    Returns the contents of a version 2 beam file for the structured beam data 'beam_data' (as returned
+    by beams.get_structured_beam_data), with every support, load and load case metadata. Reading the
+    text back gives the same beam data.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator='\n')
+    writer.writerow([FORMAT_HEADER])
+    writer.writerow([beam_data["Name"]])
+    writer.writerow([repr(float(beam_data[key])) for key in ATTRIBUTE_KEYS])
+    writer.writerow([f'{float(location)!r}:{support_type}' for location, support_type in beam_data["Supports"].items()])
+    for case_name, metadata in beam_data.get("Cases", {}).items():
+        writer.writerow([f'CASE:{case_name}'] + [f'{key}:{value}' for key, value in metadata.items()])
+    for load in beam_data["Loads"]:
+        if load["Type"] == "Point":
+            values = [load["Magnitude"], load["Location"]]
+        else:
+            values = [load["Start Magnitude"], load["End Magnitude"], load["Start Location"], load["End Location"]]
+        writer.writerow([f'{load["Type"].upper()}:{load["Direction"]}'] + [repr(float(value)) for value in values] + [f'case:{load["Case"]}'])
+    return output.getvalue()
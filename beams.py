@@ -2,64 +2,485 @@ from math import pi
 from PyNite import FEModel3D
 import csv
 from PyNite.Visualization import render_model
-from utils import str_to_int, str_to_float, read_csv_file
+from utils import str_to_int, str_to_float, read_csv_file, read_csv_text
 from typing import Optional
+import numpy as np
+import beam_format
+import diagrams
+import load_factors as lf
+import tracing
 
 
 
 ### WORKBOOK06
 
 
+# PyNite adds this combo to a model that is analyzed before it has any load combos of its own.
+DEFAULT_COMBO = 'Combo 1'
+
+
+def result_combo_names(beam_model: FEModel3D) -> list[str]:
+    """
+    Returns the names of the load combos of 'beam_model' that results are extracted for: all of them
+    except the 'Combo 1' (see DEFAULT_COMBO) that PyNite added when build_beam analyzed the model before
+    the load combos were added. build_beam marks that combo, so a 'Combo 1' of the user's own (which
+    replaces it) is kept. A model whose only combo is the default keeps it.
+
+    # Example
+    combos ['Combo 1' (PyNite's), 'ULS', 'SLS'] -> ['ULS', 'SLS'], ['Combo 1' (user's), 'SLS'] -> ['Combo 1', 'SLS']
+    """
+    combo_names = list(beam_model.LoadCombos)
+    if len(combo_names) == 1:
+        return combo_names
+    return [
+        combo_name for combo_name in combo_names
+        if not getattr(beam_model.LoadCombos[combo_name], 'is_pynite_default', False)
+    ]
+
+
+
 def extract_arrays_all_combos(
     solved_beam_model: FEModel3D,
     result_type: str,
     direction: Optional[str],
     n_points: int = 200,
+    store=None,
+    kernel: bool = True,
 ) -> dict:
     
     """
     Returns a dictionary keyed by load combo name that contains the resulting arrays of the 'solved_beam_model',
     for the given 'result_type' and 'direction' with 'n_points' as the number of values in the array.
 
-    'solved_beam_model': A PyNite.FEModel3D object that contains one member and has been successfully analyzed
+    'solved_beam_model': A PyNite.FEModel3D object that contains one member. It is only analyzed here if it has
+        not been solved since its last change, so extracting several result types costs one analysis.
     'result_type': str, one of {'shear', 'moment', 'deflection', 'axial', 'torque'}
     'direction': str that corresponds to the 'result_type':
         'shear': {'Fy', 'Fz'}
         'moment': {'Mz', 'My'}
         'deflection': {'dx', 'dy', 'dz'}
     'n_points': the number of values in the resulting arrays
+    'store': an optional result_store.ResultStore. If it already holds the results of an identical model
+        they are returned (memory-mapped) without analyzing, otherwise the new results are saved to it.
+        The key is the model fingerprint, so the model has been built by then; callers that start from
+        beam data look it up by ResultStore.beam_key instead (see solve_unit_cases, report.beam_envelopes).
+    'kernel': if True, the in-plane results that diagrams.py can evaluate are computed for all of the combos
+        at once (see diagram_result_tensor), which is much faster for large 'n_points'. Otherwise, and for
+        the other results, every station is sampled from PyNite.
 
     The keys in the resulting dictionary represent the names of all of the load combos in the model. The
     values are (n_points, 2)-shaped arrays that contain an x-array (of beam locations) and a y-array (of results).
     """
 
-    solved_beam_model.analyze()
+    if store is not None:
+        key = store.key(model_fingerprint(solved_beam_model), result_type, direction, n_points)
+        stored = store.get(key)
+        if stored is None:
+            stored = store.put(key, extract_arrays_all_combos(solved_beam_model, result_type, direction, n_points, kernel=kernel))
+        return stored
+
+    if solved_beam_model.solution is None:
+        with tracing.stage('analyze'):
+            solved_beam_model.analyze()
+
+    if kernel:
+        tensor = diagram_result_tensor(solved_beam_model, result_type, direction, n_points)
+        if tensor is not None:
+            x_locs, combo_names, results = tensor
+            return {combo_name: np.array([x_locs, results[idx]]) for idx, combo_name in enumerate(combo_names)}
+
     all_combos = {}
     member_name = list(solved_beam_model.Members.keys())[0]
 
-    for combo_name in list(solved_beam_model.LoadCombos.keys())[1:]: #The first combination is the default 'Combo 1' so I exclude it:
+    with tracing.stage('sample'):
+        for combo_name in result_combo_names(solved_beam_model):
         
-        if result_type == 'shear':
-            result = solved_beam_model.Members[member_name].shear_array(direction, n_points, combo_name)
-            #print(result) You can see it returns list[list[float], list[float]] as mentioned above.
-            result = all_combos[combo_name] = result
-        elif result_type == 'moment':
-            result = solved_beam_model.Members[member_name].moment_array(direction, n_points, combo_name)
-            all_combos[combo_name] = result
-        elif result_type == 'axial':
-            result = solved_beam_model.Members[member_name].axial_array(n_points, combo_name)
-            all_combos[combo_name] = result
-        elif result_type == 'torque':
-            result = solved_beam_model.Members[member_name].torque_array(n_points, combo_name)
-            all_combos[combo_name] = result
-        elif result_type == 'deflection':
-            result = solved_beam_model.Members[member_name].deflection_array(direction, n_points, combo_name)
-            all_combos[combo_name] = result
+            if result_type == 'shear':
+                result = solved_beam_model.Members[member_name].shear_array(direction, n_points, combo_name)
+                #print(result) You can see it returns list[list[float], list[float]] as mentioned above.
+                result = all_combos[combo_name] = result
+            elif result_type == 'moment':
+                result = solved_beam_model.Members[member_name].moment_array(direction, n_points, combo_name)
+                all_combos[combo_name] = result
+            elif result_type == 'axial':
+                result = solved_beam_model.Members[member_name].axial_array(n_points, combo_name)
+                all_combos[combo_name] = result
+            elif result_type == 'torque':
+                result = solved_beam_model.Members[member_name].torque_array(n_points, combo_name)
+                all_combos[combo_name] = result
+            elif result_type == 'deflection':
+                result = solved_beam_model.Members[member_name].deflection_array(direction, n_points, combo_name)
+                all_combos[combo_name] = result
 
     return all_combos
 
 
 
+def extract_result_tensor(
+    solved_beam_model: FEModel3D,
+    result_type: str,
+    direction: Optional[str],
+    n_points: int = 200,
+    store=None,
+    kernel: bool = True,
+) -> tuple[np.ndarray, list[str], np.ndarray]:
+
+    """
+    Returns the results of 'extract_arrays_all_combos' batched into one tensor so that the x-locations
+    are stored once instead of once per load combo.
+
+    The return value is a tuple of (x_locs, combo_names, results) where:
+    'x_locs': (n_points,)-shaped array of beam locations shared by every combo
+    'combo_names': list of the load combo names, in the same order as the rows of 'results'
+    'results': (n_combos, n_points)-shaped array of the results for each load combo
+    """
+
+    if store is None and kernel:
+        if solved_beam_model.solution is None:
+            with tracing.stage('analyze'):
+                solved_beam_model.analyze()
+        tensor = diagram_result_tensor(solved_beam_model, result_type, direction, n_points)
+        if tensor is not None:
+            return tensor
+
+    all_combos = extract_arrays_all_combos(solved_beam_model, result_type, direction, n_points, store, kernel)
+    combo_names = list(all_combos.keys())
+    if not combo_names:
+        member = list(solved_beam_model.Members.values())[0]
+        return np.linspace(0, member.L(), n_points), [], np.zeros((0, n_points))
+    x_locs = np.asarray(all_combos[combo_names[0]][0], dtype=float)
+    results = np.array([all_combos[combo_name][1] for combo_name in combo_names], dtype=float)
+    return x_locs, combo_names, results
+
+
+
+def extract_result_tensors(
+    solved_beam_model: FEModel3D,
+    result_types: dict[str, Optional[str]],
+    n_points: int = 200,
+    store=None,
+    kernel: bool = True,
+) -> dict[str, tuple[np.ndarray, list[str], np.ndarray]]:
+
+    """
+    Returns {result_type: extract_result_tensor(...)} for every {result_type: direction} in 'result_types'.
+    The model is analyzed at most once for all of them.
+    """
+
+    return {
+        result_type: extract_result_tensor(solved_beam_model, result_type, direction, n_points, store, kernel)
+        for result_type, direction in result_types.items()
+    }
+
+
+
+def diagram_terms(solved_beam_model: FEModel3D, combo_names: list[str]) -> Optional[diagrams.DiagramTerms]:
+
+    """
+    Returns the loads and support reactions of the single-member 'solved_beam_model' under each of the
+    'combo_names' as diagrams.DiagramTerms, or None if the model has anything the kernel doesn't
+    evaluate: a member that doesn't start at x = 0 along the global X axis, nodal loads, or loads
+    other than the in-plane and axial member loads (Fx, Fy, Mx and Mz point loads, Fx and Fy
+    distributed loads).
+    """
+
+    member = list(solved_beam_model.Members.values())[0]
+    start = member.i_node
+    if (start.X, start.Y, start.Z) != (0, 0, 0) or member.j_node.Y != 0 or member.j_node.Z != 0:
+        return None
+    if any(node.NodeLoads for node in solved_beam_model.Nodes.values()):
+        return None
+    if any(load[0] not in diagrams.POINT_DIRECTIONS for load in member.PtLoads):
+        return None
+    if any(load[0] not in diagrams.DIST_DIRECTIONS for load in member.DistLoads):
+        return None
+
+    factors = np.array(
+        [[solved_beam_model.LoadCombos[combo_name].factors.get(case, 0.0) for combo_name in combo_names]
+         for case in [load[3] for load in member.PtLoads] + [load[5] for load in member.DistLoads]],
+        dtype=float,
+    ).reshape(len(member.PtLoads) + len(member.DistLoads), len(combo_names))
+    point_factors, dist_factors = factors[:len(member.PtLoads)], factors[len(member.PtLoads):]
+
+    point_locs = [load[2] for load in member.PtLoads]
+    point_dirs = [load[0] for load in member.PtLoads]
+    point_mags = [load[1] * point_factors[idx] for idx, load in enumerate(member.PtLoads)]
+    support_flags = ['support_DX', 'support_DY', 'support_DZ', 'support_RX', 'support_RY', 'support_RZ']
+    for node in solved_beam_model.Nodes.values():
+        if any(getattr(node, flag) for flag in support_flags):
+            for direction, component in [('Fx', 'FX'), ('Fy', 'FY'), ('Mx', 'MX'), ('Mz', 'MZ')]:
+                point_locs.append(node.X)
+                point_dirs.append(direction)
+                point_mags.append(np.array([getattr(node, f'Rxn{component}')[combo_name] for combo_name in combo_names]))
+
+    dist_loads = member.DistLoads
+    return diagrams.DiagramTerms(
+        length=member.L(),
+        EI=member.E * member.Iz,
+        point_locs=np.array(point_locs, dtype=float),
+        point_dirs=np.array(point_dirs, dtype=object),
+        point_mags=np.array(point_mags, dtype=float).reshape(len(point_locs), len(combo_names)),
+        dist_starts=np.array([load[3] for load in dist_loads], dtype=float),
+        dist_ends=np.array([load[4] for load in dist_loads], dtype=float),
+        dist_dirs=np.array([load[0] for load in dist_loads], dtype=object),
+        dist_start_mags=np.array([load[1] * dist_factors[idx] for idx, load in enumerate(dist_loads)], dtype=float).reshape(len(dist_loads), len(combo_names)),
+        dist_end_mags=np.array([load[2] * dist_factors[idx] for idx, load in enumerate(dist_loads)], dtype=float).reshape(len(dist_loads), len(combo_names)),
+        deflection0=np.array([start.DY[combo_name] for combo_name in combo_names], dtype=float),
+        slope0=np.array([start.RZ[combo_name] for combo_name in combo_names], dtype=float),
+    )
+
+
+
+def diagram_result_tensor(
+    solved_beam_model: FEModel3D,
+    result_type: str,
+    direction: Optional[str],
+    n_points: int = 200,
+) -> Optional[tuple[np.ndarray, list[str], np.ndarray]]:
+
+    """
+    Returns the same as extract_result_tensor (without a store), evaluated for every combo at once by
+    the vectorized kernel in diagrams.py, or None if the kernel doesn't evaluate this result type and
+    direction (see diagrams.KERNEL_RESULTS) or this model (see diagram_terms).
+    The model must be solved.
+    """
+
+    if result_type not in diagrams.KERNEL_RESULTS:
+        return None
+    if diagrams.KERNEL_RESULTS[result_type] is not None and direction != diagrams.KERNEL_RESULTS[result_type]:
+        return None
+
+    combo_names = result_combo_names(solved_beam_model)
+    with tracing.stage('sample'):
+        terms = diagram_terms(solved_beam_model, combo_names)
+        if terms is None:
+            return None
+        x_locs = np.linspace(0, terms.length, n_points)
+        results = diagrams.evaluate(terms, [result_type], x_locs)[result_type]
+    return x_locs, combo_names, results
+
+
+
+REACTION_COMPONENTS = ['FX', 'FY', 'FZ', 'MX', 'MY', 'MZ']
+
+
+def reaction_envelopes(reactions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the (max, min) of the (n_supports, n_combos, 6)-shaped 'reactions' over the combos, each
+    (n_supports, 6)-shaped. Both are zero if there are no combos (e.g. the load cases of a beam without loads).
+    """
+    if reactions.shape[1] == 0:
+        return np.zeros((reactions.shape[0], reactions.shape[2])), np.zeros((reactions.shape[0], reactions.shape[2]))
+    return reactions.max(axis=1), reactions.min(axis=1)
+
+
+def extract_reactions(solved_beam_model: FEModel3D) -> dict:
+
+    """
+    Returns the support reactions of 'solved_beam_model' for every load combo in one array, from the
+    same solve as the diagrams (the model is only analyzed here if it is not solved yet).
+
+    The returned dict contains:
+    'nodes': list of the supported node names, left to right
+    'locations': (n_supports,)-shaped array of the support locations along the beam
+    'combo_names': list of the load combo names (see result_combo_names)
+    'reactions': (n_supports, n_combos, 6)-shaped array of [FX, FY, FZ, MX, MY, MZ] reactions
+    'max', 'min': (n_supports, 6)-shaped envelopes of the reactions over all of the load combos
+    """
+
+    if solved_beam_model.solution is None:
+        with tracing.stage('analyze'):
+            solved_beam_model.analyze()
+
+    support_flags = ['support_DX', 'support_DY', 'support_DZ', 'support_RX', 'support_RY', 'support_RZ']
+    supported = sorted(
+        (node for node in solved_beam_model.Nodes.values() if any(getattr(node, flag) for flag in support_flags)),
+        key=lambda node: node.X,
+    )
+    combo_names = result_combo_names(solved_beam_model)
+
+    reactions = np.array(
+        [
+            [
+                [getattr(node, f'Rxn{component}')[combo_name] for component in REACTION_COMPONENTS]
+                for combo_name in combo_names
+            ]
+            for node in supported
+        ],
+        dtype=float,
+    ).reshape(len(supported), len(combo_names), len(REACTION_COMPONENTS))
+
+    max_reactions, min_reactions = reaction_envelopes(reactions)
+    return {
+        'nodes': [node.name for node in supported],
+        'locations': np.array([node.X for node in supported], dtype=float),
+        'combo_names': combo_names,
+        'reactions': reactions,
+        'max': max_reactions,
+        'min': min_reactions,
+    }
+
+
+
+def load_table(beam_data: dict) -> beam_format.LoadTable:
+    """
+    Returns the loads of the structured 'beam_data' as a beam_format.LoadTable: the 'LoadTable' parsed
+    with them by get_structured_beam_data, or a new one for beam data built without it (e.g. by the app).
+    The "Loads" are what count: a 'LoadTable' left over from before they were edited is not used.
+    """
+    loads = beam_data.get("LoadTable")
+    if loads is not None and loads.to_dicts() == beam_data["Loads"]:
+        return loads
+    return beam_format.LoadTable.from_dicts(beam_data["Loads"])
+
+
+
+def load_case_names(beam_data: dict) -> list[str]:
+    """
+    Returns the names of the load cases of the loads in the structured 'beam_data' (as returned by
+    get_structured_beam_data), in the order they first appear.
+    """
+    return list(dict.fromkeys(load["Case"] for load in beam_data["Loads"]))
+
+
+
+def solve_unit_cases(
+    beam_data_structured: dict,
+    result_types: dict[str, Optional[str]],
+    n_points: int = 200,
+    store=None,
+) -> dict:
+
+    """
+    Returns the results of the beam in 'beam_data_structured' for each of its load cases applied on its
+    own with a factor of 1.0, from one analysis: extract_result_tensors plus the support reactions under
+    the key 'reactions'. The "combos" of these results are the load case names.
+
+    Any number of load combos can then be derived from them with superpose_results, without solving again.
+
+    'store': an optional result_store.ResultStore, looked up by the beam data itself (see ResultStore.beam_key)
+        before the model is built. The model is only built and solved if something is missing, and the
+        new results are saved to it.
+    """
+
+    case_names = load_case_names(beam_data_structured)
+    if not case_names:
+        # A beam without loads has no load cases to solve, and every combo of them is zero
+        x_locs = np.linspace(0, beam_data_structured["L"], n_points)
+        unit_results = {result_type: (x_locs, [], np.zeros((0, n_points))) for result_type in result_types}
+        nodes = get_node_locations(list(beam_data_structured["Supports"]), beam_data_structured["L"])
+        supported = [(node_name, node_loc) for node_name, node_loc in nodes.items() if node_loc in beam_data_structured["Supports"]]
+        reactions = np.zeros((len(supported), 0, len(REACTION_COMPONENTS)))
+        max_reactions, min_reactions = reaction_envelopes(reactions)
+        unit_results['reactions'] = {
+            'nodes': [node_name for node_name, _ in supported],
+            'locations': np.array([node_loc for _, node_loc in supported], dtype=float),
+            'combo_names': [],
+            'reactions': reactions,
+            'max': max_reactions,
+            'min': min_reactions,
+        }
+        return unit_results
+
+    unit_combos = {case_name: {case_name: 1.0} for case_name in case_names}
+    if store is None:
+        model = beam_model_from_data(beam_data_structured, unit_combos)
+        unit_results = extract_result_tensors(model, result_types, n_points)
+        unit_results['reactions'] = extract_reactions(model)
+        return unit_results
+
+    keys = {
+        result_type: store.beam_key(beam_data_structured, unit_combos, result_type, direction, n_points)
+        for result_type, direction in result_types.items()
+    }
+    keys['reactions'] = store.beam_key(beam_data_structured, unit_combos, 'reactions')
+    unit_results = {result_type: store.get_tensor(key) for result_type, key in keys.items() if result_type != 'reactions'}
+    unit_results['reactions'] = store.get_reactions(keys['reactions'])
+    missing = [result_type for result_type, result in unit_results.items() if result is None]
+    if missing:
+        model = beam_model_from_data(beam_data_structured, unit_combos)
+        for result_type in missing:
+            if result_type == 'reactions':
+                unit_results['reactions'] = store.put_reactions(keys['reactions'], extract_reactions(model))
+            else:
+                tensor = extract_result_tensor(model, result_type, result_types[result_type], n_points)
+                unit_results[result_type] = store.put_tensor(keys[result_type], tensor)
+    return unit_results
+
+
+
+def superpose(case_names: list[str], case_results: np.ndarray, load_combos: dict, axis: int = 0) -> np.ndarray:
+    """
+    Returns the results of the 'load_combos' as the factored sums of the unit load case results in
+    'case_results', whose 'axis' runs over 'case_names'. The same axis of the returned array runs over
+    the load combos instead. This holds because the analysis is linear.
+    """
+    factors = lf.combo_factor_matrix(load_combos, case_names)
+    return np.moveaxis(np.tensordot(factors, case_results, axes=(1, axis)), 0, axis)
+
+
+
+def superpose_results(unit_results: dict, load_combos: dict) -> dict:
+    """
+    Returns the results of solve_unit_cases for the 'load_combos' instead of the unit load cases,
+    in the same format as extract_result_tensors (plus 'reactions', as in extract_reactions).
+    """
+
+    combo_names = list(load_combos)
+    combo_results = {}
+    for result_type, result in unit_results.items():
+        if result_type == 'reactions':
+            reactions = superpose(result['combo_names'], result['reactions'], load_combos, axis=1)
+            max_reactions, min_reactions = reaction_envelopes(reactions)
+            combo_results['reactions'] = {
+                **result,
+                'combo_names': combo_names,
+                'reactions': reactions,
+                'max': max_reactions,
+                'min': min_reactions,
+            }
+        else:
+            x_locs, case_names, case_results = result
+            combo_results[result_type] = (x_locs, combo_names, superpose(case_names, case_results, load_combos))
+    return combo_results
+
+
+
+def model_fingerprint(beam_model: FEModel3D) -> dict:
+
+    """
+    Returns a JSON-ready description of everything in 'beam_model' that affects its results: nodes and
+    supports, materials, members with their section properties and loads, and the load combos.
+    Two models with equal fingerprints give equal results, so the fingerprint can key a result cache.
+    """
+
+    support_flags = ['support_DX', 'support_DY', 'support_DZ', 'support_RX', 'support_RY', 'support_RZ']
+
+    return {
+        'nodes': {
+            name: [node.X, node.Y, node.Z] + [getattr(node, flag) for flag in support_flags]
+            for name, node in beam_model.Nodes.items()
+        },
+        'materials': {
+            name: [material.E, material.G, material.nu, material.rho]
+            for name, material in beam_model.Materials.items()
+        },
+        'members': {
+            name: {
+                'nodes': [member.i_node.name, member.j_node.name],
+                'material': member.material,
+                'section': [member.A, member.Iy, member.Iz, member.J],
+                'releases': member.Releases,
+                'point_loads': member.PtLoads,
+                'dist_loads': member.DistLoads,
+            }
+            for name, member in beam_model.Members.items()
+        },
+        'load_combos': {name: combo.factors for name, combo in beam_model.LoadCombos.items()},
+    }
+
+
+
 
 
 
@@ -234,6 +655,7 @@ def parse_beam_attributes(attribute_values: list[float]) -> dict[str, float]:
 
 
 
+@tracing.traced('parse')
 def get_structured_beam_data(raw_data: list[list[str]]) -> dict:
 
     """
@@ -272,9 +694,22 @@ def get_structured_beam_data(raw_data: list[list[str]]) -> dict:
     'End Magnitude': 30.0,
     'Start Location': 0.0,
     'End Location': 4800.0,
-    'Case': 'Dead'}]}
+    'Case': 'Dead'}],
+    'LoadTable': LoadTable(case_names=['Live', 'Dead'], is_point=array([True, False]), ...),
+    'Cases': {'Live': {}, 'Dead': {}}}
+
+    'LoadTable' holds the same loads as 'Loads' in columns (see beam_format.LoadTable and load_table), for
+    the solvers that work on all of the loads at once. It is derived from 'Loads', so code that builds or
+    changes the structured data without it gets a new table from load_table.
+    'Cases' holds the metadata of each load case, which only version 2 beam files have (see
+    beam_format.py). Those are parsed by get_structured_beam_data_v2. The metadata is only carried
+    through (e.g. by beam_format.beam_file_text): the load combos already include the combination
+    factors, so a 'psi0' is not applied to them.
     """
-    
+
+    if beam_format.format_version(raw_data) == 2:
+        return get_structured_beam_data_v2(raw_data)
+
     beam_name= raw_data[0][0]
     numeric_beam_data = convert_to_numeric(raw_data[1:])
     beam_attributes = parse_beam_attributes(numeric_beam_data[0])
@@ -285,11 +720,55 @@ def get_structured_beam_data(raw_data: list[list[str]]) -> dict:
     structured_data = structured_data | beam_attributes
     structured_data['Supports'] = support_attributes
     structured_data['Loads'] = load_attributes
+    structured_data['LoadTable'] = beam_format.LoadTable.from_dicts(load_attributes)
+    structured_data['Cases'] = {case_name: {} for case_name in load_case_names(structured_data)}
     
     return structured_data
 
 
 
+def get_structured_beam_data_v2(raw_data: list[list[str]]) -> dict:
+
+    """
+    Returns the structured beam data (as get_structured_beam_data) of the rows 'raw_data' of a version 2
+    beam file (see beam_format.py). The load lines are parsed straight into a beam_format.LoadTable, which
+    is kept as the 'LoadTable'.
+
+    # Example input
+    [['BEAM_FORMAT:2'],
+    ['Balcony transfer'],
+    ['4800', '24500', '1200000000', '1', '1'],
+    ['1000:P', '3800:R'],
+    ['CASE:Dead', 'category:permanent'],
+    ['POINT:Mz', '2500000', '2400', 'case:Live'],
+    ['DIST:Fy', '-30', '-20', '0', '4800', 'case:Dead']]
+
+    # Example output
+    {'Name': 'Balcony transfer', 'L': 4800.0, ..., 'Supports': {1000.0: 'P', 3800.0: 'R'},
+    'Loads': [{'Type': 'Point', 'Direction': 'Mz', 'Magnitude': 2500000.0, 'Location': 2400.0, 'Case': 'Live'},
+    {'Type': 'Dist', 'Direction': 'Fy', 'Start Magnitude': -30.0, 'End Magnitude': -20.0,
+    'Start Location': 0.0, 'End Location': 4800.0, 'Case': 'Dead'}],
+    'LoadTable': LoadTable(case_names=['Live', 'Dead'], is_point=array([True, False]), ...),
+    'Cases': {'Live': {}, 'Dead': {'category': 'permanent'}}}
+    """
+
+    case_rows = [row for row in raw_data[4:] if row[0].strip().upper().startswith("CASE:")]
+    load_rows = [row for row in raw_data[4:] if not row[0].strip().upper().startswith("CASE:")]
+    loads = beam_format.LoadTable.from_rows(load_rows)
+    case_metadata = beam_format.parse_case_rows(case_rows)
+
+    structured_data = {}
+    structured_data['Name'] = raw_data[1][0]
+    structured_data = structured_data | parse_beam_attributes(convert_to_numeric(raw_data[2:3])[0])
+    structured_data['Supports'] = parse_supports(raw_data[3])
+    structured_data['Loads'] = loads.to_dicts()
+    structured_data['LoadTable'] = loads
+    # The cases of the loads in order, then the cases that only have metadata
+    structured_data['Cases'] = {case_name: {} for case_name in loads.case_names} | case_metadata
+    return structured_data
+
+
+
 def get_node_locations(support_node_data: float, beam_length: list[float]) -> dict[str, float]:
 
     """
@@ -341,11 +820,45 @@ def get_node_locations(support_node_data: float, beam_length: list[float]) -> di
 
 
 
-def build_beam(beam_data: dict) -> FEModel3D:
+def split_dist_load(load: dict, node_locations) -> list[tuple[float, float, float, float]]:
+
+    """
+    Returns the distributed 'load' split at the 'node_locations' inside it, as a list of
+    (start magnitude, end magnitude, start location, end location) pieces with the magnitudes
+    interpolated at the splits.
+
+    PyNite (0.0.93) splits a member's distributed loads between the sub-members at its internal nodes
+    itself, but computes the end magnitude of a sub-member the load runs across from the already
+    replaced start magnitude, so a varying load over a whole span between supports is applied wrong.
+    Loads that are already split at the nodes are not affected.
+
+    # Example input
+    {"Start Magnitude": -10.0, "End Magnitude": -30.0, "Start Location": 0.0, "End Location": 4000.0, ...}, [0.0, 1000.0, 3000.0, 5000.0]
+
+    # Example output
+    [(-10.0, -15.0, 0.0, 1000.0), (-15.0, -25.0, 1000.0, 3000.0), (-25.0, -30.0, 3000.0, 4000.0)]
+    """
+
+    x1, x2 = load["Start Location"], load["End Location"]
+    w1, w2 = load["Start Magnitude"], load["End Magnitude"]
+    splits = [x1] + sorted(loc for loc in node_locations if x1 < loc < x2) + [x2]
+
+    def magnitude(x):
+        return w1 + (w2 - w1) * (x - x1) / (x2 - x1)
+
+    return [(magnitude(start), magnitude(end), start, end) for start, end in zip(splits[:-1], splits[1:])]
+
+
+
+@tracing.traced('build')
+def build_beam(beam_data: dict, analyze: bool = True) -> FEModel3D:
     """
     Returns a beam finite element model for the data in 'beam_data' which is assumed to represent
     a simply supported beam with a cantilever at one end with a uniform distributed load applied
     in the direction of gravity.
+
+    If 'analyze' is False the model is returned unsolved, e.g. for callers that run their own solve.
+    'beam_data' is not modified, so the same beam data can be built from several threads at once.
     """
 
     support_loc = []
@@ -353,13 +866,13 @@ def build_beam(beam_data: dict) -> FEModel3D:
     for loc, sup_type in beam_data["Supports"].items():
         support_loc.append(loc)
 
-    beam_data["Nodes"] = get_node_locations(support_loc, beam_data["L"])  #returns 'nodes'
+    nodes = get_node_locations(support_loc, beam_data["L"])  #kept local so that 'beam_data' isn't modified
     
     model = FEModel3D()
     
     node_acc={}
     
-    for node_name, node_loc_X in beam_data["Nodes"].items():
+    for node_name, node_loc_X in nodes.items():
         node_acc.update({"name": node_name, "X": node_loc_X, "Y" : 0, "Z" : 0})
         model.add_node(**node_acc)
 
@@ -406,17 +919,22 @@ def build_beam(beam_data: dict) -> FEModel3D:
             )
                 
         elif load["Type"] == "Dist":
-            model.add_member_dist_load(
-                beam_data["Name"],
-                load["Direction"],
-                load["Start Magnitude"],
-                load["End Magnitude"],
-                load["Start Location"],
-                load["End Location"],
-                load["Case"],
-            )
+            for start_magnitude, end_magnitude, start_location, end_location in split_dist_load(load, nodes.values()):
+                model.add_member_dist_load(
+                    beam_data["Name"],
+                    load["Direction"],
+                    start_magnitude,
+                    end_magnitude,
+                    start_location,
+                    end_location,
+                    load["Case"],
+                )
     
-    model.analyze()
+    if analyze:
+        with tracing.stage('analyze'):
+            model.analyze()
+        # Tells PyNite's default combo from a 'Combo 1' added later by the user (see result_combo_names)
+        model.LoadCombos[DEFAULT_COMBO].is_pynite_default = True
     #model.LoadCombos
     #Visualization.render_model(model, annotation_size=100, combo_name='Combo 1')
     #model.Members[beam_data["Name"]].plot_shear(Direction= "Fy", combo_name= "Combo 1", n_points=5000)
@@ -434,7 +952,29 @@ def load_beam_model(filename: str, load_combos: Optional[dict] = None) -> FEMode
     beam_data_raw = read_beam_file(filename)
     #beam_data_sep = separate_data(beam_data_raw)
     beam_data_structured = get_structured_beam_data(beam_data_raw)
-    beam_model = build_beam(beam_data_structured)
+    return beam_model_from_data(beam_data_structured, load_combos)
+
+
+
+def load_beam_model_from_text(beam_text: str, load_combos: Optional[dict] = None) -> FEModel3D:
+    """
+    Returns an FEModel3D beam model representing the beam described in 'beam_text', the contents of a beam file.
+    """
+    beam_data_structured = get_structured_beam_data(read_csv_text(beam_text))
+    return beam_model_from_data(beam_data_structured, load_combos)
+
+
+
+def beam_model_from_data(beam_data_structured: dict, load_combos: Optional[dict] = None) -> FEModel3D:
+    """
+    Returns an FEModel3D beam model for the structured beam data returned by get_structured_beam_data,
+    with the 'load_combos' added to it.
+
+    With 'load_combos' the model is returned unsolved, since adding a combo discards the solution anyway;
+    the extract_* functions analyze it when they first need results. Without them it is solved for
+    PyNite's default combo, as build_beam does.
+    """
+    beam_model = build_beam(beam_data_structured, analyze=load_combos is None)
     if load_combos is not None:
         for combo_name, combo_factors in load_combos.items():
             beam_model.add_load_combo(combo_name, combo_factors)
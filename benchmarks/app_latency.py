@@ -0,0 +1,93 @@
+"""
+Rerun latency of the Streamlit app (My_App.py) for interactive edits.
+
+Run from the repository root:
+
+    python -m benchmarks.app_latency --repeat 5
+
+The app is driven headless with streamlit.testing's AppTest: a generated beam file is uploaded once
+(the cold run that solves the beam) and then each interactive edit in EDITS is applied 'repeat' times.
+The script reports the median rerun time of each edit and exits with status 1 if one of them is over
+LATENCY_TARGET.
+
+AppTest reruns the whole script for every edit, so these timings are an upper bound: in the browser,
+an edit inside a fragment only reruns that fragment. What they do show is that no edit pays for a
+solve again, because the spec and the solved results are cached on the beam file contents.
+"""
+import argparse
+import os
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.bench_pipeline import generate_beam_lines
+
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'My_App.py')
+
+# Rerun latency target of an interactive edit, in seconds.
+LATENCY_TARGET = 0.3
+
+
+def _number_input(at: AppTest, label_start: str):
+    return next(widget for widget in at.number_input if widget.label.startswith(label_start))
+
+
+# name: function(at, idx) applying the idx-th value of an edit to the app
+EDITS = {
+    'beam name': lambda at, idx: at.text_input(key='beam_name').set_value(f'Beam {idx}'),
+    'moment unit': lambda at, idx: at.selectbox(key='moment_unit').set_value(['kN.cm', 'kN.m'][idx % 2]),
+    'section modulus': lambda at, idx: _number_input(at, 'Sx').set_value(150000 + 1000 * (idx + 1)),
+    'deflection limit': lambda at, idx: at.number_input(key='limit_characteristic').set_value(300 + idx + 1),
+}
+
+
+def measure_latency(beam_text: str, repeat: int = 5) -> dict[str, float]:
+    """
+    Returns the cold run time (upload and solve) and the median rerun time of each of the EDITS,
+    in seconds, for the app with the beam file contents 'beam_text' uploaded.
+    """
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.run()
+
+    start = time.perf_counter()
+    at.file_uploader[0].set_value(('bench_beam.txt', beam_text.encode(), 'text/plain')).run()
+    timings = {'cold run': time.perf_counter() - start}
+    if at.exception:
+        raise RuntimeError(f'The app failed: {at.exception[0].message}')
+
+    for name, edit in EDITS.items():
+        rerun_times = []
+        for idx in range(repeat):
+            edit(at, idx)
+            start = time.perf_counter()
+            at.run()
+            rerun_times.append(time.perf_counter() - start)
+        timings[name] = statistics.median(rerun_times)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the rerun latency of the Streamlit app.")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--target', type=float, default=LATENCY_TARGET, help="rerun latency target, in seconds")
+    args = parser.parse_args()
+
+    beam_text = '\n'.join(generate_beam_lines(4, 5, 3)) + '\n'
+    timings = measure_latency(beam_text, args.repeat)
+
+    over_target = []
+    for name, seconds in timings.items():
+        status = ''
+        if name != 'cold run':
+            status = 'ok' if seconds <= args.target else 'OVER TARGET'
+            if seconds > args.target:
+                over_target.append(name)
+        print(f"{name:<20} {seconds * 1e3:8.1f} ms  {status}")
+    print(f"target: {args.target * 1e3:.0f} ms per interactive edit")
+    raise SystemExit(1 if over_target else 0)
+
+
+if __name__ == '__main__':
+    main()
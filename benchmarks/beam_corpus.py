@@ -0,0 +1,263 @@
+"""
+Random, valid beam files for throughput runs and differential testing.
+
+Run from the repository root:
+
+    python -m benchmarks.beam_corpus write corpus/ --n-beams 500 --seed 1    # write a corpus
+    python -m benchmarks.beam_corpus fuzz --n-beams 200 --seed 1             # compare solver paths
+
+Every beam is generated from its own seed, so any beam (e.g. one that fails the fuzzer) can be
+regenerated with random_beam_lines(np.random.default_rng(seed)). The beams are valid for
+get_structured_beam_data and stable: there is always a pinned or fixed support, and a beam with a
+single support has it fixed.
+
+The fuzzer solves every beam through each of SOLVER_PATHS and reports the beams where a path's
+results differ from the reference path ('pynite') by more than the tolerance. A new, faster solver
+path only needs to be added to SOLVER_PATHS to be checked against PyNite.
+"""
+import argparse
+import os
+from typing import Callable, Optional
+
+import numpy as np
+
+import beams
+import load_factors as lf
+import sparse_beam
+from incremental import IncrementalAnalysis
+from utils import read_csv_text
+
+
+LOAD_CASES = ['D', 'L', 'S', 'Wp', 'Ws', 'Cs', 'Cw']
+
+FUZZ_RESULTS = {
+    'moment': 'Mz',
+    'shear': 'Fy',
+    'deflection': 'dy',
+}
+
+
+def random_beam_lines(
+    rng: np.random.Generator,
+    n_supports: Optional[int] = None,
+    n_point_loads: Optional[int] = None,
+    n_dist_loads: Optional[int] = None,
+    n_cases: Optional[int] = None,
+    n_attributes: Optional[int] = None,
+    name: str = 'Random beam',
+) -> list[str]:
+
+    """
+    Returns the lines of a random but valid beam file. Every count that is None is drawn at random.
+
+    'n_supports': number of supports (1 to 6)
+    'n_point_loads', 'n_dist_loads': numbers of point and distributed loads (0 to 10 and 0 to 5, at least one load)
+    'n_cases': number of the LOAD_CASES the loads are spread over (1 to 4)
+    'n_attributes': number of beam attributes written, in the order L,E,Iz,Iy,A,J,nu,rho (3 to 8)
+
+    # Example output
+    ['Random beam', '6150,205000,2.5e+08,4.1e+07,8200', '0:P,4300:R', 'POINT:Fy,-12400,5230,case:L', ...]
+    """
+
+    if n_supports is None:
+        n_supports = int(rng.integers(1, 7))
+    if n_point_loads is None:
+        n_point_loads = int(rng.integers(0, 11))
+    if n_dist_loads is None:
+        n_dist_loads = int(rng.integers(0 if n_point_loads else 1, 6))
+    if n_cases is None:
+        n_cases = int(rng.integers(1, 5))
+    if n_attributes is None:
+        n_attributes = int(rng.integers(3, 9))
+
+    length = float(rng.integers(20, 241) * 50)
+    attributes = [
+        length,
+        float(rng.choice([10000, 70000, 200000, 210000])),           # E
+        float(rng.uniform(1e7, 2e9)),                                 # Iz
+        float(rng.uniform(1e6, 2e8)),                                 # Iy
+        float(rng.uniform(1e3, 3e4)),                                 # A
+        float(rng.uniform(1e4, 2e6)),                                 # J
+        float(rng.choice([0.2, 0.25, 0.3])),                          # nu
+        float(rng.choice([1, 7.85e-9])),                              # rho
+    ][:n_attributes]
+
+    # Supports on a 50 mm grid, at distinct locations. The first one (from the left) is pinned or fixed
+    # so that the beam is restrained along its axis, and a single support must be fixed.
+    grid = np.arange(0, length + 1, 50)
+    locations = np.sort(rng.choice(grid, size=min(n_supports, len(grid)), replace=False))
+    support_types = [str(rng.choice(['P', 'F']))] + [str(rng.choice(['R', 'R', 'P', 'F'])) for _ in locations[1:]]
+    if len(locations) == 1:
+        support_types = ['F']
+
+    cases = list(rng.choice(LOAD_CASES, size=n_cases, replace=False))
+
+    lines = [
+        name,
+        ','.join(f'{value:g}' for value in attributes),
+        ','.join(f'{location:g}:{support_type}' for location, support_type in zip(locations, support_types)),
+    ]
+    for _ in range(n_point_loads):
+        magnitude = -float(rng.integers(1, 500)) * 100
+        location = float(rng.choice(grid))
+        lines.append(f'POINT:Fy,{magnitude:g},{location:g},case:{rng.choice(cases)}')
+    for _ in range(n_dist_loads):
+        start, end = np.sort(rng.choice(grid, size=2, replace=False))
+        start_magnitude, end_magnitude = -rng.integers(1, 60, size=2).astype(float)
+        lines.append(f'DIST:Fy,{start_magnitude:g},{end_magnitude:g},{start:g},{end:g},case:{rng.choice(cases)}')
+    return lines
+
+
+
+def beam_seeds(seed: int, n_beams: int) -> list[int]:
+    """
+    Returns one seed per beam of a corpus, derived from the corpus 'seed'.
+    """
+    return [int(beam_seed) for beam_seed in np.random.SeedSequence(seed).generate_state(n_beams)]
+
+
+
+def write_corpus(directory: str, n_beams: int, seed: int = 0, **counts) -> list[str]:
+    """
+    Writes 'n_beams' random beam files to 'directory' and returns their paths. 'counts' are passed on to
+    random_beam_lines (e.g. n_supports=3). Each file is named after the seed it was generated from.
+    """
+    os.makedirs(directory, exist_ok=True)
+    filenames = []
+    for beam_seed in beam_seeds(seed, n_beams):
+        lines = random_beam_lines(np.random.default_rng(beam_seed), name=f'Random beam {beam_seed}', **counts)
+        filename = os.path.join(directory, f'beam_{beam_seed}.txt')
+        with open(filename, 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+        filenames.append(filename)
+    return filenames
+
+
+
+def solve_pynite(beam_text: str, load_combos: dict, result_types: dict, n_points: int) -> dict:
+    # Every station is sampled from PyNite itself, so that this path stays the reference.
+    model = beams.load_beam_model_from_text(beam_text, load_combos)
+    return beams.extract_result_tensors(model, result_types, n_points, kernel=False)
+
+
+def solve_kernel(beam_text: str, load_combos: dict, result_types: dict, n_points: int) -> dict:
+    model = beams.load_beam_model_from_text(beam_text, load_combos)
+    return beams.extract_result_tensors(model, result_types, n_points)
+
+
+def solve_superposition(beam_text: str, load_combos: dict, result_types: dict, n_points: int) -> dict:
+    beam_data = beams.get_structured_beam_data(read_csv_text(beam_text))
+    return beams.superpose_results(beams.solve_unit_cases(beam_data, result_types, n_points), load_combos)
+
+
+def solve_incremental(beam_text: str, load_combos: dict, result_types: dict, n_points: int) -> dict:
+    model = IncrementalAnalysis(load_combos).analyze(beams.get_structured_beam_data(read_csv_text(beam_text)))
+    return beams.extract_result_tensors(model, result_types, n_points)
+
+
+def solve_sparse(beam_text: str, load_combos: dict, result_types: dict, n_points: int) -> dict:
+    beam_data = beams.get_structured_beam_data(read_csv_text(beam_text))
+    unit_results = sparse_beam.solve_unit_cases_sparse(beam_data, result_types, n_points, SPARSE_ELEMENT_LENGTH)
+    return beams.superpose_results(unit_results, load_combos)
+
+
+# Maximum element length of the sparse solver's mesh, in mm, so that the fuzzer also exercises the meshing.
+SPARSE_ELEMENT_LENGTH = 250.0
+
+# name: solve(beam_text, load_combos, result_types, n_points) -> beams.extract_result_tensors format
+SOLVER_PATHS: dict[str, Callable] = {
+    'pynite': solve_pynite,
+    'kernel': solve_kernel,
+    'superposition': solve_superposition,
+    'incremental': solve_incremental,
+    'sparse': solve_sparse,
+}
+
+
+def max_relative_error(reference: np.ndarray, results: np.ndarray) -> float:
+    """
+    Returns the largest absolute difference between 'results' and 'reference', relative to the largest
+    absolute value in 'reference' (so that stations near zero don't blow up the error).
+    """
+    scale = np.abs(reference).max()
+    return float(np.abs(results - reference).max() / scale) if scale > 0 else float(np.abs(results).max())
+
+
+
+def fuzz(
+    n_beams: int,
+    seed: int = 0,
+    paths: Optional[list[str]] = None,
+    load_combos: Optional[dict] = None,
+    n_points: int = 200,
+    rtol: float = 1e-6,
+) -> list[dict]:
+
+    """
+    Solves 'n_beams' random beams with every solver path in 'paths' (defaults to all of SOLVER_PATHS) and
+    returns one dict per mismatch: {'seed', 'path', 'result_type', 'error'}, where 'error' is the
+    max_relative_error against the 'pynite' path or the exception raised by the path.
+    """
+
+    if load_combos is None:
+        load_combos = lf.ec_eurocode_combs()
+    if paths is None:
+        paths = [path for path in SOLVER_PATHS if path != 'pynite']
+
+    mismatches = []
+    for beam_seed in beam_seeds(seed, n_beams):
+        beam_text = '\n'.join(random_beam_lines(np.random.default_rng(beam_seed))) + '\n'
+        reference = solve_pynite(beam_text, load_combos, FUZZ_RESULTS, n_points)
+        for path in paths:
+            try:
+                solved = SOLVER_PATHS[path](beam_text, load_combos, FUZZ_RESULTS, n_points)
+            except Exception as error:
+                mismatches.append({'seed': beam_seed, 'path': path, 'result_type': None, 'error': repr(error)})
+                continue
+            for result_type in FUZZ_RESULTS:
+                error = max_relative_error(reference[result_type][2], solved[result_type][2])
+                if not error <= rtol:
+                    mismatches.append({'seed': beam_seed, 'path': path, 'result_type': result_type, 'error': error})
+    return mismatches
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate random beam files, or fuzz the solver paths with them.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    write_parser = subparsers.add_parser('write', help="write a corpus of beam files")
+    write_parser.add_argument('directory')
+    write_parser.add_argument('--n-beams', type=int, default=100)
+    write_parser.add_argument('--seed', type=int, default=0)
+    write_parser.add_argument('--n-supports', type=int, default=None)
+    write_parser.add_argument('--n-point-loads', type=int, default=None)
+    write_parser.add_argument('--n-dist-loads', type=int, default=None)
+
+    fuzz_parser = subparsers.add_parser('fuzz', help="compare every solver path against PyNite")
+    fuzz_parser.add_argument('--n-beams', type=int, default=100)
+    fuzz_parser.add_argument('--seed', type=int, default=0)
+    fuzz_parser.add_argument('--paths', nargs='+', default=None, choices=list(SOLVER_PATHS))
+    fuzz_parser.add_argument('--rtol', type=float, default=1e-6)
+    args = parser.parse_args()
+
+    if args.command == 'write':
+        filenames = write_corpus(
+            args.directory,
+            args.n_beams,
+            args.seed,
+            n_supports=args.n_supports,
+            n_point_loads=args.n_point_loads,
+            n_dist_loads=args.n_dist_loads,
+        )
+        print(f"Wrote {len(filenames)} beam files to {args.directory}")
+    else:
+        mismatches = fuzz(args.n_beams, args.seed, args.paths, rtol=args.rtol)
+        for mismatch in mismatches:
+            print(f"seed {mismatch['seed']}: {mismatch['path']} {mismatch['result_type']}: {mismatch['error']}")
+        print(f"{len(mismatches)} mismatches in {args.n_beams} beams")
+        raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+Stage-by-stage benchmarks of the beam pipeline:
+
+    parse -> build -> analyze -> extract -> envelope -> plot
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pipeline                   # compare against benchmarks/baseline.json
+    python -m benchmarks.bench_pipeline --save-baseline   # record a new baseline
+
+Each stage is timed separately on generated beams of increasing complexity. A stage whose best
+time is slower than its baseline by more than the tolerance (and by more than 'min_delta' seconds,
+to ignore timer noise on sub-millisecond stages) is reported as a regression and the script exits
+with status 1. The baseline is machine-specific: re-record it when the benchmark machine changes.
+
+Each case also sets the number of load combos (see bench_combos), since the analysis solves every
+combo and the extraction evaluates every combo.
+
+Note that 'build' is build_beam without its analysis, as the pipeline builds models (the analysis
+is the 'analyze' stage), and 'plot' includes the extraction that plot_results runs on the already
+solved model.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import beams
+import load_factors as lf
+import plots
+
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# name: (n_supports, n_point_loads, n_dist_loads, n_points, n_combos)
+BENCH_CASES = {
+    'small': (2, 1, 1, 200, 6),
+    'medium': (4, 5, 3, 1000, 6),
+    'large': (8, 20, 10, 2000, 6),
+    'medium-combos': (4, 5, 3, 1000, 60),
+    'large-combos': (8, 20, 10, 2000, 60),
+}
+
+
+def generate_beam_lines(n_supports: int, n_point_loads: int, n_dist_loads: int, length: float = 12000.0) -> list[str]:
+    """
+    Returns the lines of a deterministic beam file with 'n_supports' evenly spaced supports (the first
+    one pinned, the others rollers) and the given numbers of point and distributed loads, spread over
+    the D, L and S load cases.
+    """
+    cases = ['D', 'L', 'S']
+    supports = [f'{length * idx / (n_supports - 1):g}:{"P" if idx == 0 else "R"}' for idx in range(n_supports)]
+    lines = [
+        f'Bench beam {n_supports}-{n_point_loads}-{n_dist_loads}',
+        f'{length:g},200000,350000000,12000000,8000,500000,0.3',
+        ','.join(supports),
+    ]
+    for idx in range(n_point_loads):
+        location = length * (idx + 0.5) / n_point_loads
+        lines.append(f'POINT:Fy,{-1000 * (idx % 7 + 1)},{location:g},case:{cases[idx % 3]}')
+    for idx in range(n_dist_loads):
+        start = length * idx / n_dist_loads
+        end = length * (idx + 1) / n_dist_loads
+        lines.append(f'DIST:Fy,{-2 - idx % 3},{-3 - idx % 2},{start:g},{end:g},case:{cases[idx % 3]}')
+    return lines
+
+
+def bench_combos(n_combos: int) -> dict[str, dict]:
+    """
+    Returns 'n_combos' deterministic load combos of the D, L and S load cases of generate_beam_lines:
+    the Eurocode ULS combos (load_factors.ec_eurocode_combs) first, then combos with stepped factors.
+
+    e.g. bench_combos(8) -> {"LC1": {"D": 1.35}, ..., "LC4a": {...}, "B7": {"D": 1.3, "L": 0.6, "S": 0.9}, "B8": {...}}
+    """
+    load_combos = dict(list(lf.ec_eurocode_combs().items())[:n_combos])
+    for idx in range(len(load_combos), n_combos):
+        load_combos[f'B{idx + 1}'] = {"D": 1.0 + 0.05 * (idx % 8), "L": 0.1 * (idx % 16), "S": 0.15 * (idx % 11)}
+    return load_combos
+
+
+
+def time_stage(func, repeat: int) -> float:
+    """
+    Returns the best wall time of 'repeat' calls to 'func'.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_case(filename: str, n_points: int, n_combos: int, repeat: int) -> dict[str, float]:
+    """
+    Returns the best time of each pipeline stage for the beam file 'filename' under 'n_combos' load
+    combos (see bench_combos).
+    """
+    load_combos = bench_combos(n_combos)
+
+    def parse():
+        return beams.get_structured_beam_data(beams.read_beam_file(filename))
+
+    def build():
+        return beams.build_beam(parse(), analyze=False)
+
+    def solved_model():
+        model = build()
+        for combo_name, combo_factors in load_combos.items():
+            model.add_load_combo(combo_name, combo_factors)
+        model.analyze()
+        return model
+
+    def analyze():
+        model.solution = None
+        model.analyze()
+
+    model = solved_model()
+    result_arrays = beams.extract_arrays_all_combos(model, 'moment', 'Mz', n_points)
+
+    parse_time = time_stage(parse, repeat)
+    return {
+        'parse': parse_time,
+        'build': time_stage(build, repeat) - parse_time,
+        'analyze': time_stage(analyze, repeat),
+        'extract': time_stage(lambda: beams.extract_arrays_all_combos(model, 'moment', 'Mz', n_points), repeat),
+        'envelope': time_stage(lambda: (lf.envelope_max(result_arrays), lf.envelope_min(result_arrays)), repeat),
+        'plot': time_stage(lambda: plots.plot_results(model, 'moment', 'Mz', n_points=n_points), repeat),
+    }
+
+
+def run_benchmarks(repeat: int = 5) -> dict[str, dict[str, float]]:
+    """
+    Returns {case_name: {stage: best seconds}} for every case in BENCH_CASES.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for case_name, (n_supports, n_point_loads, n_dist_loads, n_points, n_combos) in BENCH_CASES.items():
+            filename = os.path.join(tmp_dir, f'{case_name}.txt')
+            with open(filename, 'w') as file:
+                file.write('\n'.join(generate_beam_lines(n_supports, n_point_loads, n_dist_loads)) + '\n')
+            results[case_name] = bench_case(filename, n_points, n_combos, repeat)
+    return results
+
+
+def find_regressions(results: dict, baseline: dict, tolerance: float, min_delta: float = 1e-3) -> list[str]:
+    """
+    Returns a message for every stage in 'results' slower than its 'baseline' by more than 'tolerance'
+    (e.g. 0.25 for 25 %) and by more than 'min_delta' seconds.
+    """
+    regressions = []
+    for case_name, stages in results.items():
+        for stage, seconds in stages.items():
+            reference = baseline.get(case_name, {}).get(stage)
+            if reference and seconds > reference * (1 + tolerance) and seconds - reference > min_delta:
+                regressions.append(
+                    f'{case_name}/{stage}: {seconds * 1e3:.2f} ms vs baseline {reference * 1e3:.2f} ms '
+                    f'(+{(seconds / reference - 1) * 100:.0f} %)'
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the beam pipeline.")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25 %%)")
+    parser.add_argument('--save-baseline', action='store_true', help=f"write the results to {BASELINE_FILE}")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.repeat)
+
+    for case_name, stages in results.items():
+        timings = '  '.join(f'{stage}={seconds * 1e3:.2f}ms' for stage, seconds in stages.items())
+        print(f'{case_name:>13}: {timings}')
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, 'w') as file:
+            json.dump(results, file, indent=4)
+        print(f'Baseline saved to {BASELINE_FILE}')
+        return
+
+    if not os.path.exists(BASELINE_FILE):
+        print('No baseline to compare against. Run with --save-baseline first.')
+        return
+
+    with open(BASELINE_FILE) as file:
+        baseline = json.load(file)
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    for message in regressions:
+        print(f'REGRESSION {message}')
+    if regressions:
+        raise SystemExit(1)
+    print('No regressions.')
+
+
+if __name__ == '__main__':
+    main()
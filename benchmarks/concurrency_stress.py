@@ -0,0 +1,113 @@
+"""
+Concurrency stress test of the pure pipeline API (pipeline.py).
+
+Run from the repository root:
+
+    python -m benchmarks.concurrency_stress --n-beams 40 --threads 8 --rounds 5
+
+Random beams (benchmarks.beam_corpus) are solved once serially as the reference. Then, for every
+round, the same beams are solved again in a shuffled order from 'threads' threads at once, half of
+them passed as beam file text and half as structured beam data shared between all the threads.
+The script checks that every concurrent result matches the serial one, that the shared structured
+beam data and load combos are unchanged, and reports the serial and concurrent throughputs. It exits
+with status 1 on any mismatch, modified input or exception.
+"""
+import argparse
+import copy
+import time
+
+import numpy as np
+
+import beams
+import load_factors as lf
+import pipeline
+from benchmarks.beam_corpus import beam_seeds, random_beam_lines
+from utils import read_csv_text
+
+
+def results_match(reference: dict, results: dict, rtol: float = 1e-9) -> bool:
+    """
+    Returns True if every result tensor and the reactions in 'results' match 'reference'.
+    """
+    for result_type, reference_result in reference.items():
+        if result_type == 'reactions':
+            if not np.allclose(results['reactions']['reactions'], reference_result['reactions'], rtol=rtol, atol=1e-9):
+                return False
+            continue
+        x_locs, combo_names, reference_values = reference_result
+        result_x_locs, result_combo_names, values = results[result_type]
+        if result_combo_names != combo_names or not np.array_equal(result_x_locs, x_locs):
+            return False
+        if not np.allclose(values, reference_values, rtol=rtol, atol=1e-9 * np.abs(reference_values).max()):
+            return False
+    return True
+
+
+def stress(n_beams: int, threads: int, rounds: int, seed: int = 0) -> dict:
+    """
+    Runs the stress test and returns {'failures': [messages], 'serial': beams/s, 'concurrent': beams/s}.
+    """
+    beam_texts = [
+        '\n'.join(random_beam_lines(np.random.default_rng(beam_seed))) + '\n' for beam_seed in beam_seeds(seed, n_beams)
+    ]
+    # Every other beam is passed as structured data, the same dict objects in every thread.
+    beam_inputs = [
+        beams.get_structured_beam_data(read_csv_text(text)) if idx % 2 else text for idx, text in enumerate(beam_texts)
+    ]
+    snapshots = copy.deepcopy(beam_inputs)
+    load_combos = lf.flatten_combos(lf.ec_combo_library())
+    combos_snapshot = copy.deepcopy(load_combos)
+
+    start = time.perf_counter()
+    reference = [pipeline.analyze(beam, load_combos) for beam in beam_inputs]
+    serial_time = time.perf_counter() - start
+
+    failures = []
+    rng = np.random.default_rng(seed)
+    concurrent_time = 0.0
+    completed_rounds = 0
+    for round_idx in range(rounds):
+        order = rng.permutation(n_beams)
+        start = time.perf_counter()
+        try:
+            results = pipeline.analyze_many([beam_inputs[idx] for idx in order], load_combos, max_workers=threads)
+        except Exception as error:
+            failures.append(f'round {round_idx}: {error!r}')
+            continue
+        concurrent_time += time.perf_counter() - start
+        completed_rounds += 1
+        for idx, result in zip(order, results):
+            if not results_match(reference[idx], result):
+                failures.append(f'round {round_idx}: beam {idx} differs from the serial solve')
+
+    if beam_inputs != snapshots:
+        failures.append('the structured beam data was modified')
+    if load_combos != combos_snapshot:
+        failures.append('the load combos were modified')
+
+    return {
+        'failures': failures,
+        'serial': n_beams / serial_time,
+        'concurrent': n_beams * completed_rounds / concurrent_time if concurrent_time else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress the pipeline API from many threads at once.")
+    parser.add_argument('--n-beams', type=int, default=40)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    outcome = stress(args.n_beams, args.threads, args.rounds, args.seed)
+    for failure in outcome['failures']:
+        print(failure)
+    print(f"serial:     {outcome['serial']:7.1f} beams/s")
+    print(f"concurrent: {outcome['concurrent']:7.1f} beams/s ({args.threads} threads)")
+    print(f"{len(outcome['failures'])} failures in {args.rounds} rounds of {args.n_beams} beams")
+    raise SystemExit(1 if outcome['failures'] else 0)
+
+
+if __name__ == '__main__':
+    main()
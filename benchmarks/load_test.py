@@ -0,0 +1,93 @@
+"""
+Local load test for the analysis service (service.py).
+
+Start the service, then run from the repository root:
+
+    uvicorn service:app --port 8000
+    python -m benchmarks.load_test --url http://127.0.0.1:8000/analyze --concurrency 16 --requests 200
+
+Every request posts one generated beam file. The script reports the throughput, the p50/p99
+latencies of the successful requests and how many requests were refused (503) by backpressure.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.bench_pipeline import generate_beam_lines
+
+
+async def post(host: str, port: int, path: str, body: bytes) -> int:
+    """
+    Sends one HTTP/1.1 POST of 'body' as text/plain and returns the response status code.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    request = (
+        f'POST {path} HTTP/1.1\r\n'
+        f'Host: {host}:{port}\r\n'
+        f'Content-Type: text/plain\r\n'
+        f'Content-Length: {len(body)}\r\n'
+        f'Connection: close\r\n\r\n'
+    ).encode() + body
+    writer.write(request)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return int(response.split(b' ', 2)[1])
+
+
+async def run_load_test(url: str, concurrency: int, n_requests: int) -> dict:
+    """
+    Returns the latency statistics of 'n_requests' posts to 'url' with at most 'concurrency' in flight.
+    """
+    parts = urlsplit(url)
+    bodies = [
+        ('\n'.join(generate_beam_lines(2 + idx % 4, 1 + idx % 5, 1 + idx % 3)) + '\n').encode()
+        for idx in range(8)
+    ]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = {}
+
+    async def one_request(idx: int):
+        async with semaphore:
+            start = time.perf_counter()
+            status = await post(parts.hostname, parts.port or 80, parts.path or '/', bodies[idx % len(bodies)])
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one_request(idx) for idx in range(n_requests)])
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': n_requests,
+        'seconds': seconds,
+        'requests_per_second': n_requests / seconds,
+        'p50': quantiles[49] if latencies else None,
+        'p99': quantiles[98] if latencies else None,
+        'statuses': statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the beam analysis service.")
+    parser.add_argument('--url', default='http://127.0.0.1:8000/analyze')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    stats = asyncio.run(run_load_test(args.url, args.concurrency, args.requests))
+    print(f"{stats['requests']} requests in {stats['seconds']:.2f} s ({stats['requests_per_second']:.1f} req/s)")
+    if stats['p50'] is not None:
+        print(f"p50 = {stats['p50'] * 1e3:.1f} ms, p99 = {stats['p99'] * 1e3:.1f} ms")
+    print(f"status codes: {stats['statuses']}")
+
+
+if __name__ == '__main__':
+    main()
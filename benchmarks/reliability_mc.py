@@ -0,0 +1,103 @@
+"""
+Monte Carlo throughput of reliability.py: sampled superposition against re-solving every realization.
+
+Run from the repository root:
+
+    python -m benchmarks.reliability_mc --max-samples 100000 --n-resolve 20 --n-pool 200 --max-workers 4
+
+On a generated beam (benchmarks.bench_pipeline) the script first checks that the sampled results are
+those of re-solved realizations: 'n-resolve' realizations are solved with their own E and Iz and
+superposed with their own load factors, and the largest difference is reported relative to the
+largest result. It then reports:
+
+    'monte_carlo':  reliability.monte_carlo (one analysis, sampling and statistics) for n = 1000, 10000, ...
+    're-solve':     the time per realization of a full solve, and that time for n realizations
+    'pool':         solve_realizations of 'n-pool' realizations with random support locations, which do
+                    need a re-solve each, in a process pool of 'max-workers' processes
+"""
+import argparse
+import time
+
+import numpy as np
+
+import beams
+import reliability
+from benchmarks.bench_pipeline import generate_beam_lines
+from utils import read_csv_text
+
+
+def check_sampling(beam_data: dict, n_realizations: int, seed: int) -> float:
+    """
+    Returns the largest difference between the sampled and the re-solved results of 'n_realizations'
+    random realizations of 'beam_data', relative to the largest result of each result type.
+    """
+    rng = np.random.default_rng(seed)
+    unit_results = beams.solve_unit_cases(beam_data, reliability.RELIABILITY_RESULTS)
+    case_names = unit_results['reactions']['combo_names']
+    factors = reliability.sample_load_factors(rng, case_names, n_realizations)
+    E_scales = reliability.sample(rng, reliability.DEFAULT_STIFFNESS_MODELS["E"], n_realizations)
+    Iz_scales = reliability.sample(rng, reliability.DEFAULT_STIFFNESS_MODELS["Iz"], n_realizations)
+
+    error = 0.0
+    for idx in range(n_realizations):
+        realization = {**beam_data, "E": beam_data["E"] * E_scales[idx], "Iz": beam_data["Iz"] * Iz_scales[idx]}
+        combo = {'realization': dict(zip(case_names, factors[idx]))}
+        solved = beams.superpose_results(beams.solve_unit_cases(realization, reliability.RELIABILITY_RESULTS), combo)
+        for result_type in reliability.RELIABILITY_RESULTS:
+            sampled = reliability.sample_responses(unit_results, result_type, factors[idx:idx + 1], (E_scales * Iz_scales)[idx:idx + 1])
+            expected = solved[result_type][2]
+            error = max(error, float(np.abs(sampled - expected).max() / np.abs(expected).max()))
+    return error
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time sampled Monte Carlo runs against re-solving every realization.")
+    parser.add_argument('--max-samples', type=int, default=100000)
+    parser.add_argument('--n-resolve', type=int, default=20, help="realizations re-solved for the check and the timings")
+    parser.add_argument('--n-pool', type=int, default=200, help="realizations solved in the process pool")
+    parser.add_argument('--max-workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    beam_text = '\n'.join(generate_beam_lines(4, 5, 3))
+    beam_data = beams.get_structured_beam_data(read_csv_text(beam_text))
+    print(f"sampled vs re-solved: max relative error {check_sampling(beam_data, args.n_resolve, args.seed):.1e}")
+
+    start = time.perf_counter()
+    for _ in range(args.n_resolve):
+        beams.solve_unit_cases(beam_data, reliability.RELIABILITY_RESULTS)
+    resolve_time = (time.perf_counter() - start) / args.n_resolve
+
+    # A section with a mean resistance of 2 x the mean maximum moment, for a measurable failure probability
+    baseline = reliability.monte_carlo(beam_text, n_samples=1000, seed=args.seed)
+    section = {'S': 2.0 * baseline['moment']['abs_max']['mean'] / (350 * reliability.DEFAULT_STRENGTH_MODEL['mean']), 'Fy': 350}
+
+    print(f"\n{'samples':>9} {'monte_carlo':>12} {'re-solve':>12} {'P(failure)':>11} {'beta':>6}")
+    n_samples = 1000
+    while n_samples <= args.max_samples:
+        start = time.perf_counter()
+        results = reliability.monte_carlo(beam_text, n_samples=n_samples, seed=args.seed, section=section)
+        elapsed = time.perf_counter() - start
+        failure = results['failure']
+        print(
+            f"{n_samples:>9} {elapsed:11.2f}s {resolve_time * n_samples:11.1f}s "
+            f"{failure['probability']:11.2e} {failure['reliability_index']:6.2f}"
+        )
+        n_samples *= 10
+
+    rng = np.random.default_rng(args.seed)
+    realizations = [
+        {**beam_data, "Supports": {location + rng.normal(0, 10) * (0 < location < beam_data["L"]): support_type
+                                   for location, support_type in beam_data["Supports"].items()}}
+        for _ in range(args.n_pool)
+    ]
+    start = time.perf_counter()
+    reliability.solve_realizations(realizations, max_workers=args.max_workers)
+    pool_time = time.perf_counter() - start
+    print(f"\npool: {args.n_pool} realizations with random support locations in {pool_time:.2f}s "
+          f"({args.n_pool / pool_time:.1f}/s, serial {1 / resolve_time:.1f}/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Memory held by the results of one solved beam, per storage format.
+
+Run from the repository root:
+
+    python -m benchmarks.result_memory --n-points 1000
+
+The beam is solved once for the Eurocode ULS and SLS combos (load_factors.ec_combo_library) and its
+moment, shear and deflection results are measured as:
+
+    'per-combo arrays':  extract_arrays_all_combos, an [x, y] pair per combo (the x-grid repeated)
+    'float64 tensors':   extract_result_tensors, one x-grid per result type
+    'compact float32':   compact_results.CompactResults
+    'compact 16-bit', 'compact 8-bit': CompactResults quantized for plotting
+
+with the largest error of each format relative to the largest absolute result.
+"""
+import argparse
+
+import numpy as np
+
+import beams
+import load_factors as lf
+from benchmarks.bench_pipeline import generate_beam_lines
+from compact_results import CompactResults
+from model_cache import estimate_bytes
+
+
+RESULT_TYPES = {
+    'moment': 'Mz',
+    'shear': 'Fy',
+    'deflection': 'dy',
+}
+
+
+def measure_formats(beam_text: str, n_points: int) -> dict[str, tuple[int, float]]:
+    """
+    Returns {format name: (bytes, max relative error)} for the results of the beam file contents
+    'beam_text'.
+    """
+    model = beams.load_beam_model_from_text(beam_text, lf.flatten_combos(lf.ec_combo_library()))
+    per_combo = {
+        result_type: beams.extract_arrays_all_combos(model, result_type, direction, n_points)
+        for result_type, direction in RESULT_TYPES.items()
+    }
+    tensors = beams.extract_result_tensors(model, RESULT_TYPES, n_points)
+
+    def max_error(compact: CompactResults) -> float:
+        return max(
+            float(np.abs(compact.results(result_type) - results).max() / np.abs(results).max())
+            for result_type, (_, _, results) in tensors.items()
+        )
+
+    formats = {
+        'per-combo arrays': (estimate_bytes(per_combo), 0.0),
+        'float64 tensors': (estimate_bytes(tensors), 0.0),
+    }
+    for name, bits in [('compact float32', None), ('compact 16-bit', 16), ('compact 8-bit', 8)]:
+        compact = CompactResults.from_tensors(tensors, bits=bits)
+        formats[name] = (estimate_bytes(compact), max_error(compact))
+    return formats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the memory held by the result storage formats.")
+    parser.add_argument('--n-points', type=int, default=1000)
+    args = parser.parse_args()
+
+    beam_text = '\n'.join(generate_beam_lines(4, 5, 3)) + '\n'
+    formats = measure_formats(beam_text, args.n_points)
+    reference = formats['per-combo arrays'][0]
+    for name, (n_bytes, error) in formats.items():
+        print(f"{name:<18} {n_bytes / 1024:9.1f} KiB  {reference / n_bytes:5.1f}x smaller  max error {error:.1e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+The analytic sensitivities (sensitivity.py) against central finite differences, on random beams.
+
+Run from the repository root:
+
+    python -m benchmarks.sensitivity_check --n-beams 40 --seed 3
+
+For every beam of the corpus (benchmarks.beam_corpus) and every parameter ('E', 'Iz', 'A' and the
+location of each support), the script reports the largest difference between the analytic derivative
+and the finite difference of the sparse solver's results, relative to max|result| / parameter (so that
+results near zero don't blow up the error). The step is 'rel-step' times the parameter for the section
+and material, and times the distance to the nearest other support (the shortest span it changes) for
+a support, which is moved inwards from a beam end. The
+stations within four steps of a moving support are skipped: the derivative there is not continuous.
+
+It then times both ways of getting every sensitivity of a beam: the analytic solve, and two re-solves
+per parameter through the sparse solver and through PyNite (beams.solve_unit_cases).
+"""
+import argparse
+import time
+
+import numpy as np
+
+import beams
+import sensitivity
+import sparse_beam
+from benchmarks.beam_corpus import beam_seeds, random_beam_lines
+from utils import read_csv_text
+
+
+CHECK_RESULTS = dict(sparse_beam.SPARSE_RESULTS)
+
+
+def perturbed(beam_data: dict, parameter: str, step: float) -> dict:
+    """
+    Returns a copy of 'beam_data' with 'parameter' increased by 'step'.
+    """
+    beam_data = dict(beam_data)
+    if parameter.startswith(sensitivity.SUPPORT_PREFIX):
+        location = float(parameter[len(sensitivity.SUPPORT_PREFIX):])
+        supports = dict(beam_data["Supports"])
+        supports[location + step] = supports.pop(location)
+        beam_data["Supports"] = supports
+    else:
+        beam_data[parameter] = beam_data[parameter] + step
+    return beam_data
+
+
+
+def finite_difference(beam_data: dict, parameter: str, rel_step: float, n_points: int) -> tuple[dict, np.ndarray]:
+    """
+    Returns the finite difference of every result of 'beam_data' to 'parameter', in the format of
+    sensitivity.solve_unit_case_sensitivities, and the mask of the stations it is compared at. The
+    difference is central for the section and material, and second-order one-sided for a support.
+    """
+    x_locs = np.linspace(0, beam_data["L"], n_points)
+    if not parameter.startswith(sensitivity.SUPPORT_PREFIX):
+        step = rel_step * beam_data[parameter]
+        mask = np.ones(n_points, dtype=bool)
+    else:
+        location = float(parameter[len(sensitivity.SUPPORT_PREFIX):])
+        spacings = [abs(other - location) for other in beam_data["Supports"] if other != location]
+        step = rel_step * min(spacings, default=beam_data["L"])
+        mask = np.abs(x_locs - location) > 4 * step
+        if location == beam_data["L"]:
+            step = -step
+    if not parameter.startswith(sensitivity.SUPPORT_PREFIX):
+        stencil = {step: 0.5, -step: -0.5}
+    elif location in (0, beam_data["L"]):
+        # (-3 f(0) + 4 f(h) - f(2h)) / 2h
+        stencil = {0.0: -1.5, step: 2.0, 2 * step: -0.5}
+    else:
+        # The mean of that difference to the right and to the left, which is the mean of the one-sided
+        # derivatives (as in sensitivity.py) where a load at the support makes them differ
+        stencil = {step: 1.0, -step: -1.0, 2 * step: -0.25, -2 * step: 0.25}
+
+    differences = {result_type: 0.0 for result_type in CHECK_RESULTS}
+    differences['reactions'] = 0.0
+    for offset, weight in stencil.items():
+        solved = sparse_beam.solve_unit_cases_sparse(perturbed(beam_data, parameter, offset), CHECK_RESULTS, n_points)
+        for result_type in CHECK_RESULTS:
+            differences[result_type] = differences[result_type] + weight / step * solved[result_type][2]
+        differences['reactions'] = differences['reactions'] + weight / step * solved['reactions']['reactions']
+    return differences, mask
+
+
+
+def check_beam(beam_data: dict, rel_step: float, n_points: int) -> dict[str, float]:
+    """
+    Returns {'<parameter kind>:<result type>': error} for every parameter of 'beam_data', where the
+    parameter kind is 'E', 'Iz', 'A' or 'x' (a support location).
+    """
+    parameters = list(sensitivity.STIFFNESS_PARAMETERS) + sensitivity.support_parameters(beam_data)
+    results = sparse_beam.solve_unit_cases_sparse(beam_data, CHECK_RESULTS, n_points)
+    analytic = sensitivity.solve_unit_case_sensitivities(beam_data, CHECK_RESULTS, parameters, n_points)
+
+    errors = {}
+    for parameter in parameters:
+        is_support = parameter.startswith(sensitivity.SUPPORT_PREFIX)
+        scale = beam_data["L"] if is_support else beam_data[parameter]
+        differences, mask = finite_difference(beam_data, parameter, rel_step, n_points)
+        compared = [(result_type, results[result_type][2], analytic[parameter][result_type][2][:, mask], differences[result_type][:, mask]) for result_type in CHECK_RESULTS]
+        compared.append(('reactions', results['reactions']['reactions'], analytic[parameter]['reactions']['reactions'], differences['reactions']))
+        for result_type, values, derivative, difference in compared:
+            size = np.abs(values).max() / scale
+            error = float(np.abs(derivative - difference).max() / size) if size > 0 else float(np.abs(derivative - difference).max())
+            kind = f"{'x' if is_support else parameter}:{result_type}"
+            errors[kind] = max(errors.get(kind, 0.0), error)
+    return errors
+
+
+
+def time_call(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the analytic sensitivities against finite differences.")
+    parser.add_argument('--n-beams', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=3)
+    parser.add_argument('--n-points', type=int, default=401)
+    parser.add_argument('--rel-step', type=float, default=1e-3)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    beam_list = [
+        beams.get_structured_beam_data(read_csv_text('\n'.join(random_beam_lines(np.random.default_rng(beam_seed)))))
+        for beam_seed in beam_seeds(args.seed, args.n_beams)
+    ]
+
+    worst = {}
+    for beam_data in beam_list:
+        for kind, error in check_beam(beam_data, args.rel_step, args.n_points).items():
+            worst[kind] = max(worst.get(kind, 0.0), error)
+    print(f"{'parameter:result':>18} {'max error':>10}")
+    for kind, error in sorted(worst.items()):
+        print(f"{kind:>18} {error:10.1e}")
+
+    beam_data = beam_list[0]
+    parameters = list(sensitivity.STIFFNESS_PARAMETERS) + sensitivity.support_parameters(beam_data)
+    steps = [(parameter, step) for parameter in parameters for step in (1e-4, -1e-4)]
+    timings = {
+        'analytic': time_call(lambda: sensitivity.solve_unit_case_sensitivities(beam_data, CHECK_RESULTS, parameters, args.n_points), args.repeat),
+        'fd sparse': time_call(lambda: [sparse_beam.solve_unit_cases_sparse(perturbed(beam_data, p, s), CHECK_RESULTS, args.n_points) for p, s in steps], args.repeat),
+        'fd pynite': time_call(lambda: [beams.solve_unit_cases(perturbed(beam_data, p, s), CHECK_RESULTS, args.n_points) for p, s in steps], 1),
+    }
+    print(f"\n{len(parameters)} parameters of the first beam:")
+    for name, timing in timings.items():
+        print(f"{name:>10} {timing * 1e3:9.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Solve time against element count: the sparse solver (sparse_beam.py) vs PyNite's assembly.
+
+Run from the repository root:
+
+    python -m benchmarks.sparse_scaling --max-elements 10000 --pynite-max 500
+
+A generated beam (benchmarks.bench_pipeline) is meshed into about n elements for n = 10, 100, ...,
+'max-elements'. For each mesh the script reports:
+
+    'assemble+factor':  building the CSR stiffness matrix and its sparse LU (not cached)
+    'solve':            solving all of the load cases against the cached factorization
+    'pynite':           FEModel3D.analyze of the same mesh, one member per element (up to 'pynite-max')
+    'error':            the largest deflection difference at the nodes of the unmeshed beam, relative
+                        to the largest deflection. The unmeshed solve is exact there, so this is
+                        round-off, which grows with the fourth power of the number of elements.
+"""
+import argparse
+import time
+
+import numpy as np
+from PyNite import FEModel3D
+
+import beams
+import sparse_beam
+from benchmarks.bench_pipeline import generate_beam_lines
+from utils import read_csv_text
+
+
+def pynite_meshed_model(beam_data: dict, node_locs: np.ndarray) -> FEModel3D:
+    """
+    Returns an unsolved PyNite model of 'beam_data' with a node at every one of 'node_locs' and one
+    member per element, loaded as in beams.build_beam.
+    """
+    model = FEModel3D()
+    for idx, location in enumerate(node_locs):
+        model.add_node(f'N{idx}', location, 0, 0)
+    for location, support_type in beam_data["Supports"].items():
+        dx, dy, rz = sparse_beam.SUPPORT_RESTRAINTS[support_type]
+        model.def_support(f'N{int(np.searchsorted(node_locs, location))}', dx, dy, True, True, True, rz)
+    model.add_material('Steel', beam_data["E"], beams.calc_shear_modulus(beam_data["E"], beam_data["nu"]), beam_data["nu"], beam_data["rho"])
+    for idx in range(len(node_locs) - 1):
+        model.add_member(f'M{idx}', f'N{idx}', f'N{idx + 1}', 'Steel', beam_data["Iy"], beam_data["Iz"], beam_data["J"], beam_data["A"])
+
+    for load in beam_data["Loads"]:
+        if load["Type"] == "Point":
+            node = int(np.searchsorted(node_locs, load["Location"]))
+            model.add_node_load(f'N{node}', load["Direction"].upper(), load["Magnitude"], load["Case"])
+            continue
+        first, last = np.searchsorted(node_locs, [load["Start Location"], load["End Location"]])
+        slope = (load["End Magnitude"] - load["Start Magnitude"]) / (load["End Location"] - load["Start Location"])
+        for idx in range(first, last):
+            w1 = load["Start Magnitude"] + slope * (node_locs[idx] - load["Start Location"])
+            w2 = load["Start Magnitude"] + slope * (node_locs[idx + 1] - load["Start Location"])
+            model.add_member_dist_load(f'M{idx}', load["Direction"], w1, w2, case=load["Case"])
+    for case_name in beams.load_case_names(beam_data):
+        model.add_load_combo(case_name, {case_name: 1.0})
+    return model
+
+
+def time_call(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_mesh(beam_data: dict, n_elements: int, pynite_max: int, repeat: int) -> dict:
+    """
+    Returns the timings (in seconds) and the round-off error of the mesh of about 'n_elements' elements.
+    """
+    max_element_length = beam_data["L"] / n_elements
+    node_locs = sparse_beam.mesh_locations(beam_data, max_element_length)
+    restrained = sparse_beam.restrained_dofs(node_locs, beam_data["Supports"])
+    EA, EI = beam_data["E"] * beam_data["A"], beam_data["E"] * beam_data["Iz"]
+
+    def assemble_and_factor():
+        sparse_beam._factorized.cache_clear()
+        sparse_beam.factorized_stiffness(node_locs, EA, EI, restrained)
+
+    exact = sparse_beam.solve_nodal(beam_data)
+    meshed = sparse_beam.solve_nodal(beam_data, max_element_length)
+    at_exact_nodes = np.searchsorted(meshed['node_locs'], exact['node_locs'])
+    deflections = exact['displacements'][:, 1]
+    error = np.abs(meshed['displacements'][at_exact_nodes, 1] - deflections).max() / np.abs(deflections).max()
+
+    timings = {
+        'elements': len(node_locs) - 1,
+        'assemble+factor': time_call(assemble_and_factor, repeat),
+        'solve': time_call(lambda: sparse_beam.solve_nodal(beam_data, max_element_length), repeat),
+        'pynite': None,
+        'error': error,
+    }
+    if len(node_locs) - 1 <= pynite_max:
+        model = pynite_meshed_model(beam_data, node_locs)
+        timings['pynite'] = time_call(model.analyze, 1)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the sparse solver against PyNite as the mesh is refined.")
+    parser.add_argument('--max-elements', type=int, default=10000)
+    parser.add_argument('--pynite-max', type=int, default=500, help="largest mesh also solved with PyNite")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    beam_data = beams.get_structured_beam_data(read_csv_text('\n'.join(generate_beam_lines(4, 5, 3))))
+    print(f"{'elements':>9} {'assemble+factor':>16} {'solve':>10} {'pynite':>10} {'error':>9}")
+    n_elements = 10
+    while n_elements <= args.max_elements:
+        timings = bench_mesh(beam_data, n_elements, args.pynite_max, args.repeat)
+        pynite = f"{timings['pynite'] * 1e3:8.1f}ms" if timings['pynite'] is not None else f"{'-':>10}"
+        print(
+            f"{timings['elements']:>9} {timings['assemble+factor'] * 1e3:14.2f}ms "
+            f"{timings['solve'] * 1e3:8.2f}ms {pynite} {timings['error']:9.1e}"
+        )
+        n_elements *= 10
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+from typing import Optional
+
+import numpy as np
+
+import beams
+
+
+QUANTIZED_DTYPES = {8: np.uint8, 16: np.uint16}
+
+
+class CompactResults:
+    """
+    A compact, read-mostly container for the results of one solved beam, for sweeps and batch runs
+    that keep many beams in memory.
+
+    extract_arrays_all_combos returns a float64 [x, y] pair per load combo, so every combo carries its
+    own copy of the same x-locations. Here the x-grid and the combo names are stored once for the beam,
+    and the results of every result type are stored in one contiguous
+    (n_result_types, n_combos, n_points) buffer of float32 (half of the float64 tensors, a quarter of
+    the per-combo pairs).
+
+    With 'bits' (8 or 16) the results are quantized further: each row (one result type under one
+    combo) is stored as unsigned integer codes with its own float32 offset and step, so the error is
+    at most half a step, i.e. (row max - row min) / (2 * (2**bits - 1)). This is meant for plotting
+    and browsing results; use the float32 storage (bits=None) for design checks.
+
+    container[result_type] returns (x_locs, combo_names, results) as extract_result_tensor does, so
+    the container can be passed wherever those tuples are used (e.g. plots.plotly_diagram).
+    pipeline.analyze and analyze_many return their results in this form with 'compact=True'.
+    """
+
+    def __init__(
+        self,
+        x_locs: np.ndarray,
+        combo_names: list[str],
+        result_types: list[str],
+        values: np.ndarray,
+        offsets: Optional[np.ndarray] = None,
+        steps: Optional[np.ndarray] = None,
+        reactions: Optional[dict] = None,
+    ):
+        self.x_locs = x_locs
+        self.combo_names = combo_names
+        self.result_types = result_types
+        self.values = values
+        self.offsets = offsets
+        self.steps = steps
+        self.reactions = reactions
+
+    @classmethod
+    def from_tensors(cls, result_tensors: dict, dtype=np.float32, bits: Optional[int] = None) -> 'CompactResults':
+        """
+        Returns the results in 'result_tensors' (as returned by beams.extract_result_tensors,
+        beams.solve_unit_cases or beams.superpose_results) stored compactly.
+
+        'dtype': the float type the results are stored in when they are not quantized
+        'bits': None, or 8 or 16 to quantize the results (see the class docstring)
+
+        Every result type must share the same x-locations and combo names. The 'reactions', if any,
+        are small and are kept as they are.
+        """
+
+        reactions = result_tensors.get('reactions')
+        tensors = {result_type: tensor for result_type, tensor in result_tensors.items() if result_type != 'reactions'}
+        if not tensors:
+            raise ValueError("'result_tensors' contains no result types")
+
+        x_locs, combo_names, _ = next(iter(tensors.values()))
+        for result_type, (type_x_locs, type_combo_names, _) in tensors.items():
+            if list(type_combo_names) != list(combo_names) or not np.array_equal(type_x_locs, x_locs):
+                raise ValueError(f"The results of '{result_type}' are not on the same x-locations and combos")
+
+        stacked = np.stack([results for _, _, results in tensors.values()])
+        if bits is None:
+            return cls(np.array(x_locs, dtype=float), list(combo_names), list(tensors), stacked.astype(dtype), reactions=reactions)
+
+        if bits not in QUANTIZED_DTYPES:
+            raise ValueError(f"'bits' must be one of {list(QUANTIZED_DTYPES)} or None, not {bits}")
+        offsets = stacked.min(axis=-1, keepdims=True)
+        spans = stacked.max(axis=-1, keepdims=True) - offsets
+        steps = np.where(spans > 0, spans / (2**bits - 1), 1.0)
+        codes = np.rint((stacked - offsets) / steps).astype(QUANTIZED_DTYPES[bits])
+        return cls(
+            np.array(x_locs, dtype=float),
+            list(combo_names),
+            list(tensors),
+            codes,
+            offsets.astype(np.float32),
+            steps.astype(np.float32),
+            reactions,
+        )
+
+    @classmethod
+    def from_model(
+        cls,
+        solved_beam_model,
+        result_types: dict[str, Optional[str]],
+        n_points: int = 200,
+        dtype=np.float32,
+        bits: Optional[int] = None,
+    ) -> 'CompactResults':
+        """
+        Returns the results of 'solved_beam_model' for every {result_type: direction} in 'result_types',
+        stored compactly (see from_tensors).
+        """
+        return cls.from_tensors(beams.extract_result_tensors(solved_beam_model, result_types, n_points), dtype, bits)
+
+    @property
+    def quantized(self) -> bool:
+        return self.steps is not None
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns the size of the stored arrays in bytes.
+        """
+        arrays = [self.x_locs, self.values, self.offsets, self.steps]
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def results(self, result_type: str) -> np.ndarray:
+        """
+        Returns the (n_combos, n_points)-shaped results of 'result_type'. Without quantization this
+        is a view of the stored buffer, otherwise the codes are decoded into a new float32 array.
+        """
+        idx = self.result_types.index(result_type)
+        if not self.quantized:
+            return self.values[idx]
+        return self.values[idx] * self.steps[idx] + self.offsets[idx]
+
+    def __getitem__(self, result_type: str) -> tuple[np.ndarray, list[str], np.ndarray]:
+        return self.x_locs, self.combo_names, self.results(result_type)
+
+    def __contains__(self, result_type: str) -> bool:
+        return result_type in self.result_types
+
+    def __iter__(self):
+        return iter(self.result_types)
+
+    def envelope(self, result_type: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the (max, min) envelopes of 'result_type' over all of the combos, as float64 arrays.
+        """
+        results = self.results(result_type)
+        return results.max(axis=0).astype(float), results.min(axis=0).astype(float)
+
+    def to_tensors(self) -> dict:
+        """
+        Returns the results as float64 tensors in the format of beams.extract_result_tensors (plus
+        'reactions', if they were stored).
+        """
+        tensors = {
+            result_type: (self.x_locs, list(self.combo_names), self.results(result_type).astype(float))
+            for result_type in self.result_types
+        }
+        if self.reactions is not None:
+            tensors['reactions'] = self.reactions
+        return tensors
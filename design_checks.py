@@ -0,0 +1,149 @@
+from math import pi, sqrt
+from typing import Optional
+
+import numpy as np
+
+from serviceability import beam_spans, span_stations
+
+
+def bending_resistance(section: dict, gamma: float = 1.1) -> float:
+    """
+    Returns the bending resistance of the 'section', as app_module.calc_Mr2 (S * Fy / gamma), in N.mm.
+    """
+    return section['S'] * section['Fy'] / gamma
+
+
+
+def shear_resistance(section: dict, gamma: float = 1.1) -> float:
+    """
+    Returns the plastic shear resistance of the 'section', Av * (Fy / sqrt(3)) / gamma, in N.
+    """
+    return section['Av'] * section['Fy'] / sqrt(3) / gamma
+
+
+
+def moment_gradient_factor(m_max: np.ndarray, m_a: np.ndarray, m_b: np.ndarray, m_c: np.ndarray) -> np.ndarray:
+    """
+    Returns the equivalent uniform moment factor of unbraced segments from the absolute moments at
+    their quarter points ('m_a', 'm_b', 'm_c') and their maximum absolute moment 'm_max', with
+    12.5 Mmax / (2.5 Mmax + 3 Ma + 4 Mb + 3 Mc), capped at 3.0. It is used as C1 in the critical moment.
+
+    e.g. a uniform moment: moment_gradient_factor(1, 1, 1, 1) -> 1.0
+    """
+    denominator = 2.5 * m_max + 3 * m_a + 4 * m_b + 3 * m_c
+    c_1 = np.divide(12.5 * m_max, denominator, out=np.ones_like(denominator, dtype=float), where=denominator > 0)
+    return np.minimum(c_1, 3.0)
+
+
+
+def ltb_resistance(
+    section: dict,
+    length: float,
+    c_1: np.ndarray,
+    gamma: float = 1.1,
+    alpha_lt: float = 0.34,
+) -> np.ndarray:
+
+    """
+    Returns the lateral-torsional buckling resistance (N.mm) of an unbraced segment of 'length' of the
+    'section' for each of the moment gradient factors 'c_1' (e.g. one per load combo), EN 1993-1-1 6.3.2.2:
+
+    Mcr = C1 pi^2 E Iy / L^2 sqrt(Iw / Iy + L^2 G J / (pi^2 E Iy))
+    lambda_LT = sqrt(S Fy / Mcr)
+    chi_LT = 1 / (phi + sqrt(phi^2 - lambda_LT^2)) <= 1, with phi = 0.5 (1 + alpha_LT (lambda_LT - 0.2) + lambda_LT^2)
+    Mb = chi_LT S Fy / gamma
+
+    'alpha_lt': the imperfection factor of the buckling curve (0.34 is curve b)
+    """
+
+    E, G, Iy = section['E'], section['G'], section['Iy']
+    m_cr = np.asarray(c_1, dtype=float) * pi**2 * E * Iy / length**2 * sqrt(
+        section.get('Iw', 0.0) / Iy + length**2 * G * section['J'] / (pi**2 * E * Iy)
+    )
+    m_y = section['S'] * section['Fy']
+    slenderness = np.sqrt(m_y / m_cr)
+    phi = 0.5 * (1 + alpha_lt * (slenderness - 0.2) + slenderness**2)
+    chi = np.minimum(1 / (phi + np.sqrt(phi**2 - slenderness**2)), 1.0)
+    return chi * m_y / gamma
+
+
+
+def design_checks(
+    x_locs: np.ndarray,
+    combo_names: list[str],
+    moments: np.ndarray,
+    shears: np.ndarray,
+    section: dict,
+    support_locations: Optional[list[float]] = None,
+    gamma: float = 1.1,
+    alpha_lt: float = 0.34,
+) -> dict:
+
+    """
+    Returns the utilisation (demand / resistance) of the member at every station for every load combo,
+    for bending, shear, bending with shear and lateral-torsional buckling, and where each check governs.
+
+    'x_locs', 'combo_names', 'moments', 'shears': the moment ('Mz') and shear ('Fy') tensors returned by
+        beams.extract_result_tensor (or beams.superpose_results), with the same combos in the same order
+    'section': a dict of the section properties in N and mm:
+        'S': elastic section modulus about the bending axis (Sx in the app)
+        'Fy': yield strength
+        'Av': shear area
+        'E', 'G', 'Iy' (minor axis), 'J' and optionally 'Iw' (warping constant): only needed for
+            lateral-torsional buckling, which is not checked (fully restrained member) without them
+    'support_locations': the supports, which brace the member laterally. The unbraced segments run between
+        them, and a cantilever is taken with an effective length of twice its overhang. A segment shorter
+        than the station spacing is checked at the stations nearest its ends.
+
+    The returned dict contains:
+    'utilisation': {check: (n_combos, n_points)-shaped array} for the checks 'bending', 'shear',
+        'bending_shear' (EN 1993-1-1 6.2.8, with the reduction applied to the whole section) and
+        'ltb' (if checked)
+    'governing': {check: {'utilisation', 'location', 'combo'}} including 'overall', the worst of them all
+    """
+
+    x_locs = np.asarray(x_locs, dtype=float)
+    abs_moments = np.abs(np.asarray(moments, dtype=float))
+    abs_shears = np.abs(np.asarray(shears, dtype=float))
+
+    m_rd = bending_resistance(section, gamma)
+    v_rd = shear_resistance(section, gamma)
+
+    utilisation = {
+        'bending': abs_moments / m_rd,
+        'shear': abs_shears / v_rd,
+    }
+
+    shear_ratio = abs_shears / v_rd
+    rho = np.where(shear_ratio > 0.5, (2 * shear_ratio - 1) ** 2, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        utilisation['bending_shear'] = np.where(rho < 1, abs_moments / (m_rd * (1 - rho)), np.inf)
+
+    if support_locations is not None and all(key in section for key in ('E', 'G', 'Iy', 'J')):
+        ltb = np.zeros_like(abs_moments)
+        for segment in beam_spans(support_locations, x_locs[-1]):
+            in_segment = span_stations(x_locs, segment)
+            segment_moments = abs_moments[:, in_segment]
+            quarter_points = np.interp(
+                segment['start'] + np.array([0.25, 0.5, 0.75]) * (segment['end'] - segment['start']),
+                x_locs[in_segment],
+                np.arange(len(in_segment)),
+            ).round().astype(int)
+            m_a, m_b, m_c = segment_moments[:, quarter_points].T
+            c_1 = moment_gradient_factor(segment_moments.max(axis=1), m_a, m_b, m_c)
+            m_b_rd = ltb_resistance(section, segment['length'], c_1, gamma, alpha_lt)
+            ltb[:, in_segment] = np.maximum(ltb[:, in_segment], segment_moments / m_b_rd[:, None])
+        utilisation['ltb'] = ltb
+
+    governing = {}
+    for check, check_utilisation in utilisation.items():
+        combo_idx, point_idx = np.unravel_index(check_utilisation.argmax(), check_utilisation.shape)
+        governing[check] = {
+            'utilisation': float(check_utilisation[combo_idx, point_idx]),
+            'location': float(x_locs[point_idx]),
+            'combo': combo_names[combo_idx],
+        }
+    worst_check = max(governing, key=lambda check: governing[check]['utilisation'])
+    governing['overall'] = {**governing[worst_check], 'check': worst_check}
+
+    return {'utilisation': utilisation, 'governing': governing}
@@ -0,0 +1,238 @@
+"""
+A vectorized kernel that evaluates the in-plane diagrams of a solved beam (shear Fy, moment Mz, slope,
+deflection dy, axial force and torque) at any x-locations, for every load combo at once.
+
+PyNite evaluates each station with a Python-level search through the member's segments, once per
+station and combo. Here the beam is described once by its external forces, the loads and the support
+reactions, as columnar arrays (see DiagramTerms). The breakpoints of the diagrams (the locations of the
+forces and the ends of the distributed loads) split the beam into segments over which the loading is
+linear. The values at the start of every segment are propagated segment by segment (a short loop
+over segments, vectorized over the combos), and the stations are then assigned to their segments with
+np.searchsorted and evaluated with the closed-form segment polynomials, all at once. The cost is
+proportional to n_points * n_combos, whatever the number of loads.
+
+If numba is installed, the station evaluation is JIT-compiled, which avoids the (n_combos, n_points)
+temporaries of the NumPy version. The results are the same either way.
+
+The sign conventions are PyNite's: V(x) sums the transverse forces at or left of x, dM/dx = -V
+(point moments add to M), EI d2y/dx2 = -M, and the axial force and torque sum the axial forces and
+torques at or left of x. As in PyNite, the forces at the far end of the beam are not included.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+# result_type: direction evaluated by the kernel (None: the result type has no direction)
+KERNEL_RESULTS = {
+    'shear': 'Fy',
+    'moment': 'Mz',
+    'deflection': 'dy',
+    'axial': None,
+    'torque': None,
+}
+
+POINT_DIRECTIONS = ('Fx', 'Fy', 'Mx', 'Mz')
+DIST_DIRECTIONS = ('Fx', 'Fy')
+
+
+@dataclass
+class DiagramTerms:
+    """
+    The external forces on a straight beam along x, for 'n_combos' load combos (or load cases):
+
+    'length': the length of the beam
+    'EI': its flexural stiffness about z
+    'point_locs': (n_points,) locations of the point forces and moments, including the reactions
+    'point_dirs': (n_points,) direction of each, one of POINT_DIRECTIONS
+    'point_mags': (n_point_forces, n_combos) magnitudes under each combo
+    'dist_starts', 'dist_ends': (n_dist,) start and end locations of the distributed loads
+    'dist_dirs': (n_dist,) direction of each, one of DIST_DIRECTIONS
+    'dist_start_mags', 'dist_end_mags': (n_dist, n_combos) start and end magnitudes under each combo
+    'deflection0', 'slope0': (n_combos,) deflection and slope at x = 0
+    """
+
+    length: float
+    EI: float
+    point_locs: np.ndarray
+    point_dirs: np.ndarray
+    point_mags: np.ndarray
+    dist_starts: np.ndarray
+    dist_ends: np.ndarray
+    dist_dirs: np.ndarray
+    dist_start_mags: np.ndarray
+    dist_end_mags: np.ndarray
+    deflection0: np.ndarray
+    slope0: np.ndarray
+
+    @property
+    def n_combos(self) -> int:
+        return len(self.deflection0)
+
+
+
+def segment_tables(terms: DiagramTerms) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Returns (breaks, table) for 'terms': the sorted (n_segments,) segment start locations and the
+    (n_combos, n_segments) arrays of the table, keyed by:
+    'V', 'M', 'theta', 'delta', 'N', 'T': the values just right of each segment start
+    'w', 'k': the transverse distributed load at the segment start and its slope along the segment
+    'p', 'kp': the same for the axial distributed load
+    """
+
+    tolerance = 1e-10 * max(terms.length, 1.0)
+    locations = np.concatenate([[0.0], terms.point_locs, terms.dist_starts, terms.dist_ends])
+    breaks = np.unique(np.round(locations[locations < terms.length - tolerance], 10))
+    n_combos, n_segments = terms.n_combos, len(breaks)
+    segment_ends = np.append(breaks[1:], terms.length)
+
+    table = {}
+    # Distributed loads covering each segment: (n_dist, n_segments) masks, then (n_combos, n_segments) sums.
+    covers = (terms.dist_starts[:, None] <= breaks[None, :] + tolerance) & (terms.dist_ends[:, None] > breaks[None, :] + tolerance)
+    spans = np.where(terms.dist_ends > terms.dist_starts, terms.dist_ends - terms.dist_starts, 1.0)
+    slopes = (terms.dist_end_mags - terms.dist_start_mags) / spans[:, None]          # (n_dist, n_combos)
+    for direction, (w_key, k_key) in {'Fy': ('w', 'k'), 'Fx': ('p', 'kp')}.items():
+        mask = covers & (terms.dist_dirs == direction)[:, None]
+        offsets = breaks[None, :] - terms.dist_starts[:, None]                        # (n_dist, n_segments)
+        table[w_key] = np.einsum('ds,dc->cs', mask, terms.dist_start_mags) + np.einsum('ds,dc->cs', mask * offsets, slopes)
+        table[k_key] = np.einsum('ds,dc->cs', mask, slopes)
+
+    # Point forces at each segment start: (n_combos, n_segments) sums per direction.
+    at_break = np.abs(terms.point_locs[:, None] - breaks[None, :]) <= tolerance
+    jumps = {
+        direction: np.einsum('ps,pc->cs', at_break & (terms.point_dirs == direction)[:, None], terms.point_mags)
+        for direction in POINT_DIRECTIONS
+    }
+
+    for key in ['V', 'M', 'theta', 'delta', 'N', 'T']:
+        table[key] = np.zeros((n_combos, n_segments))
+    V, M, theta, delta = np.zeros(n_combos), np.zeros(n_combos), terms.slope0.astype(float), terms.deflection0.astype(float)
+    N, T = np.zeros(n_combos), np.zeros(n_combos)
+    EI = terms.EI
+    for idx in range(n_segments):
+        V = V + jumps['Fy'][:, idx]
+        M = M + jumps['Mz'][:, idx]
+        N = N + jumps['Fx'][:, idx]
+        T = T + jumps['Mx'][:, idx]
+        for key, value in zip(['V', 'M', 'theta', 'delta', 'N', 'T'], [V, M, theta, delta, N, T]):
+            table[key][:, idx] = value
+
+        # The values at the end of the segment, the start of the next one
+        s = segment_ends[idx] - breaks[idx]
+        w, k, p, kp = table['w'][:, idx], table['k'][:, idx], table['p'][:, idx], table['kp'][:, idx]
+        delta = delta + theta * s + (-M * s**2 / 2 + V * s**3 / 6 + w * s**4 / 24 + k * s**5 / 120) / EI
+        theta = theta + (-M * s + V * s**2 / 2 + w * s**3 / 6 + k * s**4 / 24) / EI
+        M = M - V * s - w * s**2 / 2 - k * s**3 / 6
+        V = V + w * s + k * s**2 / 2
+        N = N + p * s + kp * s**2 / 2
+    return breaks, table
+
+
+
+def _segment_values(table, EI, idx, s, result_type):
+    # The segment polynomials of segment 'idx' at the distances 's' from its start, in Horner form
+    V, M, w, k = (table[key][:, idx, None] for key in ['V', 'M', 'w', 'k'])
+    if result_type == 'shear':
+        return V + s * (w + s * k / 2)
+    if result_type == 'moment':
+        return M - s * (V + s * (w / 2 + s * k / 6))
+    if result_type == 'slope':
+        return table['theta'][:, idx, None] + s * (-M + s * (V / 2 + s * (w / 6 + s * k / 24))) / EI
+    if result_type == 'deflection':
+        theta, delta = table['theta'][:, idx, None], table['delta'][:, idx, None]
+        return delta + s * (theta + s * (-M / 2 + s * (V / 6 + s * (w / 24 + s * k / 120))) / EI)
+    if result_type == 'axial':
+        return table['N'][:, idx, None] + s * (table['p'][:, idx, None] + s * table['kp'][:, idx, None] / 2)
+    if result_type == 'torque':
+        return table['T'][:, idx, None] + 0 * s
+    raise ValueError(f"Unknown result type '{result_type}'")
+
+
+
+def _evaluate_numpy(breaks, table, EI, x_locs, result_type):
+    # The stations are sorted, so the stations of each segment are one slice of them (found with
+    # np.searchsorted) and each segment is evaluated on its slice at once, without gathering the table.
+    order = None
+    if np.any(np.diff(x_locs) < 0):
+        order = np.argsort(x_locs, kind='stable')
+        x_locs = x_locs[order]
+    tolerance = 1e-10 * max(breaks[-1], 1.0)
+    bounds = np.searchsorted(x_locs + tolerance, breaks, side='left')
+    bounds[0] = 0
+    bounds = np.append(bounds, len(x_locs))
+
+    results = np.empty((table['V'].shape[0], len(x_locs)))
+    for idx in range(len(breaks)):
+        lo, hi = bounds[idx], bounds[idx + 1]
+        if hi > lo:
+            results[:, lo:hi] = _segment_values(table, EI, idx, x_locs[None, lo:hi] - breaks[idx], result_type)
+    if order is None:
+        return results
+    unsorted = np.empty_like(results)
+    unsorted[:, order] = results
+    return unsorted
+
+
+RESULT_CODES = {'shear': 0, 'moment': 1, 'slope': 2, 'deflection': 3, 'axial': 4, 'torque': 5}
+
+
+def _evaluate_loops(breaks, V, M, theta, delta, N, T, w, k, p, kp, EI, x_locs, code):
+    # Plain loops, JIT-compiled with numba when it is installed (see evaluate).
+    n_combos, n_segments = V.shape
+    results = np.empty((n_combos, len(x_locs)))
+    tolerance = 1e-10 * max(breaks[-1], 1.0)
+    for point in range(len(x_locs)):
+        x = x_locs[point]
+        idx = np.searchsorted(breaks, x + tolerance, side='right') - 1
+        idx = min(max(idx, 0), n_segments - 1)
+        s = x - breaks[idx]
+        for combo in range(n_combos):
+            v, m, ww, kk = V[combo, idx], M[combo, idx], w[combo, idx], k[combo, idx]
+            if code == 0:
+                value = v + ww * s + kk * s**2 / 2
+            elif code == 1:
+                value = m - v * s - ww * s**2 / 2 - kk * s**3 / 6
+            elif code == 2:
+                value = theta[combo, idx] + (-m * s + v * s**2 / 2 + ww * s**3 / 6 + kk * s**4 / 24) / EI
+            elif code == 3:
+                value = (
+                    delta[combo, idx] + theta[combo, idx] * s
+                    + (-m * s**2 / 2 + v * s**3 / 6 + ww * s**4 / 24 + kk * s**5 / 120) / EI
+                )
+            elif code == 4:
+                value = N[combo, idx] + p[combo, idx] * s + kp[combo, idx] * s**2 / 2
+            else:
+                value = T[combo, idx]
+            results[combo, point] = value
+    return results
+
+
+_evaluate_jit = njit(cache=True)(_evaluate_loops) if njit is not None else None
+
+
+
+def evaluate(terms: DiagramTerms, result_types: list[str], x_locs: np.ndarray, use_jit: bool = True) -> dict[str, np.ndarray]:
+    """
+    Returns {result_type: (n_combos, n_points)-shaped results at 'x_locs'} for the beam described by
+    'terms', where each of the 'result_types' is one of RESULT_CODES ('shear', 'moment', 'slope',
+    'deflection', 'axial' or 'torque').
+
+    The station evaluation is JIT-compiled if numba is installed and 'use_jit' is True.
+    """
+    x_locs = np.ascontiguousarray(x_locs, dtype=float)
+    breaks, table = segment_tables(terms)
+    results = {}
+    for result_type in result_types:
+        if _evaluate_jit is not None and use_jit:
+            results[result_type] = _evaluate_jit(
+                breaks, *(np.ascontiguousarray(table[key]) for key in ['V', 'M', 'theta', 'delta', 'N', 'T', 'w', 'k', 'p', 'kp']),
+                float(terms.EI), x_locs, RESULT_CODES[result_type],
+            )
+        else:
+            results[result_type] = _evaluate_numpy(breaks, table, terms.EI, x_locs, result_type)
+    return results
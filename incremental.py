@@ -0,0 +1,130 @@
+import numpy as np
+from PyNite import Analysis, FEModel3D
+from PyNite.LoadCombo import LoadCombo
+from scipy.sparse.linalg import splu
+
+import beams
+from result_store import solver_version
+import tracing
+from utils import content_hash
+
+
+STIFFNESS_KEYS = ["L", "E", "Iz", "Iy", "A", "J", "nu", "rho", "Supports"]
+
+# The solve below calls private PyNite functions (Analysis._prepare_model, _partition_D, _partition,
+# _store_displacements and _calc_reactions) as they are in this version, which requirements.txt pins.
+# With any other version every call falls back to a full model.analyze().
+PYNITE_VERSION = '0.0.93'
+
+
+class IncrementalAnalysis:
+    """
+    Re-analyzes a beam after small edits by reusing as much of the previous solve as possible.
+
+    Each call to 'analyze' diffs the new structured beam data (see beams.get_structured_beam_data)
+    against the previous one:
+
+    - Nothing that affects the stiffness changed (only loads): the factorized stiffness matrix is
+      reused and only the load cases whose loads changed are solved again, with one triangular
+      solve each. The displacements of the untouched cases are reused as they are.
+    - A support, the length or a section/material property changed: the stiffness matrix is
+      assembled and factorized again, and every load case is re-solved with it.
+
+    The load combos are then superposed from the load case displacements (the beams are linear), so
+    the returned model is solved for every combo exactly as load_beam_model + analyze() would be.
+    'last_change' tells what the last call had to redo: 'none', 'loads' or 'stiffness', and
+    'last_solved_cases' lists the load cases that were solved again.
+
+    Keep one instance per editing session (the app keeps one in st.session_state for its live preview),
+    since the reuse is between consecutive calls on the same instance.
+    """
+
+    def __init__(self, load_combos: dict):
+        self.load_combos = load_combos
+        self.last_change = None
+        self.last_solved_cases = []
+        self._stiffness_key = None
+        self._lu = None
+        self._case_keys = {}
+        self._case_D1 = {}
+
+    def analyze(self, beam_data: dict) -> FEModel3D:
+        """
+        Returns a solved FEModel3D for 'beam_data' with 'load_combos' added, as load_beam_model would.
+        """
+        model = beams.build_beam(dict(beam_data), analyze=False)
+        for combo_name, combo_factors in self.load_combos.items():
+            model.add_load_combo(combo_name, combo_factors)
+
+        if solver_version() != PYNITE_VERSION:
+            with tracing.stage('analyze'):
+                model.analyze()
+            self._stiffness_key = None
+            self._case_keys = {}
+            self._case_D1 = {}
+            self.last_change = 'stiffness'
+            self.last_solved_cases = beams.load_case_names(beam_data)
+            return model
+
+        with tracing.stage('analyze'):
+            Analysis._prepare_model(model)
+            D1_indices, D2_indices, D2 = Analysis._partition_D(model)
+            # _prepare_model adds PyNite's default combo to a model without any, but don't rely on it
+            first_combo = next(iter(model.LoadCombos), beams.DEFAULT_COMBO)
+
+            stiffness_key = content_hash({key: beam_data[key] for key in STIFFNESS_KEYS})
+            if stiffness_key != self._stiffness_key:
+                K11, K12, K21, K22 = Analysis._partition(model, model.K(first_combo, sparse=True).tolil(), D1_indices, D2_indices)
+                self._lu = splu(K11.tocsc())
+                self._stiffness_key = stiffness_key
+                self._case_keys = {}
+                self._case_D1 = {}
+                self.last_change = 'stiffness'
+            else:
+                self.last_change = 'loads'
+
+            case_loads = {}
+            for load in beam_data["Loads"]:
+                case_loads.setdefault(load["Case"], []).append(load)
+
+            self.last_solved_cases = []
+            for case, loads in case_loads.items():
+                case_key = content_hash(loads)
+                if self._case_keys.get(case) != case_key:
+                    self._case_D1[case] = self._solve_case(model, case, D1_indices, D2_indices)
+                    self._case_keys[case] = case_key
+                    self.last_solved_cases.append(case)
+            for case in list(self._case_D1):
+                if case not in case_loads:
+                    del self._case_D1[case]
+                    del self._case_keys[case]
+                    self.last_solved_cases.append(case)
+
+            if self.last_change == 'loads' and not self.last_solved_cases:
+                self.last_change = 'none'
+
+            n_free = len(D1_indices)
+            for combo in model.LoadCombos.values():
+                D1 = np.zeros((n_free, 1))
+                for case, factor in combo.factors.items():
+                    if case in self._case_D1:
+                        D1 += factor * self._case_D1[case]
+                Analysis._store_displacements(model, D1, D2, D1_indices, D2_indices, combo)
+
+            Analysis._calc_reactions(model)
+            model.solution = 'Linear'
+
+        return model
+
+    def _solve_case(self, model: FEModel3D, case: str, D1_indices: list, D2_indices: list) -> np.ndarray:
+        """
+        Returns the free displacements of the load case 'case' alone, using the factorized stiffness.
+        """
+        unit_combo = f'__case {case}'
+        model.LoadCombos[unit_combo] = LoadCombo(unit_combo, factors={case: 1.0})
+        try:
+            FER1, FER2 = Analysis._partition(model, model.FER(unit_combo), D1_indices, D2_indices)
+            P1, P2 = Analysis._partition(model, model.P(unit_combo), D1_indices, D2_indices)
+        finally:
+            del model.LoadCombos[unit_combo]
+        return self._lu.solve(np.asarray(P1 - FER1, dtype=float).ravel()).reshape(-1, 1)
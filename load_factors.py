@@ -1,3 +1,6 @@
+import numpy as np
+
+
 LOAD_COMB_EC = {
     "LC1": {"D_fact": 1.35},
     "LC2a": {"D_fact": 1.35, "Cs_fact": 1.5},
@@ -19,6 +22,93 @@ def ec_eurocode_combs():
     }
     return LOAD_COMB_EC2
 
+# Combination factors (psi_0, psi_1, psi_2) of the variable load cases, EN 1990 Table A1.1.
+PSI_FACTORS = {
+    "L": (0.7, 0.5, 0.3),   # imposed loads, categories A/B
+    "S": (0.7, 0.5, 0.2),   # snow above 1000 m, as in the 1.05 = 1.5 x 0.7 of LC3a and LC4a
+    "Wp": (0.6, 0.2, 0.0),  # wind
+    "Ws": (0.6, 0.2, 0.0),
+    "Cs": (0.7, 0.5, 0.3),  # taken as imposed loads
+    "Cw": (0.7, 0.5, 0.3),
+}
+
+# Span/deflection limits (L/delta must be at least this) for each SLS combo family.
+DEFLECTION_LIMITS = {
+    "characteristic": 300,
+    "frequent": 300,
+    "quasi-permanent": 250,
+}
+
+
+def ec_sls_combs():
+    """
+    Returns the serviceability combos that go with ec_eurocode_combs, keyed by combo family:
+    characteristic (leading load x 1.0, others x psi_0), frequent (leading load x psi_1, others x psi_2)
+    and quasi-permanent (all variable loads x psi_2).
+    """
+    SLS_COMBS = {
+        "characteristic": {
+            "SLS-C1": {"D":1.0},
+            "SLS-C2a": {"D":1.0,"Cs":1.0},
+            "SLS-C2b": {"D":1.0,"Cw":1.0},
+            "SLS-C3a": {"D":1.0,"Wp":1.0,"S":0.7},
+            "SLS-C3b": {"D":1.0,"Ws":1.0},
+            "SLS-C4a": {"D":1.0,"L":1.0,"S":0.7},
+        },
+        "frequent": {
+            "SLS-F2a": {"D":1.0,"Cs":0.5},
+            "SLS-F2b": {"D":1.0,"Cw":0.5},
+            "SLS-F3a": {"D":1.0,"Wp":0.2,"S":0.2},
+            "SLS-F3b": {"D":1.0,"Ws":0.2},
+            "SLS-F4a": {"D":1.0,"L":0.5,"S":0.2},
+        },
+        "quasi-permanent": {
+            "SLS-QPa": {"D":1.0,"L":0.3,"S":0.2,"Cs":0.3},
+            "SLS-QPb": {"D":1.0,"L":0.3,"S":0.2,"Cw":0.3},
+        },
+    }
+    return SLS_COMBS
+
+
+
+def ec_combo_library() -> dict[str, dict]:
+    """
+    Returns every combo family, ULS and SLS, keyed by family name:
+    {"ULS": ec_eurocode_combs(), "characteristic": {...}, "frequent": {...}, "quasi-permanent": {...}}
+    """
+    return {"ULS": ec_eurocode_combs(), **ec_sls_combs()}
+
+
+
+def flatten_combos(combo_library: dict[str, dict]) -> dict[str, dict]:
+    """
+    Returns the combos of all of the families in 'combo_library' as one dict of {combo_name: factors}.
+    """
+    load_combos = {}
+    for family_combos in combo_library.values():
+        load_combos.update(family_combos)
+    return load_combos
+
+
+
+def combo_factor_matrix(load_combos: dict, case_names: list[str]) -> np.ndarray:
+    """
+    Returns the (n_combos, n_cases)-shaped array of the factor of each load case in each load combo,
+    so that combo results are the matrix product of it with the unit load case results.
+    Cases that a combo doesn't mention get a factor of 0. The factors are used as they are: they already
+    include the combination factors (PSI_FACTORS), so the 'psi0' of a load case in a beam file is not applied.
+
+    e.g. combo_factor_matrix({"LC1": {"D": 1.35}, "LC4a": {"D": 1.35, "L": 1.5}}, ["D", "L"])
+        -> [[1.35, 0.  ],
+            [1.35, 1.5 ]]
+    """
+    return np.array(
+        [[factors.get(case_name, 0.0) for case_name in case_names] for factors in load_combos.values()],
+        dtype=float,
+    ).reshape(len(load_combos), len(case_names))
+
+
+
 def factor_load(D: float=0, D_fact: float=0, 
                 Cs: float=0, Cs_fact: float = 0, 
                 Cw: float=0, Cw_fact: float= 0, 
@@ -68,9 +158,7 @@ def min_factored_load(loads: dict, load_combs:dict) -> float:
     min_factored_load = min(factored_loads.values())
     #max_factored_load = factored_loads[the_worst_case]
     #print(max_factored_load)
-    print(f"The load combination which leads to the minimum factored load is {the_best_case} and the minimum factored load is {min_factored_load}")
-    full_LC_name= load_combs[the_best_case]
-    print(f"The related load combination is {the_best_case}={full_LC_name}")
+    return min_factored_load
 
 
 
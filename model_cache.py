@@ -0,0 +1,164 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+
+from singleflight import SingleFlight
+
+
+def estimate_bytes(obj, _seen: Optional[set] = None) -> int:
+    """
+    Returns the approximate memory held by 'obj' in bytes: NumPy arrays count their data buffer,
+    containers and objects (e.g. a solved FEModel3D) count themselves plus everything they reference.
+    Objects reachable more than once are only counted once.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        # getsizeof counts the data buffer of an array that owns it, and only the header of a view
+        # (e.g. a row of a result tensor), which shares its base's buffer.
+        return sys.getsizeof(obj)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, dict):
+        size += sum(estimate_bytes(key, _seen) + estimate_bytes(value, _seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_bytes(item, _seen) for item in obj)
+    if hasattr(obj, '__dict__'):
+        size += estimate_bytes(vars(obj), _seen)
+    return size
+
+
+
+def freeze(obj):
+    """
+    Marks every NumPy array in 'obj' (and in the dicts, lists and tuples it contains) read-only, so that
+    a value shared between sessions can't be changed in place by one of them. Returns 'obj'.
+    """
+    if isinstance(obj, np.ndarray):
+        obj.flags.writeable = False
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            freeze(value)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            freeze(item)
+    return obj
+
+
+
+class ModelCache:
+    """
+    A process-wide, in-memory LRU cache of solved models and result tensors, bounded by an approximate
+    byte budget instead of a number of entries.
+
+    One instance is shared by every Streamlit session of the process (SHARED_CACHE below), so that
+    engineers opening the same beams share one copy of the results. The size of each entry is estimated
+    once when it is stored (see estimate_bytes). When the total goes over 'max_bytes', the least recently
+    used entries are evicted. An entry larger than the whole budget is returned but not kept.
+
+    Values are shared, not copied: the NumPy arrays in them are made read-only when they are stored.
+    Safe to use from Streamlit's script runner threads. Concurrent misses on the same key are computed
+    once (see singleflight.SingleFlight).
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024**2):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._flights = SingleFlight()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, default=None):
+        """
+        Returns the value cached for 'key' (and marks it as the most recently used), or 'default'.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value, size: Optional[int] = None):
+        """
+        Stores 'value' under 'key', evicting least recently used entries to stay within 'max_bytes',
+        and returns it. 'size' is the size of the value in bytes, estimated if not given.
+        """
+        if size is None:
+            size = estimate_bytes(value)
+        freeze(value)
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def get_or_compute(self, key: str, func: Callable, *args, **kwargs):
+        """
+        Returns the value cached for 'key', or computes it with func(*args, **kwargs), caches it and
+        returns it. Sessions that miss the same key at the same time share one computation.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        return self._flights.do(key, self._compute, key, func, *args, **kwargs)
+
+    def _compute(self, key: str, func: Callable, *args, **kwargs):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            # Another session stored it between our miss and the start of this flight.
+            return entry[0]
+        return self.put(key, func(*args, **kwargs))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Returns {'entries', 'bytes', 'max_bytes', 'hits', 'misses', 'hit_rate', 'evictions'}.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+            }
+
+
+_MISSING = object()
+
+# The cache shared by every session of the process. Its budget can be set with the environment
+# variable BEAM_CACHE_MAX_BYTES (e.g. for a box serving many engineers).
+SHARED_CACHE = ModelCache(int(os.environ.get('BEAM_CACHE_MAX_BYTES', 512 * 1024**2)))
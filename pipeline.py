@@ -0,0 +1,112 @@
+"""
+A pure-function entry point to the beam pipeline, safe to call from many threads at once.
+
+    results = pipeline.analyze(beam_text)                    # or structured beam data
+    all_results = pipeline.analyze_many(beam_texts, max_workers=8)
+    compact_results = pipeline.analyze_many(beam_texts, compact=True)    # float32 CompactResults
+
+Every call builds its own model from its arguments and returns new arrays: the inputs (beam text or
+structured beam data, load combos) are never modified, and no module-level state is read or written
+apart from the read-only defaults below. Calls are therefore reentrant and can run side by side in a
+ThreadPoolExecutor or under an async server (through loop.run_in_executor). How much they actually
+overlap depends on how much of the solve runs in NumPy/SciPy code that releases the GIL; for
+CPU-bound batches, a process pool (as in service.py) still scales further.
+
+benchmarks/concurrency_stress.py checks that concurrent calls return the same results as serial ones
+and leave their inputs unchanged.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+import beams
+from compact_results import CompactResults
+import load_factors as lf
+import sensitivity
+from utils import read_csv_text
+
+
+DEFAULT_RESULTS = MappingProxyType({
+    'moment': 'Mz',
+    'shear': 'Fy',
+    'deflection': 'dy',
+})
+
+
+def analyze(
+    beam: str | Mapping,
+    load_combos: Optional[Mapping] = None,
+    result_types: Optional[Mapping] = None,
+    n_points: int = 200,
+    sensitivities: Optional[list[str]] = None,
+    store=None,
+    compact: bool = False,
+) -> dict | CompactResults:
+
+    """
+    Returns the results of 'beam' for 'load_combos' in the format of beams.superpose_results:
+    {result_type: (x_locs, combo_names, results), ..., 'reactions': {...}}
+
+    'beam': the text of a beam file, or structured beam data (see beams.get_structured_beam_data)
+    'load_combos': {combo_name: {load_case: factor}}, defaults to load_factors.ec_eurocode_combs()
+    'result_types': {result_type: direction}, defaults to DEFAULT_RESULTS
+    'n_points': the number of values in each result array
+    'sensitivities': parameters ('E', 'Iz', 'A' or support locations, see sensitivity.py) whose analytic
+        derivatives of every result are also returned, as {'sensitivities': {parameter: results}}
+    'store': an optional result_store.ResultStore of unit load case results, looked up by the beam data before
+        anything is built (see beams.solve_unit_cases). Its results are read-only memory-mapped arrays.
+    'compact': if True, the results are returned as a compact_results.CompactResults (float32, with the
+        reactions kept as they are) instead of the dict, for batches that keep many beams in memory.
+        It can't be combined with 'sensitivities'.
+
+    The unit load cases are solved once and the combos are derived from them by superposition.
+    None of the arguments is modified.
+    """
+
+    if compact and sensitivities:
+        raise ValueError("Compact results don't hold sensitivities, ask for one or the other")
+    if load_combos is None:
+        load_combos = lf.ec_eurocode_combs()
+    if result_types is None:
+        result_types = DEFAULT_RESULTS
+
+    if isinstance(beam, str):
+        beam_data = beams.get_structured_beam_data(read_csv_text(beam))
+    else:
+        beam_data = beam
+    unit_results = beams.solve_unit_cases(beam_data, dict(result_types), n_points, store)
+    results = beams.superpose_results(unit_results, load_combos)
+    if sensitivities:
+        unit_sensitivities = sensitivity.solve_unit_case_sensitivities(beam_data, dict(result_types), list(sensitivities), n_points)
+        results['sensitivities'] = {
+            parameter: beams.superpose_results(unit_derivatives, load_combos)
+            for parameter, unit_derivatives in unit_sensitivities.items()
+        }
+    if compact:
+        return CompactResults.from_tensors(results)
+    return results
+
+
+
+def analyze_many(
+    beam_list: list[str | Mapping],
+    load_combos: Optional[Mapping] = None,
+    result_types: Optional[Mapping] = None,
+    n_points: int = 200,
+    max_workers: Optional[int] = None,
+    sensitivities: Optional[list[str]] = None,
+    store=None,
+    compact: bool = False,
+) -> list[dict | CompactResults]:
+
+    """
+    Returns analyze(beam, ...) for every beam in 'beam_list', in the same order, computed in a thread
+    pool of 'max_workers' threads. The first exception raised by a beam is raised here. With a 'store'
+    (shared by the threads), the beams it already holds are neither built nor solved. With 'compact',
+    every beam's results are a compact_results.CompactResults, which holds a large batch in half the
+    memory of the float64 tensors (see benchmarks/result_memory.py).
+    """
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(analyze, beam, load_combos, result_types, n_points, sensitivities, store, compact) for beam in beam_list]
+        return [future.result() for future in futures]
@@ -10,8 +10,183 @@ from matplotlib.figure import Figure
 from matplotlib.ticker import MaxNLocator, ScalarFormatter
 import numpy as np
 import matplotlib.pyplot as plt
+import tracing
+import units as u
 
 
+DIAGRAM_LABELS = {
+    'moment': ("Moment Diagram", "Resulting Moment, N.mm"),
+    'shear': ("Shear Diagram", "Shear Value, N"),
+    'axial': ("Axial Diagram", "Axial Value, N"),
+    'torque': ("Torque Diagram", "Torque Value, N.mm"),
+    'deflection': ("Deflection Diagram", "Deflection, mm"),
+}
+
+
+def diagram_y_label(result_type: str, unit: str) -> str:
+    """
+    Returns the y-axis label of the 'result_type' diagram with the values in 'unit'.
+
+    e.g. diagram_y_label('moment', 'kN.m') -> "Resulting Moment, kN.m"
+    """
+    return f"{DIAGRAM_LABELS[result_type][1].rsplit(', ', 1)[0]}, {unit}"
+
+
+
+def minmax_indices(results: np.ndarray, max_points: int) -> np.ndarray:
+
+    """
+    Returns the sorted indices of the stations to keep so that about 'max_points' stations are plotted
+    while the peaks of every row of 'results' are preserved (min-max bucketing).
+
+    'results': (n_points,)-shaped or (n_rows, n_points)-shaped array of results that share one x-array
+    'max_points': the approximate number of stations to keep
+
+    The stations are split into equal buckets and the stations holding the minimum and the maximum of
+    each row in each bucket are kept, together with the first and last station. The exact extremes of
+    every row therefore survive the downsampling.
+
+    # Example
+    minmax_indices(np.array([0, 5, 1, 2, -4, 3, 0, 0]), 6) -> array([0, 1, 4, 5, 7])
+    """
+
+    results = np.atleast_2d(results)
+    n_rows, n_points = results.shape
+    n_buckets = max(1, (max_points - 2) // (2 * n_rows))
+    if n_points <= max_points or n_points <= 2 * n_buckets:
+        return np.arange(n_points)
+
+    bucket_size = -(-n_points // n_buckets)
+    padded = np.pad(results, ((0, 0), (0, n_buckets * bucket_size - n_points)), mode='edge')
+    buckets = padded.reshape(n_rows, n_buckets, bucket_size)
+    offsets = np.arange(n_buckets) * bucket_size
+
+    keep = np.concatenate(
+        [
+            (buckets.argmax(axis=2) + offsets).ravel(),
+            (buckets.argmin(axis=2) + offsets).ravel(),
+            [0, n_points - 1],
+        ]
+    )
+    return np.unique(np.minimum(keep, n_points - 1))
+
+
+
+@tracing.traced('plot')
+def plotly_diagram(
+    x_locs: np.ndarray,
+    results: np.ndarray,
+    result_type: str,
+    combo_names: Optional[list[str]] = None,
+    load_combo: Optional[str] = None,
+    scale: float = 1.0,
+    y_label: Optional[str] = None,
+    max_points: Optional[int] = 600,
+    units: Optional[str] = None,
+) -> go.Figure:
+
+    """
+    Returns a compact plotly figure of the results in the batched result tensor returned by
+    beams.extract_result_tensor.
+
+    'x_locs': (n_points,)-shaped array of beam locations
+    'results': (n_combos, n_points)-shaped array of results, or a single (n_points,)-shaped result array
+    'result_type': str, one of {"shear", "moment", "torque", "axial", "deflection"}
+    'combo_names': the load combo names of the rows in 'results'
+    'load_combo': if not None, only this load combo is plotted. If None, the envelope of all rows is plotted.
+    'scale': factor applied to the results before plotting (e.g. for a change of units)
+    'y_label': overrides the default y-axis label of the 'result_type'
+    'max_points': if not None, the results are downsampled with minmax_indices to about this many stations
+    'units': if not None, the unit to plot the results in (e.g. 'kN.m', see units.UNIT_SIZES). It sets
+        'scale' and the unit of the default y-axis label.
+
+    The figure is kept small so that less JSON is sent to the browser: the values are sent as float32
+    typed arrays, the positive/negative split is computed once, the x-locations are sent as x0/dx when
+    they are evenly spaced and the beam axis is drawn with the y-axis zero line instead of its own trace.
+    """
+
+    if units is not None:
+        scale = u.result_scale(result_type, units)
+
+    results = np.asarray(results, dtype=float)
+    if load_combo is not None:
+        results = results[combo_names.index(load_combo)]
+
+    if results.ndim == 1:
+        max_results = min_results = results
+    else:
+        max_results = results.max(axis=0)
+        min_results = results.min(axis=0)
+
+    x_locs = np.asarray(x_locs, dtype=float)
+    if max_points is not None:
+        keep = minmax_indices(np.vstack([max_results, min_results]), max_points)
+        x_locs, max_results, min_results = x_locs[keep], max_results[keep], min_results[keep]
+
+    positive = np.where(max_results > 0, max_results, 0) * scale
+    negative = np.where(min_results < 0, min_results, 0) * scale
+
+    steps = np.diff(x_locs)
+    if len(steps) and np.allclose(steps, steps[0]):
+        x_kwargs = {'x0': x_locs[0], 'dx': steps[0]}
+    else:
+        x_kwargs = {'x': x_locs.astype(np.float32)}
+
+    title, default_y_label = DIAGRAM_LABELS[result_type]
+    if units is not None:
+        default_y_label = diagram_y_label(result_type, units)
+    name = title.split()[0]
+
+    fig = go.Figure()
+
+    fig.add_trace(
+        go.Scatter(
+            y=positive.astype(np.float32),
+            fill='tozeroy',
+            fillcolor='rgba(0, 0, 255, 0.3)',
+            line=dict(color='blue'),
+            name=f"Positive {name}",
+            **x_kwargs,
+        )
+    )
+
+    fig.add_trace(
+        go.Scatter(
+            y=negative.astype(np.float32),
+            fill='tozeroy',
+            fillcolor='rgba(255, 0, 0, 0.3)',
+            line=dict(color='red'),
+            name=f"Negative {name}",
+            **x_kwargs,
+        )
+    )
+
+    fig.update_layout(
+        title=title,
+        plot_bgcolor='white',
+        xaxis=dict(
+            title="Beam Length, mm",
+            showgrid=True,
+            gridcolor='lightgray',
+            gridwidth=1,
+            tickmode='auto',
+            nticks=20,
+        ),
+        yaxis=dict(
+            title=y_label or default_y_label,
+            showgrid=True,
+            gridcolor='lightgray',
+            gridwidth=1,
+            zeroline=True,
+            zerolinecolor='green',
+            zerolinewidth=2,
+        ),
+    )
+
+    return fig
+
+
+@tracing.traced('plot')
 def plot_results(
     beam_model: FEModel3D,
     result_type: str,
@@ -21,6 +196,7 @@ def plot_results(
     figsize=(8, 3),
     dpi=150,
     n_points=1000,
+    max_points: Optional[int] = 800,
 ) -> Figure:
 
     """
@@ -28,9 +204,10 @@ def plot_results(
     result_type: str, one of {"shear", "moment", "torque", "axial", "deflection"}
     direction: str, one of {"Fy", "Fx", "Fz"} (applicable to shear), {"Mx", "My", "Mz"} (applicable to moment), or
         {"dx", "dy", "dz"} (applicable to deflection)
-    units: not implemented yet!!!
+    units: the unit to plot the results in (e.g. 'kN.m', see units.UNIT_SIZES). If None, the model units are used.
     load_combo: if not None, then the provided load combo will be plotted within the envelope, if present in the model.
     if none, the envelope results will be provided.
+    max_points: if not None, the plotted results are downsampled with minmax_indices to about this many points.
     """
 
     fig = Figure(figsize=figsize, dpi=dpi)
@@ -42,125 +219,142 @@ def plot_results(
         direction,
         n_points
     )
-    
-    x_locs = list(result_arrays.values())[0][0]
+
+    scale = 1.0 if units is None else u.result_scale(result_type, units)
+    draw_results(ax, result_arrays, result_type, load_combo, max_points, scale)
+
+    ax.set_title(DIAGRAM_LABELS[result_type][0], fontsize = 12)
+    ax.set_xlabel('Beam Length, mm', fontsize = 8)
+    ax.set_ylabel(DIAGRAM_LABELS[result_type][1] if units is None else diagram_y_label(result_type, units), fontsize = 8)
+
+    ax.tick_params(axis = 'x', labelsize = 8, rotation = -90)
+    ax.get_xaxis().get_offset_text().set_size(8)
+    ax.xaxis.set_major_locator(MaxNLocator(nbins=20))
+
+    return fig
+
+
+
+def draw_results(
+    ax,
+    result_arrays: dict,
+    result_type: str,
+    load_combo: Optional[str] = None,
+    max_points: Optional[int] = 800,
+    scale: float = 1.0,
+) -> None:
+
+    """
+    Draws the results in 'result_arrays' (as returned by beams.extract_arrays_all_combos) on the matplotlib
+    axes 'ax'. If 'load_combo' is None, the envelope of all the load combos is drawn, otherwise only 'load_combo'.
+    The drawn results are multiplied by 'scale' (e.g. units.result_scale for a change of units).
+
+    The positive/negative fill masks are computed once for each drawn series and shared by the fills.
+    """
+
+    x_locs = np.array(list(result_arrays.values())[0][0])
 
     if load_combo is None:
-        max_result_env = beams.envelope_max(result_arrays)[1]   #ENVELOPE PART
-        min_result_env = beams.envelope_min(result_arrays)[1]
-
-        max_result_env_array = np.array(max_result_env)
-        min_result_env_array = np.array(min_result_env)
-        
-        ax.plot(x_locs, [0] * len(x_locs), color = 'green')
-        ax.plot(x_locs, max_result_env_array, color = 'blue')
-        ax.plot(x_locs, min_result_env_array, color = 'red')
-
-        ax.fill_between(x_locs, 0, max_result_env, where=(max_result_env_array >= 0), color='blue', alpha=0.3)
-        ax.fill_between(x_locs, 0, min_result_env, where=(min_result_env_array < 0), color='red', alpha=0.3)
-
-        if result_type == 'moment':
-            ax.set_title("Moment Diagram", fontsize = 12)    
-            ax.set_xlabel('Beam Length, mm', fontsize = 8)
-            ax.set_ylabel('Resulting Moment, N.mm', fontsize = 8)
-
-        elif result_type == 'shear':
-            ax.set_title("Shear Diagram", fontsize = 12)
-            ax.set_xlabel('Beam Length, mm', fontsize = 8)
-            ax.set_ylabel('Shear Value, N', fontsize = 8)
-
-        elif result_type == 'axial':
-            ax.set_title("Axial Diagram", fontsize = 12)
-            ax.set_xlabel('Beam Length, mm', fontsize = 8)
-            ax.set_ylabel('Axial Value, N', fontsize = 8)
-
-        elif result_type == 'torque':
-            ax.set_title("Torque Diagram", fontsize = 12)
-            ax.set_xlabel('Beam Length, mm', fontsize = 8)
-            ax.set_ylabel('Torque Value, N.mm', fontsize = 8)
-
-        elif result_type == 'deflection':
-            ax.set_title("Deflection Diagram", fontsize = 12)
-            ax.set_xlabel('Beam Length, mm', fontsize = 8)
-            ax.set_ylabel('Deflection, mm', fontsize = 8)
-    
-    
+        max_results = np.array(lf.envelope_max(result_arrays)[1])   #ENVELOPE PART
+        min_results = np.array(lf.envelope_min(result_arrays)[1])
     else:
         # Extract the demanded load combo array.
-        selected_results = result_arrays[load_combo]
-
-        # Extract the results.
-        results = selected_results[1]
-        
-        # Draw the plots.
-        ax.plot(x_locs, [0] * len(x_locs), color = 'green')
-        ax.plot(x_locs, results, color = 'orange')
-        
-        if result_type == 'moment':
-            ax.fill_between(x_locs, 0, results, where=(results >= 0), color='blue', alpha=0.5)
-            ax.fill_between(x_locs, 0, results, where=(results < 0), color='red', alpha=0.5)
-            
-            ax.set_title("Moment Diagram", fontsize = 12)
-            
-            ax.set_xlabel('Beam Length, mm', fontsize = 8)
-            ax.set_ylabel('Resulting Moment, N.mm', fontsize = 8)
-
-        elif result_type == 'shear':
-            ax.fill_between(x_locs, 0, results, where=(results >= 0), color='blue', alpha=0.5)
-            ax.fill_between(x_locs, 0, results, where=(results < 0), color='red', alpha=0.5)
-            
-            ax.set_title("Shear Diagram", fontsize = 12)
-            
-            ax.set_xlabel('Beam Length, mm', fontsize = 8)
-            ax.set_ylabel('Shear Value, N', fontsize = 8)
-
-        elif result_type == 'axial':
-            ax.fill_between(x_locs, 0, results, where=(results >= 0), color='blue', alpha=0.5)
-            ax.fill_between(x_locs, 0, results, where=(results < 0), color='red', alpha=0.5)
-            
-            ax.set_title("Axial Diagram", fontsize = 12)
-            
-            ax.set_xlabel('Beam Length, mm', fontsize = 8)
-            ax.set_ylabel('Axial Value, N', fontsize = 8)
-
-        elif result_type == 'torque':
-            ax.fill_between(x_locs, 0, results, where=(results >= 0), color='blue', alpha=0.5)
-            ax.fill_between(x_locs, 0, results, where=(results < 0), color='red', alpha=0.5)
-            
-            ax.set_title("Torque Diagram", fontsize = 12)
-            
-            ax.set_xlabel('Beam Length, mm', fontsize = 8)
-            ax.set_ylabel('Torque Value, N.mm', fontsize = 8)
-
-        elif result_type == 'deflection':
-            ax.fill_between(x_locs, 0, results, where=(results >= 0), color='blue', alpha=0.5)
-            ax.fill_between(x_locs, 0, results, where=(results < 0), color='red', alpha=0.5)
-            
-            ax.set_title("Deflection Diagram", fontsize = 12)
-            
-            ax.set_xlabel('Beam Length, mm', fontsize = 8)
-            ax.set_ylabel('Deflection, mm', fontsize = 8)
-
-            max_result = max(results)
-            max_loc_idx = list(results).index(max_result)
-            max_loc = x_locs[max_loc_idx]
-
-            #text = f' The maximum deflection occurred at {max_loc} with the value of {max_result}.'
+        max_results = min_results = np.array(result_arrays[load_combo][1])
 
+    if max_points is not None:
+        keep = minmax_indices(np.vstack([max_results, min_results]), max_points)
+        x_locs, max_results, min_results = x_locs[keep], max_results[keep], min_results[keep]
+
+    if scale != 1.0:
+        max_results = max_results * scale
+        min_results = min_results * scale
+
+    positive_mask = max_results >= 0
+    negative_mask = min_results < 0
+
+    ax.plot([x_locs[0], x_locs[-1]], [0, 0], color = 'green')
+
+    if load_combo is None:
+        ax.plot(x_locs, max_results, color = 'blue')
+        ax.plot(x_locs, min_results, color = 'red')
+        alpha = 0.3
+    else:
+        ax.plot(x_locs, max_results, color = 'orange')
+        alpha = 0.5
+
+    ax.fill_between(x_locs, 0, max_results, where=positive_mask, color='blue', alpha=alpha)
+    ax.fill_between(x_locs, 0, min_results, where=negative_mask, color='red', alpha=alpha)
 
-    ax.tick_params(axis = 'x', labelsize = 8, rotation = -90)
     ax.tick_params(axis = 'y', labelsize = 8)
-    
-    ax.get_xaxis().get_offset_text().set_size(8)
-    
-    ax.xaxis.set_major_locator(MaxNLocator(nbins=20))
     ax.yaxis.set_major_locator(MaxNLocator(nbins=10))
-    
     ax.grid(True, color = 'gray', linestyle = ':', linewidth=0.5, alpha=0.7)
 
-       
 
-    # display(fig)
-    # print(text)
 
-    return fig
\ No newline at end of file
+DASHBOARD_RESULTS = {
+    'moment': 'Mz',
+    'shear': 'Fy',
+    'deflection': 'dy',
+    'axial': None,
+    'torque': None,
+}
+
+
+@tracing.traced('plot')
+def plot_dashboard(
+    beam_model: FEModel3D,
+    result_types: Optional[dict[str, Optional[str]]] = None,
+    load_combo: Optional[str] = None,
+    fig: Optional[Figure] = None,
+    figsize=(8, 12),
+    dpi=150,
+    n_points=1000,
+    max_points: Optional[int] = 800,
+    units: Optional[dict[str, str]] = None,
+) -> Figure:
+
+    """
+    Returns a matplotlib figure with one panel per result type, all sharing the beam length x-axis.
+
+    'beam_model': the beam model to plot. It is analyzed once at most, and only if it is not solved yet.
+    'result_types': dict of {result_type: direction} to plot, in panel order. Defaults to DASHBOARD_RESULTS
+        (moment, shear, deflection, axial and torque).
+    'load_combo': if not None, only this load combo is plotted in each panel. If None, the envelopes are plotted.
+    'fig': if not None, this figure (from a previous call with the same 'result_types') is cleared and
+        redrawn instead of creating a new Figure and Axes layout. Useful when rendering many beams in a row.
+    'max_points': if not None, the plotted results are downsampled with minmax_indices to about this many points.
+    'units': dict of {result_type: unit} to plot the results in (e.g. {'moment': 'kN.m'}). Result types that
+        are not in it are plotted in model units.
+    """
+
+    if result_types is None:
+        result_types = DASHBOARD_RESULTS
+    if units is None:
+        units = {}
+
+    if fig is None:
+        fig = Figure(figsize=figsize, dpi=dpi)
+        fig.subplots(len(result_types), 1, sharex=True)
+    axes = fig.axes
+
+    if beam_model.solution is None:
+        with tracing.stage('analyze'):
+            beam_model.analyze()
+
+    for ax, (result_type, direction) in zip(axes, result_types.items()):
+        ax.cla()
+        result_arrays = beams.extract_arrays_all_combos(beam_model, result_type, direction, n_points)
+        if result_type in units:
+            scale, y_label = u.result_scale(result_type, units[result_type]), diagram_y_label(result_type, units[result_type])
+        else:
+            scale, y_label = 1.0, DIAGRAM_LABELS[result_type][1]
+        draw_results(ax, result_arrays, result_type, load_combo, max_points, scale)
+        ax.set_title(DIAGRAM_LABELS[result_type][0], fontsize = 10)
+        ax.set_ylabel(y_label, fontsize = 8)
+
+    axes[-1].set_xlabel('Beam Length, mm', fontsize = 8)
+    axes[-1].tick_params(axis = 'x', labelsize = 8, rotation = -90)
+    axes[-1].xaxis.set_major_locator(MaxNLocator(nbins=20))
+    fig.tight_layout()
+
+    return fig
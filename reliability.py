@@ -0,0 +1,303 @@
+"""
+Monte Carlo reliability runs over thousands of realizations of a beam, from one analysis.
+
+    results = reliability.monte_carlo(beam_text, n_samples=100_000, section={'S': 1.2e6, 'Fy': 350})
+    results['moment']['quantiles'][0.95]       # 95% quantile of the moment at every station
+    results['failure']['probability']          # P(max |M| > S * Fy)
+
+The magnitudes of the load cases (D, L, S, ...) and the stiffness of the beam (E, Iz) are random
+variables. The analysis is linear, so a realization does not need its own model: its results are
+the unit load case results (beams.solve_unit_cases) summed with its sampled load factors, which for
+all of the realizations at once is one matrix product. Scaling E or Iz along the whole beam does not
+change the forces and moments of the beam, only its deflections, which scale with 1 / (E Iz).
+
+The random variables are described by models of {'distribution', 'mean', 'cov'}, with the mean as a
+multiple of the nominal value in the beam file (or in the section) and 'cov' the coefficient of
+variation. The distributions are those of DISTRIBUTIONS. The default models are of the order of the
+values of the JCSS Probabilistic Model Code and are meant as a starting point, not as a calibration.
+
+Realizations that do change the analysis (e.g. random support or load locations, or a span length)
+are solved with solve_realizations, in a process pool as in service.py, and their unit results are
+then sampled with sample_responses in the same way.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+from scipy.special import ndtri
+
+import beams
+from design_checks import bending_resistance
+from utils import read_csv_text
+
+
+RELIABILITY_RESULTS = {
+    'moment': 'Mz',
+    'shear': 'Fy',
+    'deflection': 'dy',
+}
+
+# The result types that scale with 1 / (E Iz) (the others don't depend on the stiffness).
+STIFFNESS_RESULTS = ('deflection',)
+
+DEFAULT_LOAD_MODELS = {
+    "D": {'distribution': 'normal', 'mean': 1.0, 'cov': 0.10},
+    "L": {'distribution': 'gumbel', 'mean': 0.6, 'cov': 0.35},
+    "S": {'distribution': 'gumbel', 'mean': 0.7, 'cov': 0.30},
+    "Wp": {'distribution': 'gumbel', 'mean': 0.7, 'cov': 0.35},
+    "Ws": {'distribution': 'gumbel', 'mean': 0.7, 'cov': 0.35},
+    "Cs": {'distribution': 'gumbel', 'mean': 0.6, 'cov': 0.35},
+    "Cw": {'distribution': 'gumbel', 'mean': 0.6, 'cov': 0.35},
+}
+
+DEFAULT_STIFFNESS_MODELS = {
+    "E": {'distribution': 'lognormal', 'mean': 1.0, 'cov': 0.05},
+    "Iz": {'distribution': 'lognormal', 'mean': 1.0, 'cov': 0.03},
+}
+
+DEFAULT_STRENGTH_MODEL = {'distribution': 'lognormal', 'mean': 1.1, 'cov': 0.07}
+
+EULER_GAMMA = 0.5772156649015329
+
+
+def sample_normal(rng: np.random.Generator, mean: float, cov: float, n_samples: int) -> np.ndarray:
+    return rng.normal(mean, cov * mean, n_samples)
+
+
+def sample_lognormal(rng: np.random.Generator, mean: float, cov: float, n_samples: int) -> np.ndarray:
+    sigma = np.sqrt(np.log1p(cov**2))
+    return rng.lognormal(np.log(mean) - sigma**2 / 2, sigma, n_samples)
+
+
+def sample_gumbel(rng: np.random.Generator, mean: float, cov: float, n_samples: int) -> np.ndarray:
+    # The maximum distribution of a variable load, with the scale and location of the given mean and cov
+    scale = np.sqrt(6) * cov * mean / np.pi
+    return rng.gumbel(mean - EULER_GAMMA * scale, scale, n_samples)
+
+
+def sample_fixed(rng: np.random.Generator, mean: float, cov: float, n_samples: int) -> np.ndarray:
+    return np.full(n_samples, float(mean))
+
+
+# distribution: sample(rng, mean, cov, n_samples) -> (n_samples,) array
+DISTRIBUTIONS = {
+    'normal': sample_normal,
+    'lognormal': sample_lognormal,
+    'gumbel': sample_gumbel,
+    'fixed': sample_fixed,
+}
+
+
+def sample(rng: np.random.Generator, model: dict, n_samples: int) -> np.ndarray:
+    """
+    Returns 'n_samples' values of the random variable of 'model', {'distribution', 'mean', 'cov'}
+    (see DISTRIBUTIONS).
+
+    e.g. sample(np.random.default_rng(0), {'distribution': 'normal', 'mean': 1.0, 'cov': 0.1}, 3)
+        -> array([1.01257302, 0.98678951, 1.06404227])
+    """
+    if model['distribution'] not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution '{model['distribution']}', expected one of {', '.join(DISTRIBUTIONS)}")
+    return DISTRIBUTIONS[model['distribution']](rng, model['mean'], model.get('cov', 0.0), n_samples)
+
+
+
+def sample_load_factors(
+    rng: np.random.Generator,
+    case_names: list[str],
+    n_samples: int,
+    load_models: Optional[dict] = None,
+) -> np.ndarray:
+
+    """
+    Returns the (n_samples, n_cases)-shaped array of the factors of the load cases 'case_names' in every
+    realization, sampled from 'load_models' ({case_name: model}, defaults to DEFAULT_LOAD_MODELS).
+    A load case without a model keeps its nominal magnitude (a factor of 1.0).
+    """
+
+    if load_models is None:
+        load_models = DEFAULT_LOAD_MODELS
+    factors = np.ones((n_samples, len(case_names)))
+    for idx, case_name in enumerate(case_names):
+        if case_name in load_models:
+            factors[:, idx] = sample(rng, load_models[case_name], n_samples)
+    return factors
+
+
+
+def sample_stiffness_scales(rng: np.random.Generator, n_samples: int, stiffness_models: Optional[dict] = None) -> np.ndarray:
+    """
+    Returns the (n_samples,)-shaped array of the scaling of the bending stiffness E Iz in every realization,
+    the product of the scalings of E and Iz sampled from 'stiffness_models' ({'E': model, 'Iz': model},
+    defaults to DEFAULT_STIFFNESS_MODELS). A missing model keeps its nominal value.
+    """
+    if stiffness_models is None:
+        stiffness_models = DEFAULT_STIFFNESS_MODELS
+    scales = np.ones(n_samples)
+    for parameter in ('E', 'Iz'):
+        if parameter in stiffness_models:
+            scales *= sample(rng, stiffness_models[parameter], n_samples)
+    return scales
+
+
+
+def sample_responses(
+    unit_results: dict,
+    result_type: str,
+    factors: np.ndarray,
+    stiffness_scales: Optional[np.ndarray] = None,
+) -> np.ndarray:
+
+    """
+    Returns the (n_samples, n_points)-shaped array of the 'result_type' of every realization: the unit
+    load case results of 'unit_results' (as returned by beams.solve_unit_cases) summed with the load
+    'factors' of each realization (see sample_load_factors), and for STIFFNESS_RESULTS divided by its
+    'stiffness_scales' (see sample_stiffness_scales).
+    """
+
+    _, _, case_results = unit_results[result_type]
+    responses = factors @ case_results
+    if stiffness_scales is not None and result_type in STIFFNESS_RESULTS:
+        responses /= stiffness_scales[:, None]
+    return responses
+
+
+
+def response_statistics(responses: np.ndarray, quantiles: tuple[float, ...] = (0.05, 0.5, 0.95)) -> dict:
+    """
+    Returns the statistics over the realizations (axis 0) of 'responses', as returned by sample_responses:
+    {'mean', 'std', 'min', 'max', 'quantiles': {q: values}}, each value an (n_points,)-shaped array (or
+    a float for (n_samples,)-shaped 'responses').
+    """
+    # The quantiles partition every station's values, which is faster on contiguous rows of stations.
+    quantile_values = np.quantile(np.ascontiguousarray(responses.T), quantiles, axis=-1)
+    return {
+        'mean': responses.mean(axis=0),
+        'std': responses.std(axis=0, ddof=1) if len(responses) > 1 else np.zeros_like(responses[0]),
+        'min': responses.min(axis=0),
+        'max': responses.max(axis=0),
+        'quantiles': dict(zip(quantiles, quantile_values)),
+    }
+
+
+
+def failure_probability(demands: np.ndarray, capacities: np.ndarray | float) -> dict:
+    """
+    Returns the estimated probability that the 'demands' exceed the 'capacities' (both per realization),
+    as {'probability', 'n_failures', 'n_samples', 'cov', 'reliability_index'}. 'cov' is the coefficient
+    of variation of the estimate itself, sqrt((1 - p) / (n p)), and the reliability index is -Phi^-1(p)
+    (infinite when no realization fails).
+
+    e.g. failure_probability(np.array([1.0, 2.0, 3.0, 4.0]), 3.5)
+        -> {'probability': 0.25, 'n_failures': 1, 'n_samples': 4, 'cov': 0.866..., 'reliability_index': 0.674...}
+    """
+    failures = np.asarray(demands) > capacities
+    n_samples, n_failures = failures.size, int(failures.sum())
+    probability = n_failures / n_samples
+    return {
+        'probability': probability,
+        'n_failures': n_failures,
+        'n_samples': n_samples,
+        'cov': float(np.sqrt((1 - probability) / (n_samples * probability))) if n_failures else np.inf,
+        'reliability_index': float(-ndtri(probability)),
+    }
+
+
+
+def monte_carlo(
+    beam: str | dict,
+    n_samples: int = 10000,
+    seed: Optional[int] = None,
+    load_models: Optional[dict] = None,
+    stiffness_models: Optional[dict] = None,
+    section: Optional[dict] = None,
+    strength_model: Optional[dict] = None,
+    result_types: Optional[dict] = None,
+    n_points: int = 200,
+    quantiles: tuple[float, ...] = (0.05, 0.5, 0.95),
+) -> dict:
+
+    """
+    Returns the statistics of 'n_samples' random realizations of 'beam' (the text of a beam file, or
+    structured beam data), from one analysis of its unit load cases:
+
+    {
+        'n_samples': n_samples,
+        'x': x_locs,
+        result_type: response_statistics of the result type at every station, plus 'abs_max', the
+            response_statistics of max |result| along the beam (as floats),
+        ...,
+        'failure': failure_probability of max |moment| against the bending resistance (if 'section')
+    }
+
+    'load_models', 'stiffness_models': see sample_load_factors and sample_stiffness_scales
+    'section': {'S', 'Fy'} as in design_checks.design_checks. Fy is sampled from 'strength_model' (defaults
+        to DEFAULT_STRENGTH_MODEL) and the resistance is design_checks.bending_resistance without a
+        partial factor.
+    'result_types': {result_type: direction}, defaults to RELIABILITY_RESULTS
+    'seed': the seed of the random numbers, so that a run can be repeated
+
+    The realizations take n_samples * n_points * 8 bytes of memory per result type.
+    """
+
+    if result_types is None:
+        result_types = RELIABILITY_RESULTS
+    if section is not None and 'moment' not in result_types:
+        raise ValueError("The failure probability is computed from the 'moment' results")
+
+    if isinstance(beam, str):
+        beam_data = beams.get_structured_beam_data(read_csv_text(beam))
+    else:
+        beam_data = beam
+    unit_results = beams.solve_unit_cases(beam_data, dict(result_types), n_points)
+    case_names = unit_results['reactions']['combo_names']
+
+    rng = np.random.default_rng(seed)
+    factors = sample_load_factors(rng, case_names, n_samples, load_models)
+    stiffness_scales = sample_stiffness_scales(rng, n_samples, stiffness_models)
+
+    results = {'n_samples': n_samples}
+    abs_maxima = {}
+    for result_type in result_types:
+        x_locs, _, _ = unit_results[result_type]
+        responses = sample_responses(unit_results, result_type, factors, stiffness_scales)
+        abs_maxima[result_type] = np.abs(responses).max(axis=1)
+        results['x'] = x_locs
+        results[result_type] = response_statistics(responses, quantiles)
+        results[result_type]['abs_max'] = response_statistics(abs_maxima[result_type], quantiles)
+
+    if section is not None:
+        if strength_model is None:
+            strength_model = DEFAULT_STRENGTH_MODEL
+        strengths = section['Fy'] * sample(rng, strength_model, n_samples)
+        resistances = bending_resistance({**section, 'Fy': strengths}, gamma=1.0)
+        results['failure'] = failure_probability(abs_maxima['moment'], resistances)
+    return results
+
+
+
+def _solve_unit_cases_batch(beam_batch: list[dict], result_types: dict, n_points: int) -> list[dict]:
+    return [beams.solve_unit_cases(beam_data, result_types, n_points) for beam_data in beam_batch]
+
+
+
+def solve_realizations(
+    beam_list: list[dict],
+    result_types: Optional[dict] = None,
+    n_points: int = 200,
+    max_workers: Optional[int] = None,
+    batch_size: int = 8,
+) -> list[dict]:
+
+    """
+    Returns beams.solve_unit_cases for every structured beam data in 'beam_list' (e.g. realizations with
+    random support locations), in the same order, solved in a process pool of 'max_workers' processes
+    in batches of 'batch_size' beams. Each one can then be sampled with sample_responses.
+    """
+
+    if result_types is None:
+        result_types = RELIABILITY_RESULTS
+    batches = [beam_list[start:start + batch_size] for start in range(0, len(beam_list), batch_size)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_solve_unit_cases_batch, batch, dict(result_types), n_points) for batch in batches]
+        return [unit_results for future in futures for unit_results in future.result()]
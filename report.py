@@ -0,0 +1,268 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+from matplotlib.ticker import MaxNLocator
+import numpy as np
+
+import beams
+import load_factors as lf
+import plots
+from result_store import ResultStore
+import units as u
+
+
+REPORT_RESULTS = {
+    'moment': 'Mz',
+    'shear': 'Fy',
+    'deflection': 'dy',
+}
+
+
+class ReportFigure:
+    """
+    A reusable matplotlib figure with one envelope panel per result type. The Figure, Axes and
+    Line2D artists are created once and each new beam only updates their data, so rendering
+    many beams in a row doesn't pay for building a new figure every time.
+
+    'units': dict of {result_type: unit} to plot the results in. Defaults to units.DEFAULT_RESULT_UNITS.
+    """
+
+    def __init__(self, result_types: Optional[dict] = None, figsize=(8, 8), dpi=150, units: Optional[dict] = None):
+        self.result_types = result_types or REPORT_RESULTS
+        self.units = {result_type: u.result_unit(result_type, (units or {}).get(result_type)) for result_type in self.result_types}
+        self.scales = {result_type: u.result_scale(result_type, unit) for result_type, unit in self.units.items()}
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.fig)
+        axes = self.fig.subplots(len(self.result_types), 1, sharex=True, squeeze=False)[:, 0]
+
+        self.axes = {}
+        self.lines = {}
+        self.fills = []
+        for ax, result_type in zip(axes, self.result_types):
+            ax.set_title(plots.DIAGRAM_LABELS[result_type][0], fontsize = 10)
+            ax.set_ylabel(plots.diagram_y_label(result_type, self.units[result_type]), fontsize = 8)
+            ax.tick_params(axis = 'y', labelsize = 8)
+            ax.yaxis.set_major_locator(MaxNLocator(nbins=10))
+            ax.grid(True, color = 'gray', linestyle = ':', linewidth=0.5, alpha=0.7)
+            self.axes[result_type] = ax
+            self.lines[result_type] = (
+                ax.plot([], [], color = 'green')[0],
+                ax.plot([], [], color = 'blue')[0],
+                ax.plot([], [], color = 'red')[0],
+            )
+
+        axes[-1].set_xlabel('Beam Length, mm', fontsize = 8)
+        axes[-1].tick_params(axis = 'x', labelsize = 8, rotation = -90)
+        axes[-1].xaxis.set_major_locator(MaxNLocator(nbins=20))
+        self.suptitle = self.fig.suptitle('')
+        self.fig.tight_layout()
+
+    def update(self, beam_name: str, envelopes: dict) -> Figure:
+        """
+        Returns the figure after replacing its data with 'envelopes', a dict of
+        {result_type: (x_locs, max_results, min_results)} as returned by beam_envelopes.
+        """
+        for fill in self.fills:
+            fill.remove()
+        self.fills = []
+
+        for result_type, (x_locs, max_results, min_results) in envelopes.items():
+            ax = self.axes[result_type]
+            zero_line, max_line, min_line = self.lines[result_type]
+            max_results = max_results * self.scales[result_type]
+            min_results = min_results * self.scales[result_type]
+            zero_line.set_data([x_locs[0], x_locs[-1]], [0, 0])
+            max_line.set_data(x_locs, max_results)
+            min_line.set_data(x_locs, min_results)
+            self.fills.append(ax.fill_between(x_locs, 0, max_results, where=max_results >= 0, color='blue', alpha=0.3))
+            self.fills.append(ax.fill_between(x_locs, 0, min_results, where=min_results < 0, color='red', alpha=0.3))
+            ax.relim()
+            ax.autoscale_view()
+
+        self.suptitle.set_text(beam_name)
+        return self.fig
+
+
+
+def beam_envelopes(
+    filename: str,
+    load_combos: Optional[dict] = None,
+    result_types: Optional[dict] = None,
+    n_points: int = 1000,
+    max_points: Optional[int] = 800,
+    store: Optional[ResultStore] = None,
+) -> tuple[str, dict]:
+
+    """
+    Returns a tuple of (beam_name, envelopes) for the beam file 'filename', where envelopes is a
+    dict of {result_type: (x_locs, max_results, min_results)} downsampled to about 'max_points'.
+    The beam is analyzed once for all of the result types. With a 'store', the envelopes are looked up
+    by the beam data (see ResultStore.beam_key) and the model is only built for the ones it doesn't hold.
+    """
+
+    if load_combos is None:
+        load_combos = lf.ec_eurocode_combs()
+    if result_types is None:
+        result_types = REPORT_RESULTS
+
+    beam_data = beams.get_structured_beam_data(beams.read_beam_file(filename))
+    beam_name = beam_data["Name"]
+
+    model = None
+    envelopes = {}
+    for result_type, direction in result_types.items():
+        key = store.beam_key(beam_data, load_combos, result_type, direction, n_points) if store is not None else None
+        envelope = store.get_envelope(key) if store is not None else None
+        if envelope is not None:
+            x_locs, max_results, min_results = envelope
+        else:
+            if model is None:
+                model = beams.beam_model_from_data(beam_data, load_combos)
+            tensor = beams.extract_result_tensor(model, result_type, direction, n_points)
+            if store is not None:
+                tensor = store.put_tensor(key, tensor)
+            x_locs, combo_names, results = tensor
+            max_results = results.max(axis=0)
+            min_results = results.min(axis=0)
+        if max_points is not None:
+            keep = plots.minmax_indices(np.vstack([max_results, min_results]), max_points)
+            x_locs, max_results, min_results = x_locs[keep], max_results[keep], min_results[keep]
+        envelopes[result_type] = (x_locs, max_results, min_results)
+
+    return beam_name, envelopes
+
+
+
+_WORKER_FIGURE = None
+_WORKER_OPTIONS = {}
+
+
+def _init_worker(
+    png_dir: Optional[str],
+    load_combos: Optional[dict],
+    n_points: int,
+    max_points: Optional[int],
+    store_dir: Optional[str],
+):
+    """
+    Sets up a report worker process: headless Agg backend and the options shared by every task.
+    The worker's ReportFigure is created lazily on its first PNG.
+    """
+    matplotlib.use('Agg')
+    _WORKER_OPTIONS.update(
+        png_dir=png_dir,
+        load_combos=load_combos,
+        n_points=n_points,
+        max_points=max_points,
+        store=ResultStore(store_dir) if store_dir is not None else None,
+    )
+
+
+def _render_beam(filename: str) -> tuple[str, dict]:
+    """
+    Worker task: analyzes the beam in 'filename', writes its PNG (if a PNG directory was given)
+    and returns the envelopes so that the parent process can add the beam to the PDF.
+    """
+    global _WORKER_FIGURE
+
+    beam_name, envelopes = beam_envelopes(
+        filename,
+        _WORKER_OPTIONS['load_combos'],
+        n_points=_WORKER_OPTIONS['n_points'],
+        max_points=_WORKER_OPTIONS['max_points'],
+        store=_WORKER_OPTIONS['store'],
+    )
+
+    png_dir = _WORKER_OPTIONS['png_dir']
+    if png_dir is not None:
+        if _WORKER_FIGURE is None:
+            _WORKER_FIGURE = ReportFigure()
+        fig = _WORKER_FIGURE.update(beam_name, envelopes)
+        base_name = os.path.splitext(os.path.basename(filename))[0]
+        fig.savefig(os.path.join(png_dir, f'{base_name}.png'))
+
+    return beam_name, envelopes
+
+
+
+def export_reports(
+    beam_files: list[str],
+    pdf_path: Optional[str] = None,
+    png_dir: Optional[str] = None,
+    load_combos: Optional[dict] = None,
+    processes: Optional[int] = None,
+    n_points: int = 1000,
+    max_points: Optional[int] = 800,
+    store_dir: Optional[str] = None,
+) -> dict:
+
+    """
+    Renders the envelope diagrams of every beam file in 'beam_files' and returns a dict of
+    throughput statistics: {'n_beams', 'n_figures', 'seconds', 'figures_per_second'}.
+
+    'pdf_path': if not None, a multi-page PDF (one page per beam, in the order of 'beam_files') is
+        written here. Pages are streamed to the file as the results arrive from the workers.
+    'png_dir': if not None, one PNG per beam is written in this directory by the worker processes.
+    'load_combos': the load combos added to every beam. Defaults to load_factors.ec_eurocode_combs().
+    'processes': the number of worker processes. Defaults to os.cpu_count().
+    'store_dir': if not None, the root of a result_store.ResultStore that is consulted before building
+        each beam and that keeps the new results for the next run.
+
+    The analyses and the PNGs run in a pool of worker processes on the Agg backend. Each worker and the
+    PDF writer keep one ReportFigure and only update its line data from one beam to the next.
+    """
+
+    if png_dir is not None:
+        os.makedirs(png_dir, exist_ok=True)
+
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(png_dir, load_combos, n_points, max_points, store_dir),
+    ) as executor:
+        rendered = executor.map(_render_beam, beam_files)
+
+        if pdf_path is None:
+            for beam_name, envelopes in rendered:
+                pass
+        else:
+            report_figure = ReportFigure()
+            with PdfPages(pdf_path) as pdf:
+                for beam_name, envelopes in rendered:
+                    pdf.savefig(report_figure.update(beam_name, envelopes))
+
+    n_figures = len(beam_files) * ((pdf_path is not None) + (png_dir is not None))
+    seconds = time.perf_counter() - start
+    return {
+        'n_beams': len(beam_files),
+        'n_figures': n_figures,
+        'seconds': seconds,
+        'figures_per_second': n_figures / seconds if seconds else 0.0,
+    }
+
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render the envelope diagrams of many beam files.")
+    parser.add_argument('beam_files', nargs='+')
+    parser.add_argument('--pdf', default=None, help="path of the multi-page PDF to write")
+    parser.add_argument('--png-dir', default=None, help="directory for one PNG per beam")
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--store-dir', default=None, help="result store directory to reuse solved beams")
+    args = parser.parse_args()
+
+    stats = export_reports(args.beam_files, args.pdf, args.png_dir, processes=args.processes, store_dir=args.store_dir)
+    print(
+        f"Rendered {stats['n_figures']} figures for {stats['n_beams']} beams in {stats['seconds']:.2f} s "
+        f"({stats['figures_per_second']:.1f} figures/s)"
+    )
@@ -0,0 +1,265 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from importlib import metadata
+from typing import Optional
+
+import numpy as np
+
+from utils import content_hash
+
+# Entries are written to a temporary directory with this prefix next to their final one
+TMP_PREFIX = '.tmp-'
+
+def solver_version() -> str:
+    """
+    Returns the installed PyNite version, which is part of every result key so that upgrading
+    the solver never serves results computed by the previous version.
+    """
+    try:
+        return metadata.version('PyNiteFEA')
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+
+class ResultStore:
+    """
+    A content-addressed, size-bounded store of solved beam results on disk.
+
+    Each entry is a directory named after its key holding:
+        'arrays.npy':   (n_combos, 2, n_points) array, the per-combo [x, y] arrays of extract_arrays_all_combos
+        'envelope.npy': (3, n_points) array of [x, max, min] over all the combos
+        'meta.json':    the combo names and the entry size
+    or, for the support reactions of beams.extract_reactions (see put_reactions):
+        'reactions.npy': (n_supports, n_combos, 6) array
+        'meta.json':     the combo names, support nodes and locations, and the entry size
+
+    Keys from beam_key are computed from the beam data alone, so a hit costs neither building nor
+    solving the model.
+
+    Entries are read back memory-mapped, so opening the results of a large project only maps the
+    files and the pages are loaded from disk when they are used. When the store grows past
+    'max_bytes', the least recently used entries are evicted (the mtime of 'meta.json' records
+    the last use).
+
+    With 'compact', the result arrays and envelopes are stored as float32, the precision of
+    compact_results.CompactResults, in half the disk space and page cache (the reactions stay float64).
+    A compact store has its own keys, so it never serves results to a full-precision store sharing
+    its 'root', or the other way around.
+
+    The store is safe to share between threads and between processes: entries are written to a
+    temporary directory and renamed into place, so readers never see a partial entry.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 2 * 1024**3, compact: bool = False):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.compact = compact
+        self._lock = threading.Lock()
+        self._bytes = None
+        os.makedirs(root, exist_ok=True)
+
+    def key(self, *parts) -> str:
+        """
+        Returns the key of the results described by 'parts' (e.g. the model fingerprint, result type,
+        direction and number of points), combined with the solver version (and 'float32' for a
+        compact store).
+        """
+        if self.compact:
+            return content_hash(solver_version(), 'float32', *parts)
+        return content_hash(solver_version(), *parts)
+
+    def beam_key(self, beam_data: dict, load_combos: Optional[dict], *parts) -> str:
+        """
+        Returns the key of the results of the structured 'beam_data' (see beams.get_structured_beam_data)
+        under 'load_combos', further described by 'parts' (e.g. result type, direction and number of points).
+        The 'LoadTable' is left out: it holds the same loads as 'Loads', and beam data built without it
+        (e.g. from JSON) gets the same key.
+
+        # Example
+        store.beam_key(beam_data, lf.ec_eurocode_combs(), 'moment', 'Mz', 200) -> '3f1c...'
+        """
+        beam_spec = {key: value for key, value in beam_data.items() if key != 'LoadTable'}
+        return self.key('beam', beam_spec, load_combos, *parts)
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def _load(self, key: str, array_file: str) -> Optional[tuple[dict, np.ndarray]]:
+        """
+        Returns the (meta, memory-mapped array) of 'array_file' in the entry of 'key' and marks
+        the entry as used, or None if the key is not in the store.
+        """
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, 'meta.json')) as file:
+                meta = json.load(file)
+            array = np.load(os.path.join(entry_dir, array_file), mmap_mode='r')
+            os.utime(os.path.join(entry_dir, 'meta.json'))
+        except FileNotFoundError:
+            return None
+        return meta, array
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Returns the stored {combo_name: (2, n_points) array} for 'key' as memory-mapped views,
+        or None if the key is not in the store.
+        """
+        loaded = self._load(key, 'arrays.npy')
+        if loaded is None:
+            return None
+        meta, arrays = loaded
+        return {combo_name: arrays[idx] for idx, combo_name in enumerate(meta['combo_names'])}
+
+    def get_tensor(self, key: str) -> Optional[tuple[np.ndarray, list[str], np.ndarray]]:
+        """
+        Returns the stored results for 'key' in the format of beams.extract_result_tensor,
+        (x_locs, combo_names, results), as memory-mapped views, or None if the key is not in the store.
+        """
+        loaded = self._load(key, 'arrays.npy')
+        if loaded is None:
+            return None
+        meta, arrays = loaded
+        return arrays[0, 0], meta['combo_names'], arrays[:, 1]
+
+    def get_reactions(self, key: str) -> Optional[dict]:
+        """
+        Returns the support reactions stored with put_reactions for 'key' in the format of
+        beams.extract_reactions, or None if the key is not in the store.
+        """
+        loaded = self._load(key, 'reactions.npy')
+        if loaded is None:
+            return None
+        meta, reactions = loaded
+        return {
+            'nodes': meta['nodes'],
+            'locations': np.array(meta['locations'], dtype=float),
+            'combo_names': meta['combo_names'],
+            'reactions': reactions,
+            'max': reactions.max(axis=1),
+            'min': reactions.min(axis=1),
+        }
+
+    def get_envelope(self, key: str) -> Optional[np.ndarray]:
+        """
+        Returns the memory-mapped (3, n_points) [x, max, min] envelope for 'key', or None.
+        """
+        loaded = self._load(key, 'envelope.npy')
+        if loaded is None:
+            return None
+        return loaded[1]
+
+    def put(self, key: str, all_combos: dict) -> dict:
+        """
+        Saves the extract_arrays_all_combos result 'all_combos' under 'key', evicts old entries if the
+        store is over budget and returns the saved results, memory-mapped.
+        Raises a ValueError if 'all_combos' is empty, as there is no envelope to store.
+        """
+        if not all_combos:
+            raise ValueError(f"Cannot store the results of {key}: there are no load combinations.")
+        combo_names = list(all_combos.keys())
+        arrays = np.array([all_combos[combo_name] for combo_name in combo_names], dtype=np.float32 if self.compact else float)
+        envelope = np.vstack([arrays[0, 0], arrays[:, 1].max(axis=0), arrays[:, 1].min(axis=0)])
+        self._write_entry(key, {'arrays.npy': arrays, 'envelope.npy': envelope}, {'combo_names': combo_names})
+        stored = self.get(key)
+        return stored if stored is not None else all_combos
+
+    def put_tensor(self, key: str, tensor: tuple[np.ndarray, list[str], np.ndarray]) -> tuple[np.ndarray, list[str], np.ndarray]:
+        """
+        Saves the beams.extract_result_tensor result 'tensor' under 'key' (as put does) and returns it,
+        memory-mapped.
+        """
+        x_locs, combo_names, results = tensor
+        self.put(key, {combo_name: np.array([x_locs, results[idx]]) for idx, combo_name in enumerate(combo_names)})
+        stored = self.get_tensor(key)
+        return stored if stored is not None else tensor
+
+    def put_reactions(self, key: str, reactions: dict) -> dict:
+        """
+        Saves the beams.extract_reactions result 'reactions' under 'key' and returns it, memory-mapped.
+        """
+        meta = {
+            'combo_names': list(reactions['combo_names']),
+            'nodes': list(reactions['nodes']),
+            'locations': [float(location) for location in reactions['locations']],
+        }
+        self._write_entry(key, {'reactions.npy': np.asarray(reactions['reactions'], dtype=float)}, meta)
+        stored = self.get_reactions(key)
+        return stored if stored is not None else reactions
+
+    def _write_entry(self, key: str, arrays: dict[str, np.ndarray], meta: dict):
+        """
+        Writes the {file_name: array} 'arrays' and 'meta' as the entry of 'key', then evicts old
+        entries if the store is over budget.
+        """
+        n_bytes = sum(array.nbytes for array in arrays.values())
+        entry_dir = self._entry_dir(key)
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=TMP_PREFIX, dir=os.path.dirname(entry_dir))
+        for file_name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, file_name), array)
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as file:
+            json.dump({**meta, 'bytes': n_bytes}, file)
+
+        try:
+            os.rename(tmp_dir, entry_dir)
+            stored = True
+        except OSError:
+            # Another thread or process stored the same key first; its entry is identical.
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            stored = False
+
+        # The directory is only scanned once the running size estimate goes over budget.
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(size for _, size, _ in self.entries())
+            elif stored:
+                self._bytes += n_bytes
+            over_budget = self._bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        """
+        Returns (last_used, size_in_bytes, entry_dir) for every entry, least recently used first.
+        The temporary directories of entries still being written are skipped.
+        """
+        entries = []
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                if key.startswith(TMP_PREFIX):
+                    continue
+                meta_path = os.path.join(prefix_dir, key, 'meta.json')
+                try:
+                    last_used = os.path.getmtime(meta_path)
+                    with open(meta_path) as file:
+                        size = json.load(file)['bytes']
+                except (FileNotFoundError, NotADirectoryError):
+                    continue
+                entries.append((last_used, size, os.path.join(prefix_dir, key)))
+        entries.sort()
+        return entries
+
+    def evict(self) -> int:
+        """
+        Deletes the least recently used entries until the store fits in 'max_bytes'.
+        Returns the number of entries deleted.
+        """
+        with self._lock:
+            entries = self.entries()
+            total = sum(size for _, size, _ in entries)
+            evicted = 0
+            for _, size, entry_dir in entries:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                total -= size
+                evicted += 1
+            self._bytes = total
+            return evicted
@@ -0,0 +1,260 @@
+"""
+Analytic sensitivities of the beam results to the section, the material and the support locations,
+for gradient-based sizing and other optimization loops.
+
+The derivatives are computed by the direct method against the stiffness factorization of the sparse
+solver (sparse_beam.py), which the solve itself has already cached: every parameter costs one more
+solve of all of the load cases, not two more analyses as a finite difference through build_beam.
+
+    'E', 'Iz', 'A':  K(p) u = f, so K du/dp = -dK/dp u, where dK/dp is the stiffness matrix of the
+                     mesh for the derivatives of EA and EI (K is linear in both).
+    'x:<location>':  the location of a support (see support_parameter). The mesh and the stiffness are
+                     unchanged: the derivative of the displacements at fixed x is the response of the
+                     same beam to the moving reaction (a point moment equal to its shear reaction) and
+                     to the support settlements that keep the support restrained as it moves (minus the
+                     slope, and for the restrained rotations and axial displacements the curvature and
+                     strain, on each side of the support).
+
+The diagrams of the derivatives are then evaluated by the kernel in diagrams.py, from the derivatives
+of the reactions. The results have the format of beams.solve_unit_cases, so the sensitivities of any
+load combo follow from beams.superpose_results, as pipeline.analyze(..., sensitivities=[...]) does.
+benchmarks/sensitivity_check.py compares them with central finite differences.
+"""
+import dataclasses
+from typing import Optional
+
+import numpy as np
+
+import diagrams
+import sparse_beam
+
+
+SUPPORT_PREFIX = 'x:'
+
+STIFFNESS_PARAMETERS = ('E', 'Iz', 'A')
+
+
+def support_parameter(location: float) -> str:
+    """
+    Returns the name of the sensitivity parameter of the location of the support at 'location'.
+
+    # Example
+    support_parameter(3800.0) -> 'x:3800.0'
+    """
+    return f'{SUPPORT_PREFIX}{float(location)!r}'
+
+
+
+def support_parameters(beam_data: dict) -> list[str]:
+    """
+    Returns the sensitivity parameters of the locations of every support in 'beam_data', from left to right.
+    """
+    return [support_parameter(location) for location in sorted(beam_data["Supports"])]
+
+
+
+def stiffness_derivatives(beam_data: dict, parameter: str) -> tuple[float, float]:
+    """
+    Returns (dEA/dp, dEI/dp) for the 'parameter' p ('E', 'Iz' or 'A') of 'beam_data'.
+    """
+    if parameter == 'E':
+        return beam_data["A"], beam_data["Iz"]
+    if parameter == 'Iz':
+        return 0.0, beam_data["E"]
+    if parameter == 'A':
+        return beam_data["E"], 0.0
+    raise ValueError(f"Unknown stiffness parameter '{parameter}', expected one of {', '.join(STIFFNESS_PARAMETERS)}")
+
+
+
+def solve_unit_case_sensitivities(
+    beam_data_structured: dict,
+    result_types: dict[str, Optional[str]],
+    parameters: list[str],
+    n_points: int = 200,
+    max_element_length: Optional[float] = None,
+) -> dict[str, dict]:
+
+    """
+    Returns {parameter: derivatives} for each of the 'parameters' ('E', 'Iz', 'A' or a support location,
+    see support_parameter) of the beam in 'beam_data_structured', where the derivatives of every result
+    of every load case have the format of beams.solve_unit_cases (and sparse_beam.solve_unit_cases_sparse):
+    {result_type: (x_locs, case_names, d(results)/d(parameter)), ..., 'reactions': {...}}
+
+    Only the result types and directions in sparse_beam.SPARSE_RESULTS are available.
+    """
+
+    for result_type, direction in result_types.items():
+        if result_type not in sparse_beam.SPARSE_RESULTS or direction not in (sparse_beam.SPARSE_RESULTS[result_type], None):
+            raise ValueError(f"No sensitivities are computed for '{result_type}' in direction '{direction}'")
+
+    nodal = sparse_beam.solve_nodal(beam_data_structured, max_element_length)
+    length, EA, EI = beam_data_structured["L"], beam_data_structured["E"] * beam_data_structured["A"], beam_data_structured["E"] * beam_data_structured["Iz"]
+    node_locs = nodal['node_locs']
+    restrained = sparse_beam.restrained_dofs(node_locs, beam_data_structured["Supports"])
+    _, free, lu = sparse_beam.factorized_stiffness(node_locs, EA, EI, restrained)
+    k_elements = sparse_beam.element_stiffness(node_locs, EA, EI)
+    base_terms = sparse_beam.diagram_terms(nodal, length, EI)
+    x_locs = np.linspace(0, length, n_points)
+
+    sensitivities = {}
+    for parameter in parameters:
+        if parameter in STIFFNESS_PARAMETERS:
+            derivative = _stiffness_derivative(nodal, k_elements, free, lu, *stiffness_derivatives(beam_data_structured, parameter))
+        elif parameter.startswith(SUPPORT_PREFIX):
+            location = float(parameter[len(SUPPORT_PREFIX):])
+            support_types = {loc: support_type for loc, support_type in beam_data_structured["Supports"].items() if np.isclose(loc, location, rtol=0, atol=1e-6)}
+            if not support_types:
+                raise ValueError(f"There is no support at {location}")
+            support_location, support_type = next(iter(support_types.items()))
+            derivative = _support_derivative(nodal, support_type, k_elements, free, lu, base_terms, float(support_location), EA, EI)
+        else:
+            raise ValueError(f"Unknown sensitivity parameter '{parameter}'")
+        sensitivities[parameter] = _derivative_results(nodal, base_terms, derivative, result_types, x_locs, length, EI)
+    return sensitivities
+
+
+
+def _element_forces(k_elements: np.ndarray, element_values: np.ndarray) -> np.ndarray:
+    # The (n_dofs, n_cases) nodal forces of the elements deformed by their (n_elements, 6, n_cases) displacements
+    n_elements, n_cases = len(k_elements), element_values.shape[-1]
+    forces = np.zeros((sparse_beam.DOFS_PER_NODE * (n_elements + 1), n_cases))
+    np.add.at(forces, sparse_beam.element_dofs(n_elements).ravel(), np.einsum('eij,ejc->eic', k_elements, element_values).reshape(-1, n_cases))
+    return forces
+
+
+
+def _solve_prescribed(k_elements, free, lu, forces, element_prescribed) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (element_values, reactions) of the mesh of 'k_elements' under the nodal 'forces' (n_dofs,
+    n_cases), with the restrained dofs of each element displaced by 'element_prescribed' (n_elements, 6,
+    n_cases), which may differ between the two elements of a node. 'reactions' are the (n_dofs, n_cases)
+    nodal forces not balanced by 'forces', i.e. the reactions at the restrained dofs.
+    """
+    dofs = sparse_beam.element_dofs(len(k_elements))
+    is_restrained = np.ones(len(forces), dtype=bool)
+    is_restrained[free] = False
+
+    def element_values(free_values):
+        values = np.zeros_like(forces)
+        values[free] = free_values
+        elements = values[dofs]
+        elements[is_restrained[dofs]] = element_prescribed[is_restrained[dofs]]
+        return elements
+
+    solution = lu.solve(forces[free] - _element_forces(k_elements, element_values(0.0))[free])
+    # One step of iterative refinement, as in sparse_beam.solve_nodal
+    solution += lu.solve((forces - _element_forces(k_elements, element_values(solution)))[free])
+    elements = element_values(solution)
+    return elements, _element_forces(k_elements, elements) - forces
+
+
+
+def _stiffness_derivative(nodal: dict, k_elements: np.ndarray, free, lu, dEA: float, dEI: float) -> dict:
+    # K du/dp = -dK/dp u, with the restrained dofs fixed, and dR/dp = K du/dp + dK/dp u.
+    n_cases = len(nodal['case_names'])
+    displacements = nodal['displacements'].reshape(-1, n_cases)
+    forces = -(sparse_beam.assemble_stiffness(nodal['node_locs'], dEA, dEI) @ displacements)
+    elements, reactions = _solve_prescribed(k_elements, free, lu, forces, np.zeros((len(k_elements), 6, n_cases)))
+    return {
+        'elements': elements,
+        'reactions': reactions,
+        'point_moments': [],
+        'slope_jumps': [],
+        'dEI': dEI,
+    }
+
+
+
+def _support_derivative(nodal: dict, support_type: str, k_elements: np.ndarray, free, lu, base_terms, location: float, EA: float, EI: float) -> dict:
+    dx_fixed, _, rz_fixed = sparse_beam.SUPPORT_RESTRAINTS[support_type]
+    n_elements, n_cases = len(k_elements), len(nodal['case_names'])
+    node = sparse_beam.node_index(nodal['node_locs'], location)
+    support = int(np.argmin(np.abs(nodal['support_locs'] - location)))
+    displacements = nodal['displacements'].reshape(-1, n_cases)
+    dof = sparse_beam.DOFS_PER_NODE * node
+
+    # The moment and axial force left and right of the support. The kernel returns the values right of
+    # x, except at the far end of the beam, which has no right side. A point moment or axial load at an
+    # interior support is left of it when it moves right and right of it when it moves left: the
+    # derivative has a kink there, and half of the load is put on each side, which gives the mean of
+    # the two one-sided derivatives. Supports at the ends of the beam can only move inwards.
+    at_support = diagrams.evaluate(base_terms, ['moment', 'axial'], np.array([location]))
+    right = {'moment': at_support['moment'][:, 0], 'axial': at_support['axial'][:, 0]}
+    left = dict(right)
+    if 0 < node < n_elements:
+        here = np.isclose(base_terms.point_locs, location, rtol=0, atol=1e-6)
+        for key, direction, component in [('moment', 'Mz', 2), ('axial', 'Fx', 0)]:
+            reaction = nodal['reactions'][support, component]
+            load_jump = base_terms.point_mags[here & (base_terms.point_dirs == direction)].sum(axis=0) - reaction
+            left[key] = right[key] - reaction - load_jump / 2
+            right[key] = right[key] - load_jump / 2
+
+    # The settlements that keep the support restrained as it moves: minus the slope for the deflection,
+    # shared by both sides, and minus the derivative of the rotation (EI y'' = -M) and of the axial
+    # displacement (EA u' = -N), which are the elements' own on each side of the support.
+    element_prescribed = np.zeros((n_elements, 6, n_cases))
+    for side_values, element, offset in [(left, node - 1, 3), (right, node, 0)]:
+        if not 0 <= element < n_elements:
+            continue
+        element_prescribed[element, offset + 1] = -displacements[dof + 2]
+        if rz_fixed:
+            element_prescribed[element, offset + 2] = side_values['moment'] / EI
+        if dx_fixed:
+            element_prescribed[element, offset] = side_values['axial'] / EA
+
+    # The reaction moving along the beam is a point moment of its shear reaction.
+    shear_reaction = nodal['reactions'][support, 1]
+    forces = np.zeros_like(displacements)
+    forces[dof + 2] = shear_reaction
+    elements, reactions = _solve_prescribed(k_elements, free, lu, forces, element_prescribed)
+
+    slope_jumps = []
+    if rz_fixed and 0 < node < n_elements:
+        slope_jumps.append((location, (right['moment'] - left['moment']) / EI))
+    return {
+        'elements': elements,
+        'reactions': reactions,
+        'point_moments': [(location, shear_reaction)],
+        'slope_jumps': slope_jumps,
+        'dEI': 0.0,
+    }
+
+
+
+def _derivative_results(nodal: dict, base_terms, derivative: dict, result_types: dict, x_locs: np.ndarray, length: float, EI: float) -> dict:
+    # The diagrams of the derivatives, from the derivatives of the reactions and the point moments of
+    # the moving reactions, plus the slope jumps and, if EI changes, its direct effect on the deflection.
+    n_supports, n_cases = len(nodal['support_locs']), len(nodal['case_names'])
+    support_dofs = sparse_beam.DOFS_PER_NODE * np.array([sparse_beam.node_index(nodal['node_locs'], location) for location in nodal['support_locs']], dtype=int)
+    support_reactions = derivative['reactions'][support_dofs[:, None] + np.arange(sparse_beam.DOFS_PER_NODE)]   # (n_supports, 3, n_cases)
+
+    moment_locs = np.array([location for location, _ in derivative['point_moments']], dtype=float)
+    moment_mags = np.array([mags for _, mags in derivative['point_moments']], dtype=float).reshape(-1, n_cases)
+    terms = diagrams.DiagramTerms(
+        length=length,
+        EI=EI,
+        point_locs=np.concatenate([np.repeat(nodal['support_locs'], len(sparse_beam.LOAD_DOFS)), moment_locs]),
+        point_dirs=np.array(list(sparse_beam.LOAD_DOFS) * n_supports + ['Mz'] * len(moment_locs), dtype=object),
+        point_mags=np.concatenate([support_reactions.reshape(-1, n_cases), moment_mags]),
+        dist_starts=np.zeros(0),
+        dist_ends=np.zeros(0),
+        dist_dirs=np.zeros(0, dtype=object),
+        dist_start_mags=np.zeros((0, n_cases)),
+        dist_end_mags=np.zeros((0, n_cases)),
+        deflection0=derivative['elements'][0, 1],
+        slope0=derivative['elements'][0, 2],
+    )
+    results = diagrams.evaluate(terms, list(result_types), x_locs)
+
+    if 'deflection' in results:
+        for location, jump in derivative['slope_jumps']:
+            results['deflection'] += jump[:, None] * np.maximum(x_locs - location, 0.0)[None, :]
+        if derivative['dEI']:
+            # y = y0 + y0' x + G / EI, so dy/dp also has the term -dEI/dp / EI * G / EI of the loads G
+            unloaded_ends = dataclasses.replace(base_terms, deflection0=np.zeros(n_cases), slope0=np.zeros(n_cases))
+            results['deflection'] -= derivative['dEI'] / EI * diagrams.evaluate(unloaded_ends, ['deflection'], x_locs)['deflection']
+
+    unit_results = {result_type: (x_locs, nodal['case_names'], results[result_type]) for result_type in result_types}
+    unit_results['reactions'] = sparse_beam.reaction_results(nodal, support_reactions, length)
+    return unit_results
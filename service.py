@@ -0,0 +1,354 @@
+"""
+A headless HTTP/JSON analysis service for beams, written as a plain ASGI application.
+
+Run it with any ASGI server, e.g.:
+
+    uvicorn service:app --port 8000
+
+Endpoints:
+
+    GET  /health     {"status": "ok", "pending": <beams in flight>, "max_pending": ...}
+    POST /analyze    Analyzes one or more beams and returns their envelopes and extremes.
+
+The /analyze body is either the text of a beam file (Content-Type: text/plain) or JSON:
+
+    {
+        "beam": "<beam file text>" | {<structured beam data, as from beams.get_structured_beam_data>},
+        "beams": [<beam>, <beam>, ...],          # instead of "beam", for a batch
+        "load_combos": {"LC1": {"D": 1.35}, ...}, # optional, defaults to load_factors.ec_eurocode_combs()
+        "result_types": {"moment": "Mz", ...},    # optional, defaults to SERVICE_RESULTS
+        "n_points": 200                           # optional, from 2 to MAX_N_POINTS
+    }
+
+A request that cannot be parsed, or whose "n_points" is out of range, gets 400.
+
+The solves are CPU-bound, so they run in a bounded process pool while the asyncio front end keeps
+accepting requests. The beams of a request are sent to the pool in batches of 'batch_size' to save
+on inter-process traffic. Identical beams (same content hash, including the options) that are
+already in flight for another request are not solved again: the request waits for that solve.
+When more than 'max_pending' beams are already in flight, new requests are refused with 503 and
+a Retry-After header instead of queueing without bound. A batch of more than 'max_pending' beams
+could never be accepted, so it is refused with 413: split it into smaller batches.
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import beams
+import load_factors as lf
+from utils import content_hash
+
+
+SERVICE_RESULTS = {
+    'moment': 'Mz',
+    'shear': 'Fy',
+    'deflection': 'dy',
+}
+
+MAX_BODY_BYTES = 4 * 1024 * 1024
+MAX_N_POINTS = 10_000
+
+
+def _structured_from_json(beam_json: dict) -> dict:
+    """
+    Returns the structured beam data in 'beam_json' with the support locations converted back to
+    floats (JSON object keys are always strings).
+    """
+    beam_data = dict(beam_json)
+    beam_data['Supports'] = {float(loc): sup_type for loc, sup_type in beam_json['Supports'].items()}
+    return beam_data
+
+
+
+def analyze_beam(
+    beam: str | dict,
+    load_combos: Optional[dict] = None,
+    result_types: Optional[dict] = None,
+    n_points: int = 200,
+) -> dict:
+
+    """
+    Returns the envelopes and extremes of 'beam' as a JSON-ready dict:
+
+    {
+        "name": "Balcony transfer",
+        "results": {
+            "moment": {
+                "x": [...], "max": [...], "min": [...],
+                "extremes": {"max": ..., "max_location": ..., "max_combo": ..., "min": ..., ...}
+            },
+            ...
+        }
+    }
+
+    'beam': the text of a beam file or structured beam data (see beams.get_structured_beam_data)
+    """
+
+    if load_combos is None:
+        load_combos = lf.ec_eurocode_combs()
+    if result_types is None:
+        result_types = SERVICE_RESULTS
+
+    if isinstance(beam, str):
+        model = beams.load_beam_model_from_text(beam, load_combos)
+    else:
+        model = beams.beam_model_from_data(_structured_from_json(beam), load_combos)
+
+    results = {}
+    for result_type, direction in result_types.items():
+        x_locs, combo_names, combo_results = beams.extract_result_tensor(model, result_type, direction, n_points)
+        max_combo_idx, max_idx = divmod(int(combo_results.argmax()), n_points)
+        min_combo_idx, min_idx = divmod(int(combo_results.argmin()), n_points)
+        results[result_type] = {
+            'x': x_locs.tolist(),
+            'max': combo_results.max(axis=0).tolist(),
+            'min': combo_results.min(axis=0).tolist(),
+            'extremes': {
+                'max': float(combo_results[max_combo_idx, max_idx]),
+                'max_location': float(x_locs[max_idx]),
+                'max_combo': combo_names[max_combo_idx],
+                'min': float(combo_results[min_combo_idx, min_idx]),
+                'min_location': float(x_locs[min_idx]),
+                'min_combo': combo_names[min_combo_idx],
+            },
+        }
+
+    return {'name': list(model.Members.keys())[0], 'results': results}
+
+
+
+def analyze_batch(
+    beam_batch: list[str | dict],
+    load_combos: Optional[dict] = None,
+    result_types: Optional[dict] = None,
+    n_points: int = 200,
+) -> list[dict]:
+
+    """
+    Returns analyze_beam for every beam in 'beam_batch'. A beam that fails returns {"error": message}
+    instead, so that one bad beam doesn't fail the rest of its batch.
+    """
+
+    analyzed = []
+    for beam in beam_batch:
+        try:
+            analyzed.append(analyze_beam(beam, load_combos, result_types, n_points))
+        except Exception as error:
+            analyzed.append({'error': f'{type(error).__name__}: {error}'})
+    return analyzed
+
+
+
+class ServiceUnavailable(Exception):
+    """
+    Raised for the beams of a batch that was cancelled before it ran. The request gets a 503.
+    """
+
+
+
+class AnalysisService:
+    """
+    The ASGI application. See the module docstring for the API.
+
+    'max_workers': the size of the process pool (defaults to os.cpu_count())
+    'max_pending': the number of beams allowed in flight before requests are refused with 503
+        (a single batch larger than this is refused with 413)
+    'batch_size': the number of beams sent to a worker process in one task
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: int = 64, batch_size: int = 8):
+        self.max_workers = max_workers or os.cpu_count()
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.pending = 0
+        self.executor = None
+        self.in_flight = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self._get_executor()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self.executor
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    async def _http(self, scope, receive, send):
+        method, path = scope['method'], scope['path']
+
+        if method == 'GET' and path == '/health':
+            await _send_json(send, 200, {'status': 'ok', 'pending': self.pending, 'max_pending': self.max_pending})
+            return
+        if path != '/analyze':
+            await _send_json(send, 404, {'error': f'Not found: {path}'})
+            return
+        if method != 'POST':
+            await _send_json(send, 405, {'error': 'Use POST'})
+            return
+
+        body = await _read_body(receive)
+        if body is None:
+            await _send_json(send, 413, {'error': f'Body larger than {MAX_BODY_BYTES} bytes'})
+            return
+
+        try:
+            request = _parse_request(scope, body)
+        except (ValueError, KeyError, TypeError) as error:
+            await _send_json(send, 400, {'error': f'Invalid request: {error}'})
+            return
+
+        beam_list = request['beams']
+        if len(beam_list) > self.max_pending:
+            await _send_json(send, 413, {'error': f'Batch of {len(beam_list)} beams is larger than {self.max_pending}, split it'})
+            return
+        if self.pending + len(beam_list) > self.max_pending:
+            await _send_json(send, 503, {'error': 'Too many analyses in flight, retry later'}, [(b'retry-after', b'1')])
+            return
+
+        self.pending += len(beam_list)
+        try:
+            analyzed = await self.analyze(beam_list, request['load_combos'], request['result_types'], request['n_points'])
+        except ServiceUnavailable as error:
+            await _send_json(send, 503, {'error': str(error)}, [(b'retry-after', b'1')])
+            return
+        finally:
+            self.pending -= len(beam_list)
+
+        if 'beam' in request:
+            status = 422 if 'error' in analyzed[0] else 200
+            await _send_json(send, status, analyzed[0])
+        else:
+            await _send_json(send, 200, {'beams': analyzed})
+
+    async def analyze(
+        self,
+        beam_list: list[str | dict],
+        load_combos: Optional[dict] = None,
+        result_types: Optional[dict] = None,
+        n_points: int = 200,
+    ) -> list[dict]:
+        """
+        Returns analyze_batch for 'beam_list', solved in the process pool in batches of 'batch_size'.
+
+        Each beam is keyed by the content hash of the beam and the options. A beam whose key is already
+        in flight (from this or another request) waits on that solve instead of being solved again.
+        """
+        loop = asyncio.get_running_loop()
+        keys = [content_hash(beam, load_combos, result_types, n_points) for beam in beam_list]
+
+        to_solve = {}
+        for key, beam in zip(keys, beam_list):
+            if key not in self.in_flight:
+                self.in_flight[key] = loop.create_future()
+                to_solve[key] = beam
+        waiting = [self.in_flight[key] for key in keys]
+
+        solve_keys = list(to_solve)
+        for idx in range(0, len(solve_keys), self.batch_size):
+            batch_keys = solve_keys[idx:idx + self.batch_size]
+            task = loop.run_in_executor(
+                self._get_executor(),
+                analyze_batch,
+                [to_solve[key] for key in batch_keys],
+                load_combos,
+                result_types,
+                n_points,
+            )
+            task.add_done_callback(lambda task, batch_keys=batch_keys: self._finish_batch(batch_keys, task))
+
+        return list(await asyncio.gather(*[asyncio.shield(future) for future in waiting]))
+
+    def _finish_batch(self, batch_keys: list[str], task: asyncio.Future):
+        """
+        Hands the results of a finished batch to every request waiting on its beams. If the batch was
+        cancelled (the pool is shut down with cancel_futures=True), every waiter fails with ServiceUnavailable.
+        """
+        if task.cancelled():
+            error = ServiceUnavailable('The analysis was cancelled because the service is shutting down')
+        else:
+            error = task.exception()
+        for idx, key in enumerate(batch_keys):
+            future = self.in_flight.pop(key)
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(task.result()[idx])
+
+
+
+def _parse_request(scope, body: bytes) -> dict:
+    """
+    Returns the analysis request in 'body' as a dict of {'beams', 'load_combos', 'result_types', 'n_points'}
+    (plus 'beam' when a single beam was sent).
+    """
+    headers = dict(scope.get('headers', []))
+    content_type = headers.get(b'content-type', b'').decode()
+
+    if content_type.startswith('text/plain'):
+        request = {'beam': body.decode()}
+    else:
+        request = json.loads(body)
+        if not isinstance(request, dict):
+            raise ValueError('expected a JSON object')
+
+    if 'beam' in request:
+        request['beams'] = [request['beam']]
+    elif not isinstance(request.get('beams'), list) or not request['beams']:
+        raise ValueError("expected 'beam' or a non-empty 'beams' list")
+
+    request.setdefault('load_combos', None)
+    request.setdefault('result_types', None)
+    request['n_points'] = int(request.get('n_points', 200))
+    if not 2 <= request['n_points'] <= MAX_N_POINTS:
+        raise ValueError(f"'n_points' must be from 2 to {MAX_N_POINTS}")
+    return request
+
+
+
+async def _read_body(receive) -> Optional[bytes]:
+    """
+    Returns the request body, or None if it is larger than MAX_BODY_BYTES.
+    """
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+
+async def _send_json(send, status: int, payload: dict, extra_headers: Optional[list] = None):
+    body = json.dumps(payload).encode()
+    headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers + (extra_headers or [])})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+
+app = AnalysisService()
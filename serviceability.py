@@ -0,0 +1,100 @@
+from typing import Optional
+
+import numpy as np
+
+import load_factors as lf
+
+
+def beam_spans(support_locations: list[float], beam_length: float) -> list[dict]:
+    """
+    Returns the spans of a beam of 'beam_length' with supports at 'support_locations', left to right.
+    Each span is a dict of {'name', 'start', 'end', 'length'} where 'length' is the reference length
+    of the span/deflection check: the distance between supports, or twice the overhang of a cantilever.
+
+    e.g. beam_spans([1000, 3800], 4800) -> [
+        {'name': 'Cantilever left', 'start': 0, 'end': 1000, 'length': 2000},
+        {'name': 'Span 1', 'start': 1000, 'end': 3800, 'length': 2800},
+        {'name': 'Cantilever right', 'start': 3800, 'end': 4800, 'length': 2000},
+    ]
+    """
+    support_locations = sorted(support_locations)
+    spans = []
+    if support_locations[0] > 0:
+        spans.append({'name': 'Cantilever left', 'start': 0, 'end': support_locations[0], 'length': 2 * support_locations[0]})
+    for idx, (start, end) in enumerate(zip(support_locations[:-1], support_locations[1:])):
+        spans.append({'name': f'Span {idx + 1}', 'start': start, 'end': end, 'length': end - start})
+    if support_locations[-1] < beam_length:
+        overhang = beam_length - support_locations[-1]
+        spans.append({'name': 'Cantilever right', 'start': support_locations[-1], 'end': beam_length, 'length': 2 * overhang})
+    return spans
+
+
+
+def span_stations(x_locs: np.ndarray, span: dict) -> np.ndarray:
+    """
+    Returns the indices of the stations 'x_locs' within the 'span' (see beam_spans). A span shorter than
+    the station spacing has none, and gets the stations nearest its ends instead.
+
+    e.g. span_stations(np.linspace(0, 10000, 11), {'start': 4500, 'end': 4800, ...}) -> array([4, 5])
+    """
+    in_span = np.flatnonzero((x_locs >= span['start']) & (x_locs <= span['end']))
+    if not len(in_span):
+        in_span = np.unique([np.abs(x_locs - span['start']).argmin(), np.abs(x_locs - span['end']).argmin()])
+    return in_span
+
+
+
+def deflection_checks(
+    x_locs: np.ndarray,
+    combo_names: list[str],
+    deflections: np.ndarray,
+    support_locations: list[float],
+    combo_families: Optional[dict[str, dict]] = None,
+    limits: Optional[dict[str, float]] = None,
+) -> list[dict]:
+
+    """
+    Returns the span/deflection (L/delta) check of every span for every SLS combo family, as a list of
+    rows of {'family', 'span', 'length', 'deflection', 'location', 'combo', 'ratio', 'limit', 'ok'}.
+
+    'x_locs', 'combo_names', 'deflections': the deflection tensor returned by beams.extract_result_tensor
+        (or beams.superpose_results), with a row for every combo of the checked families
+    'support_locations': the support locations (e.g. the 'locations' of beams.extract_reactions)
+    'combo_families': {family: {combo_name: factors}}. Defaults to load_factors.ec_sls_combs().
+    'limits': {family: minimum L/delta}. Defaults to load_factors.DEFLECTION_LIMITS.
+
+    The deflection of a span is its largest absolute deflection over the combos of the family (the
+    supports of these models don't settle). A span without any deflection has an infinite ratio. A span
+    with no station in it (shorter than the station spacing) is checked at the stations nearest its ends.
+    """
+
+    if combo_families is None:
+        combo_families = lf.ec_sls_combs()
+    if limits is None:
+        limits = lf.DEFLECTION_LIMITS
+
+    x_locs = np.asarray(x_locs, dtype=float)
+    abs_deflections = np.abs(np.asarray(deflections, dtype=float))
+    spans = beam_spans(support_locations, x_locs[-1])
+
+    checks = []
+    for family, family_combos in combo_families.items():
+        rows = [combo_names.index(combo_name) for combo_name in family_combos]
+        family_deflections = abs_deflections[rows]
+        for span in spans:
+            in_span = span_stations(x_locs, span)
+            combo_idx, point_idx = np.unravel_index(family_deflections[:, in_span].argmax(), (len(rows), len(in_span)))
+            deflection = family_deflections[combo_idx, in_span[point_idx]]
+            ratio = span['length'] / deflection if deflection > 0 else np.inf
+            checks.append({
+                'family': family,
+                'span': span['name'],
+                'length': span['length'],
+                'deflection': float(deflection),
+                'location': float(x_locs[in_span[point_idx]]),
+                'combo': list(family_combos)[combo_idx],
+                'ratio': float(ratio),
+                'limit': limits[family],
+                'ok': bool(ratio >= limits[family]),
+            })
+    return checks
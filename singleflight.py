@@ -0,0 +1,113 @@
+import threading
+from typing import Callable, Optional
+
+import beams
+from utils import content_hash, read_csv_text
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls: while a call for a key is in flight, other callers asking for
+    the same key wait for it and share its result (or its exception) instead of starting their own.
+    Once the call finishes the key is forgotten, so a later call computes again.
+
+    Safe to share between threads (e.g. Streamlit's script runner threads).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.started = 0
+        self.joined = 0
+
+    def do(self, key: str, func: Callable, *args, **kwargs):
+        """
+        Returns func(*args, **kwargs), or the result of the identical call already in flight for 'key'.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.started += 1
+                leader = True
+            else:
+                self.joined += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+
+PIPELINE_FLIGHTS = SingleFlight()
+
+
+def solve_beam_text(
+    beam_text: str,
+    load_combos: Optional[dict],
+    result_types: dict[str, Optional[str]],
+    n_points: int = 200,
+) -> dict:
+
+    """
+    Returns beams.extract_result_tensors for the beam file contents 'beam_text' with 'load_combos',
+    plus the support reactions of the same solve (beams.extract_reactions) under the key 'reactions'.
+    The unit load cases are solved once and every combo, ULS or SLS, is derived by superposition.
+
+    Concurrent calls with the same content (e.g. several sessions opening the same shared beam file)
+    are coalesced on the content hash of all the arguments and solved once.
+    """
+
+    key = content_hash(beam_text, load_combos, result_types, n_points)
+    return PIPELINE_FLIGHTS.do(key, _solve_beam_text, beam_text, load_combos, result_types, n_points)
+
+
+def solve_beam_data(
+    beam_data: dict,
+    load_combos: Optional[dict],
+    result_types: dict[str, Optional[str]],
+    n_points: int = 200,
+) -> dict:
+
+    """
+    Returns the same as solve_beam_text for structured beam data (see beams.get_structured_beam_data)
+    built in memory, e.g. from the app's inputs, without going through the beam file text.
+    """
+
+    key = content_hash(beam_data, load_combos, result_types, n_points)
+    return PIPELINE_FLIGHTS.do(key, _solve_beam_data, beam_data, load_combos, result_types, n_points)
+
+
+def _solve_beam_text(beam_text: str, load_combos: Optional[dict], result_types: dict, n_points: int) -> dict:
+    beam_data = beams.get_structured_beam_data(read_csv_text(beam_text))
+    return _solve_beam_data(beam_data, load_combos, result_types, n_points)
+
+
+def _solve_beam_data(beam_data: dict, load_combos: Optional[dict], result_types: dict, n_points: int) -> dict:
+    unit_results = beams.solve_unit_cases(beam_data, result_types, n_points)
+    if load_combos is None:
+        return unit_results
+    return beams.superpose_results(unit_results, load_combos)
@@ -0,0 +1,364 @@
+"""
+A sparse, in-plane finite element solver for the beams of this repository, for beams meshed with
+many internal nodes.
+
+PyNite assembles its stiffness matrix entry by entry from Python, which grows badly as nodes are added.
+Here the beam is meshed automatically (mesh_locations: nodes at the ends, the supports, the point
+loads, the ends of the distributed loads and any extra locations, e.g. section changes, optionally
+subdivided to a maximum element length), the element stiffness matrices of the whole mesh are built
+at once with NumPy, assembled into a CSR matrix and factorized with a sparse LU. The factorization
+depends only on the mesh, the section and the supports, so it is cached and reused when only the
+loads change, and all of the load cases are solved in one call against it. The diagrams between the
+nodes are then evaluated exactly from the reactions and the loads by the kernel in diagrams.py.
+
+The beam is solved in its x-y plane (axial 'Fx', transverse 'Fy' and 'Mz' loads), which is everything
+a beam file describes except the torques ('Mx') of version 2 files, in the sign conventions of PyNite,
+so the results match beams.solve_unit_cases and the two can be swapped (see
+benchmarks/beam_corpus.SOLVER_PATHS).
+
+With the exact element loads used here, the nodes at the load points are enough for exact results;
+finer meshes only add output nodes. They also add round-off, which grows with the fourth power of the
+number of elements (see benchmarks/sparse_scaling.py): about 1e-8 of the largest deflection at 10^3
+elements and 1e-3 at 10^4.
+"""
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.linalg import splu
+
+import beam_format
+import beams
+import diagrams
+
+
+DOFS_PER_NODE = 3   # dx, dy, rz
+
+# result_type: direction solved here
+SPARSE_RESULTS = {
+    'shear': 'Fy',
+    'moment': 'Mz',
+    'deflection': 'dy',
+    'axial': None,
+}
+
+# Restrained (dx, dy, rz) of each support type, as in beams.build_beam.
+SUPPORT_RESTRAINTS = {
+    'P': (True, True, False),
+    'R': (False, True, False),
+    'F': (True, True, True),
+}
+
+# Load direction: index of the nodal dof it acts on.
+LOAD_DOFS = {'Fx': 0, 'Fy': 1, 'Mz': 2}
+
+
+def load_dofs(loads: beam_format.LoadTable) -> np.ndarray:
+    """
+    Returns the (n_loads,) index of the nodal dof that each of 'loads' acts on (see LOAD_DOFS). Global and
+    local directions are the same for these beams, which lie along the global X axis.
+    """
+    unsupported = sorted(set(loads.directions) - set(LOAD_DOFS))
+    if unsupported:
+        raise ValueError(f"The sparse solver only solves in-plane loads ({', '.join(LOAD_DOFS)}), not '{', '.join(unsupported)}'")
+    return np.array([LOAD_DOFS[direction] for direction in loads.directions], dtype=int)
+
+
+
+def mesh_locations(
+    beam_data: dict,
+    max_element_length: Optional[float] = None,
+    extra_locations: tuple = (),
+) -> np.ndarray:
+
+    """
+    Returns the sorted node locations of a mesh of the beam in 'beam_data' (as returned by
+    beams.get_structured_beam_data): the beam ends, the supports, the point loads, the ends of the
+    distributed loads and the 'extra_locations' (e.g. section changes). If 'max_element_length' is
+    given, every element longer than it is subdivided into equal elements.
+
+    # Example
+    mesh_locations({"L": 4800.0, "Supports": {1000.0: "P", 3800.0: "R"}, "Loads": [...]}, 1000)
+    -> array([0., 1000., 1933.33, 2866.67, 3800., 4800.])
+    """
+
+    loads = beams.load_table(beam_data)
+    # Both locations of a point load are its location
+    breakpoints = np.concatenate([[0.0, beam_data["L"], *beam_data["Supports"], *extra_locations], loads.start_locs, loads.end_locs])
+    breakpoints = np.unique(np.round(breakpoints.astype(float), 10))
+    if max_element_length is None:
+        return breakpoints
+
+    lengths = np.diff(breakpoints)
+    n_divisions = np.maximum(np.ceil(lengths / max_element_length - 1e-9), 1).astype(int)
+    offsets = np.repeat(breakpoints[:-1], n_divisions)
+    steps = np.repeat(lengths / n_divisions, n_divisions)
+    within = np.arange(n_divisions.sum()) - np.repeat(np.cumsum(n_divisions) - n_divisions, n_divisions)
+    return np.append(offsets + within * steps, breakpoints[-1])
+
+
+
+def element_stiffness(node_locs: np.ndarray, EA: float, EI: float) -> np.ndarray:
+    """
+    Returns the (n_elements, 6, 6) stiffness matrices of the beam elements between consecutive
+    'node_locs', in the local dofs (dx, dy, rz) of the start node and then of the end node.
+    """
+    lengths = np.diff(node_locs)
+    n_elements = len(lengths)
+    k = np.zeros((n_elements, 6, 6))
+
+    axial = EA / lengths
+    k[:, 0, 0] = k[:, 3, 3] = axial
+    k[:, 0, 3] = k[:, 3, 0] = -axial
+
+    l = lengths
+    bending_block = [
+        [12, 6 * l, -12, 6 * l],
+        [6 * l, 4 * l**2, -6 * l, 2 * l**2],
+        [-12, -6 * l, 12, -6 * l],
+        [6 * l, 2 * l**2, -6 * l, 4 * l**2],
+    ]
+    bending_dofs = [1, 2, 4, 5]
+    for row, i in enumerate(bending_dofs):
+        for col, j in enumerate(bending_dofs):
+            k[:, i, j] = bending_block[row][col] * EI / l**3
+    return k
+
+
+
+def element_dofs(n_elements: int) -> np.ndarray:
+    """
+    Returns the (n_elements, 6) global dof indices of the local dofs of each element (see element_stiffness).
+    """
+    return DOFS_PER_NODE * np.arange(n_elements)[:, None] + np.arange(6)[None, :]
+
+
+
+def assemble_stiffness(node_locs: np.ndarray, EA: float, EI: float):
+    """
+    Returns the (n_dofs, n_dofs) stiffness matrix, in CSR format, of the beam elements between
+    consecutive 'node_locs', with the dofs of node i at 3 * i + [0, 1, 2] for (dx, dy, rz).
+    """
+    k = element_stiffness(node_locs, EA, EI)
+    n_elements = len(k)
+    dofs = element_dofs(n_elements)
+    rows = np.repeat(dofs, 6, axis=1)
+    cols = np.tile(dofs, (1, 6))
+    n_dofs = DOFS_PER_NODE * (n_elements + 1)
+    return coo_matrix((k.ravel(), (rows.ravel(), cols.ravel())), shape=(n_dofs, n_dofs)).tocsr()
+
+
+
+def restrained_dofs(node_locs: np.ndarray, supports: dict[float, str]) -> np.ndarray:
+    """
+    Returns the sorted indices of the dofs restrained by 'supports' ({location: 'P' | 'R' | 'F'}).
+    """
+    dofs = []
+    for location, support_type in supports.items():
+        node = node_index(node_locs, location)
+        dofs.extend(DOFS_PER_NODE * node + dof for dof, fixed in enumerate(SUPPORT_RESTRAINTS[support_type]) if fixed)
+    return np.array(sorted(dofs), dtype=int)
+
+
+
+@lru_cache(maxsize=32)
+def _factorized(node_locs_bytes: bytes, EA: float, EI: float, restrained: tuple):
+    node_locs = np.frombuffer(node_locs_bytes)
+    stiffness = assemble_stiffness(node_locs, EA, EI)
+    free = np.setdiff1d(np.arange(stiffness.shape[0]), restrained)
+    try:
+        factor = splu(stiffness[free][:, free].tocsc())
+    except RuntimeError:
+        raise ValueError("The beam is unstable: its supports don't restrain it in the x-y plane") from None
+    return stiffness, free, factor
+
+
+
+def factorized_stiffness(node_locs: np.ndarray, EA: float, EI: float, restrained: np.ndarray):
+    """
+    Returns (stiffness, free_dofs, lu) for the mesh 'node_locs': the CSR stiffness matrix, the indices
+    of the unrestrained dofs and the sparse LU factorization of the stiffness matrix of those dofs.
+    The result is cached on the mesh, the stiffnesses and the restraints, so that solving the same
+    beam under other loads doesn't assemble or factorize again.
+    """
+    return _factorized(np.ascontiguousarray(node_locs, dtype=float).tobytes(), float(EA), float(EI), tuple(restrained))
+
+
+
+def load_vectors(node_locs: np.ndarray, loads: beam_format.LoadTable) -> np.ndarray:
+    """
+    Returns the (n_dofs, n_cases)-shaped nodal load vectors of the 'loads' for each of their load cases.
+    The point loads are added all at once. Distributed loads are applied as the consistent nodal loads
+    of every element they cover, which requires a node at each of their ends (see mesh_locations).
+    """
+    forces = np.zeros((DOFS_PER_NODE * len(node_locs), len(loads.case_names)))
+    dofs = load_dofs(loads)
+    points = np.flatnonzero(loads.is_point)
+    point_nodes = np.array([node_index(node_locs, location) for location in loads.start_locs[points]], dtype=int)
+    np.add.at(forces, (DOFS_PER_NODE * point_nodes + dofs[points], loads.cases[points]), loads.start_mags[points])
+
+    for idx in np.flatnonzero(~loads.is_point):
+        if loads.directions[idx] == 'Mz':
+            raise ValueError("Distributed moments are not supported")
+        case = loads.cases[idx]
+        x1, x2 = loads.start_locs[idx], loads.end_locs[idx]
+        first, last = node_index(node_locs, x1), node_index(node_locs, x2)
+        starts, ends = node_locs[first:last], node_locs[first + 1:last + 1]
+        slope = (loads.end_mags[idx] - loads.start_mags[idx]) / (x2 - x1)
+        wa = loads.start_mags[idx] + slope * (starts - x1)
+        wb = loads.start_mags[idx] + slope * (ends - x1)
+        l = ends - starts
+        nodes = np.arange(first, last)
+        if loads.directions[idx] == 'Fx':
+            np.add.at(forces[:, case], DOFS_PER_NODE * nodes, l * (2 * wa + wb) / 6)
+            np.add.at(forces[:, case], DOFS_PER_NODE * (nodes + 1), l * (wa + 2 * wb) / 6)
+        else:
+            np.add.at(forces[:, case], DOFS_PER_NODE * nodes + 1, l * (7 * wa + 3 * wb) / 20)
+            np.add.at(forces[:, case], DOFS_PER_NODE * nodes + 2, l**2 * (3 * wa + 2 * wb) / 60)
+            np.add.at(forces[:, case], DOFS_PER_NODE * (nodes + 1) + 1, l * (3 * wa + 7 * wb) / 20)
+            np.add.at(forces[:, case], DOFS_PER_NODE * (nodes + 1) + 2, -l**2 * (2 * wa + 3 * wb) / 60)
+    return forces
+
+
+
+def solve_nodal(
+    beam_data: dict,
+    max_element_length: Optional[float] = None,
+    extra_locations: tuple = (),
+) -> dict:
+
+    """
+    Returns the nodal solution of every load case of 'beam_data' applied on its own:
+    'node_locs': (n_nodes,) mesh locations (see mesh_locations)
+    'case_names': the load case names (as in beams.load_case_names)
+    'loads': the beam_format.LoadTable of the loads
+    'displacements': (n_nodes, 3, n_cases)-shaped [dx, dy, rz] of each node
+    'support_locs': (n_supports,) sorted support locations
+    'reactions': (n_supports, 3, n_cases)-shaped [FX, FY, MZ] reactions of each support
+    """
+
+    node_locs = mesh_locations(beam_data, max_element_length, extra_locations)
+    loads = beams.load_table(beam_data)
+    case_names = loads.case_names
+    restrained = restrained_dofs(node_locs, beam_data["Supports"])
+    stiffness, free, lu = factorized_stiffness(
+        node_locs, beam_data["E"] * beam_data["A"], beam_data["E"] * beam_data["Iz"], restrained
+    )
+
+    forces = load_vectors(node_locs, loads)
+    displacements = np.zeros_like(forces)
+    displacements[free] = lu.solve(forces[free])
+    # One step of iterative refinement: fine meshes are ill-conditioned (the condition number grows
+    # with the fourth power of the number of elements), and this recovers most of the lost digits.
+    stiffness_free = stiffness[free][:, free]
+    displacements[free] += lu.solve(forces[free] - stiffness_free @ displacements[free])
+    reactions = (stiffness @ displacements - forces).reshape(len(node_locs), DOFS_PER_NODE, len(case_names))
+
+    support_locs = np.array(sorted(beam_data["Supports"]), dtype=float)
+    support_nodes = [node_index(node_locs, location) for location in support_locs]
+    return {
+        'node_locs': node_locs,
+        'case_names': case_names,
+        'loads': loads,
+        'displacements': displacements.reshape(len(node_locs), DOFS_PER_NODE, len(case_names)),
+        'support_locs': support_locs,
+        'reactions': reactions[support_nodes],
+    }
+
+
+
+def diagram_terms(nodal: dict, length: float, EI: float) -> diagrams.DiagramTerms:
+    """
+    Returns the loads and the support reactions in 'nodal' (see solve_nodal) as the diagrams.DiagramTerms
+    of its load cases, for a beam of 'length' and flexural stiffness 'EI', so that the diagrams can be
+    evaluated by diagrams.evaluate.
+    """
+
+    loads = nodal['loads']
+    n_supports, n_cases = len(nodal['support_locs']), len(nodal['case_names'])
+    magnitudes = loads.case_matrix()                                    # (n_loads, n_cases)
+    points, dists = loads.is_point, ~loads.is_point
+    # Every support reaction component is a point force, support by support.
+    reaction_dirs = np.array(list(LOAD_DOFS) * n_supports, dtype=object)
+    return diagrams.DiagramTerms(
+        length=length,
+        EI=EI,
+        point_locs=np.concatenate([np.repeat(nodal['support_locs'], len(LOAD_DOFS)), loads.start_locs[points]]),
+        point_dirs=np.concatenate([reaction_dirs, loads.directions[points]]),
+        point_mags=np.concatenate([
+            nodal['reactions'].reshape(n_supports * len(LOAD_DOFS), n_cases),
+            loads.start_mags[points, None] * magnitudes[points],
+        ]),
+        dist_starts=loads.start_locs[dists],
+        dist_ends=loads.end_locs[dists],
+        dist_dirs=loads.directions[dists],
+        dist_start_mags=loads.start_mags[dists, None] * magnitudes[dists],
+        dist_end_mags=loads.end_mags[dists, None] * magnitudes[dists],
+        deflection0=nodal['displacements'][0, 1],
+        slope0=nodal['displacements'][0, 2],
+    )
+
+
+
+def solve_unit_cases_sparse(
+    beam_data_structured: dict,
+    result_types: dict[str, Optional[str]],
+    n_points: int = 200,
+    max_element_length: Optional[float] = None,
+) -> dict:
+
+    """
+    Returns the same as beams.solve_unit_cases, solved with the sparse solver on an automatic mesh
+    (see mesh_locations). Only the result types and directions in SPARSE_RESULTS are available.
+    """
+
+    for result_type, direction in result_types.items():
+        if result_type not in SPARSE_RESULTS or direction not in (SPARSE_RESULTS[result_type], None):
+            raise ValueError(f"The sparse solver doesn't compute '{result_type}' in direction '{direction}'")
+
+    nodal = solve_nodal(beam_data_structured, max_element_length)
+    case_names = nodal['case_names']
+    x_locs = np.linspace(0, beam_data_structured["L"], n_points)
+    diagram_results = diagrams.evaluate(
+        diagram_terms(nodal, beam_data_structured["L"], beam_data_structured["E"] * beam_data_structured["Iz"]),
+        list(result_types),
+        x_locs,
+    )
+    unit_results = {result_type: (x_locs, case_names, diagram_results[result_type]) for result_type in result_types}
+
+    unit_results['reactions'] = reaction_results(nodal, nodal['reactions'], beam_data_structured["L"])
+    return unit_results
+
+
+
+def reaction_results(nodal: dict, support_reactions: np.ndarray, length: float) -> dict:
+    """
+    Returns the (n_supports, 3, n_cases)-shaped [FX, FY, MZ] 'support_reactions' of the supports in 'nodal'
+    (see solve_nodal), on a beam of 'length', in the format of beams.extract_reactions.
+    """
+    case_names = nodal['case_names']
+    n_supports = len(nodal['support_locs'])
+    reactions = np.zeros((n_supports, len(case_names), len(beams.REACTION_COMPONENTS)))
+    reactions[:, :, [0, 1, 5]] = np.moveaxis(support_reactions, 1, 2)
+    node_names = {location: name for name, location in beams.get_node_locations(list(nodal['support_locs']), length).items()}
+    max_reactions, min_reactions = beams.reaction_envelopes(reactions)
+    return {
+        'nodes': [node_names[location] for location in nodal['support_locs']],
+        'locations': nodal['support_locs'],
+        'combo_names': case_names,
+        'reactions': reactions,
+        'max': max_reactions,
+        'min': min_reactions,
+    }
+
+
+
+def node_index(node_locs: np.ndarray, location: float) -> int:
+    """
+    Returns the index of the node of the mesh 'node_locs' at 'location'. Raises a ValueError if there is none.
+    """
+    idx = int(np.searchsorted(node_locs, location - 1e-9 * max(node_locs[-1], 1.0)))
+    if idx == len(node_locs) or not np.isclose(node_locs[idx], location, rtol=0, atol=1e-6):
+        raise ValueError(f"There is no node at {location} in the mesh")
+    return idx
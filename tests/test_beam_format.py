@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+import beam_format
+import beams
+from utils import read_csv_text
+
+
+V1_BEAM = """Balcony transfer
+4800,24500,1200000000,1,1
+1000:P,3800:R
+POINT:Fy,-10000,4800,case:Live
+DIST:Fy,30,30,0,4800,case:Dead
+"""
+
+V2_BEAM = """BEAM_FORMAT:2
+"Balcony, transfer"
+4800,24500,1200000000,1e6,5000,2e6,0.3
+0:P,1000:P,3800:R,4800:R
+CASE:D,category:permanent,"description:Self weight, finishes"
+POINT:Fy,-10000,4800,case:L
+POINT:Mz,2.5e6,2400,case:L
+POINT:Fx,3000,2000,case:D
+POINT:Mx,1e5,3000,case:D
+CASE:S,psi0:0.7
+DIST:Fy,-30,-20,0,4800,case:D
+DIST:fx,1.5,1.5,0,4000,case:L
+"""
+
+
+@pytest.mark.parametrize('beam_text', [V1_BEAM, V2_BEAM])
+def test_beam_file_text_round_trip(beam_text):
+    beam_data = beams.get_structured_beam_data(read_csv_text(beam_text))
+    assert beams.get_structured_beam_data(read_csv_text(beam_format.beam_file_text(beam_data))) == beam_data
+
+
+def test_version_2_file_is_parsed():
+    beam_data = beams.get_structured_beam_data(read_csv_text(V2_BEAM))
+    assert beam_data["Name"] == "Balcony, transfer"
+    assert beam_data["Supports"] == {0.0: 'P', 1000.0: 'P', 3800.0: 'R', 4800.0: 'R'}
+    assert beam_data["Cases"] == {
+        'L': {}, 'D': {'category': 'permanent', 'description': 'Self weight, finishes'}, 'S': {'psi0': 0.7},
+    }
+    assert [load["Direction"] for load in beam_data["Loads"]] == ['Fy', 'Mz', 'Fx', 'Mx', 'Fy', 'Fx']
+    assert beam_data["Loads"][-1] == {
+        "Type": "Dist", "Direction": "Fx", "Start Magnitude": 1.5, "End Magnitude": 1.5,
+        "Start Location": 0.0, "End Location": 4000.0, "Case": "L",
+    }
+
+
+def test_load_table_matches_the_load_dicts():
+    beam_data = beams.get_structured_beam_data(read_csv_text(V2_BEAM))
+    loads = beam_data["LoadTable"]
+    assert loads == beam_format.LoadTable.from_dicts(beam_data["Loads"])
+    assert loads.to_dicts() == beam_data["Loads"]
+    assert loads.case_names == beams.load_case_names(beam_data) == ['L', 'D']
+    np.testing.assert_array_equal(loads.case_matrix().argmax(axis=1), loads.cases)
+
+
+@pytest.mark.parametrize('load_line', [
+    'POINT:Fz,-10000,4800,case:L',      # not a direction of a beam file
+    'DIST:Mz,1,1,0,4800,case:L',        # distributed loads are forces
+    'POINT:Fy,-10000,case:L',           # missing the location
+    'LINE:Fy,-10000,4800,case:L',
+    'DIST:Fy,-30,-30,2400,2400,case:D', # no length
+])
+def test_invalid_load_lines_raise(load_line):
+    with pytest.raises(ValueError):
+        beams.get_structured_beam_data(read_csv_text(V2_BEAM + load_line + '\n'))
+
+
+def test_zero_length_dist_load_of_a_version_1_file_raises():
+    with pytest.raises(ValueError, match='no length'):
+        beams.get_structured_beam_data(read_csv_text(V1_BEAM.replace('DIST:Fy,30,30,0,4800', 'DIST:Fy,30,30,4800,4800')))
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+import beams
+import pipeline
+from utils import read_csv_text
+
+
+# A trapezoidal load that runs across both internal supports
+TRAPEZOID_BEAM = """BEAM_FORMAT:2
+Trapezoid
+10000,200000,2e8,1,5000,1,0.3,1
+0:P,3000:R,7000:R,10000:R
+DIST:Fy,-10,-40,1000,9000,case:D
+"""
+
+
+def test_split_dist_load_interpolates_at_the_nodes():
+    load = {"Start Magnitude": -10.0, "End Magnitude": -30.0, "Start Location": 0.0, "End Location": 4000.0}
+    pieces = beams.split_dist_load(load, [0.0, 1000.0, 3000.0, 5000.0])
+    assert pieces == [(-10.0, -15.0, 0.0, 1000.0), (-15.0, -25.0, 1000.0, 3000.0), (-25.0, -30.0, 3000.0, 4000.0)]
+
+
+def test_split_dist_load_without_nodes_inside_is_one_piece():
+    load = {"Start Magnitude": 5.0, "End Magnitude": 5.0, "Start Location": 1000.0, "End Location": 2000.0}
+    assert beams.split_dist_load(load, [0.0, 1000.0, 2000.0, 4800.0]) == [(5.0, 5.0, 1000.0, 2000.0)]
+
+
+def test_trapezoidal_load_over_internal_supports_is_in_equilibrium():
+    # PyNite 0.0.93 applies a varying load across internal nodes wrong unless it is split there
+    # (see beams.split_dist_load): the reactions must balance the resultant and its moment.
+    beam_data = beams.get_structured_beam_data(read_csv_text(TRAPEZOID_BEAM))
+    reactions = beams.extract_reactions(beams.beam_model_from_data(beam_data, {'D': {'D': 1.0}}))
+    FY = reactions['reactions'][:, 0, 1]
+
+    w1, w2, x1, x2 = 10.0, 40.0, 1000.0, 9000.0
+    resultant = (w1 + w2) / 2 * (x2 - x1)
+    centroid = x1 + (x2 - x1) * (w1 + 2 * w2) / (3 * (w1 + w2))
+    assert FY.sum() == pytest.approx(resultant, rel=1e-9)
+    assert (FY * reactions['locations']).sum() == pytest.approx(resultant * centroid, rel=1e-9)
+
+
+def test_superpose_factors_the_case_axis():
+    case_results = np.array([[1.0, 2.0, 3.0], [10.0, 20.0, 30.0]])
+    combos = {'ULS': {'D': 1.35, 'L': 1.5}, 'D only': {'D': 1.0}, 'none': {}}
+    combo_results = beams.superpose(['D', 'L'], case_results, combos)
+    np.testing.assert_allclose(combo_results, [[16.35, 32.7, 49.05], [1.0, 2.0, 3.0], [0.0, 0.0, 0.0]])
+
+    reactions = np.stack([case_results, -case_results])[:, :, None]     # (n_supports, n_cases, 1)
+    np.testing.assert_allclose(beams.superpose(['D', 'L'], reactions, combos, axis=1)[:, :, 0], np.stack([combo_results, -combo_results]))
+
+
+def test_superposed_unit_cases_match_the_solved_combos():
+    beam_data = beams.get_structured_beam_data(read_csv_text(TRAPEZOID_BEAM.replace(
+        "DIST:Fy,-10,-40,1000,9000,case:D", "DIST:Fy,-10,-40,1000,9000,case:D\nPOINT:Fy,-5000,8000,case:L"
+    )))
+    combos = {'ULS': {'D': 1.35, 'L': 1.5}, 'SLS': {'D': 1.0, 'L': 1.0}}
+    result_types = {'moment': 'Mz', 'shear': 'Fy', 'deflection': 'dy'}
+    superposed = beams.superpose_results(beams.solve_unit_cases(beam_data, result_types), combos)
+    solved = beams.extract_result_tensors(beams.beam_model_from_data(beam_data, combos), result_types)
+    for result_type in result_types:
+        assert superposed[result_type][1] == solved[result_type][1] == list(combos)
+        np.testing.assert_allclose(superposed[result_type][2], solved[result_type][2], atol=1e-9 * np.abs(solved[result_type][2]).max())
+
+
+def test_beam_without_loads_has_zero_results():
+    results = pipeline.analyze("Unloaded\n4800,24500,1200000000\n0:P,4800:R\n", {'ULS': {'D': 1.35}})
+    assert results['moment'][1] == ['ULS']
+    assert not results['moment'][2].any()
+    assert results['reactions']['reactions'].shape == (2, 1, 6)
+    assert not results['reactions']['max'].any()
+
+
+def test_only_pynite_default_combo_is_dropped():
+    beam_data = beams.get_structured_beam_data(read_csv_text(TRAPEZOID_BEAM))
+    model = beams.build_beam(beam_data)
+    model.add_load_combo('ULS', {'D': 1.35})
+    assert beams.extract_result_tensor(model, 'moment', 'Mz')[1] == ['ULS']
+
+    model = beams.beam_model_from_data(beam_data, {'Combo 1': {'Case 1': 1.0}, 'ULS': {'D': 1.35}})
+    assert beams.extract_result_tensor(model, 'moment', 'Mz')[1] == ['Combo 1', 'ULS']
+    assert beams.extract_reactions(model)['combo_names'] == ['Combo 1', 'ULS']
+
+
+def test_edited_loads_are_not_served_from_a_stale_load_table():
+    beam_data = beams.get_structured_beam_data(read_csv_text(TRAPEZOID_BEAM))
+    assert beams.load_table(beam_data) is beam_data['LoadTable']
+
+    edited = {**beam_data, 'Loads': [{**beam_data['Loads'][0], 'Start Magnitude': -20.0, 'Case': 'L'}]}
+    assert beams.load_table(edited).to_dicts() == edited['Loads']
+    assert beams.load_case_names(edited) == ['L']
+    solved = beams.solve_unit_cases(edited, {'moment': 'Mz'})['moment']
+    rebuilt = beams.solve_unit_cases({**edited, 'LoadTable': None}, {'moment': 'Mz'})['moment']
+    assert solved[1] == rebuilt[1] == ['L']
+    np.testing.assert_array_equal(solved[2], rebuilt[2])
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from design_checks import bending_resistance, design_checks, shear_resistance
+from serviceability import deflection_checks, span_stations
+
+
+SECTION = {'S': 5e5, 'Fy': 355, 'Av': 2500, 'E': 210000, 'G': 81000, 'Iy': 8e6, 'J': 2e5}
+
+
+def moment_and_shear(x_locs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    moments = np.vstack([50e6 * np.sin(np.pi * x_locs / x_locs[-1]), -20e6 * np.cos(np.pi * x_locs / x_locs[-1])])
+    shears = np.vstack([40e3 * np.cos(np.pi * x_locs / x_locs[-1]), 10e3 * np.sin(np.pi * x_locs / x_locs[-1])])
+    return moments, shears
+
+
+def test_utilisations_and_governing():
+    x_locs = np.linspace(0, 10000, 101)
+    moments, shears = moment_and_shear(x_locs)
+    checks = design_checks(x_locs, ['ULS1', 'ULS2'], moments, shears, SECTION, [0, 10000])
+
+    np.testing.assert_allclose(checks['utilisation']['bending'], np.abs(moments) / bending_resistance(SECTION, 1.1))
+    np.testing.assert_allclose(checks['utilisation']['shear'], np.abs(shears) / shear_resistance(SECTION, 1.1))
+    bending = checks['governing']['bending']
+    assert bending['combo'] == 'ULS1' and bending['location'] == 5000.0
+    # Buckling can only reduce the bending resistance
+    assert np.all(checks['utilisation']['ltb'] >= checks['utilisation']['bending'] - 1e-12)
+    overall = checks['governing']['overall']
+    assert overall['utilisation'] == max(checks['governing'][check]['utilisation'] for check in checks['utilisation'])
+
+
+def test_ltb_is_not_checked_without_the_section_properties():
+    x_locs = np.linspace(0, 10000, 101)
+    moments, shears = moment_and_shear(x_locs)
+    checks = design_checks(x_locs, ['ULS1', 'ULS2'], moments, shears, {'S': 5e5, 'Fy': 355, 'Av': 2500}, [0, 10000])
+    assert 'ltb' not in checks['utilisation']
+
+
+def test_segment_shorter_than_the_station_spacing():
+    x_locs = np.linspace(0, 10000, 11)
+    moments, shears = moment_and_shear(x_locs)
+    checks = design_checks(x_locs, ['ULS1', 'ULS2'], moments, shears, SECTION, [0, 4500, 4800, 10000])
+    ltb = checks['utilisation']['ltb']
+    assert np.all(np.isfinite(ltb))
+    assert np.all(ltb >= checks['utilisation']['bending'] - 1e-12)
+
+
+def test_span_stations_falls_back_to_the_nearest_stations():
+    x_locs = np.linspace(0, 10000, 11)
+    np.testing.assert_array_equal(span_stations(x_locs, {'start': 4500, 'end': 4800}), [4, 5])
+    np.testing.assert_array_equal(span_stations(x_locs, {'start': 0, 'end': 2000}), [0, 1, 2])
+
+
+@pytest.mark.parametrize('supports', [[0, 10000], [0, 4500, 4800, 10000]])
+def test_deflection_checks(supports):
+    x_locs = np.linspace(0, 10000, 11)
+    families = {'characteristic': {'SLS-C': {}}}
+    deflections = -20 * np.sin(np.pi * x_locs / 10000)[None, :]
+    checks = deflection_checks(x_locs, ['SLS-C'], deflections, supports, families, {'characteristic': 300})
+    assert len(checks) == len(supports) - 1
+    if len(supports) == 2:
+        assert checks[0]['deflection'] == pytest.approx(20.0)
+        assert checks[0]['ratio'] == pytest.approx(500.0) and checks[0]['ok']
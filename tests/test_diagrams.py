@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+import beams
+import diagrams
+import sparse_beam
+from utils import read_csv_text
+
+
+# Axial, moment and torque loads, which the generated beams of benchmarks.beam_corpus don't have
+BEAM_TEMPLATE = """BEAM_FORMAT:2
+Mixed loads
+6000,200000,3e8,1e8,8000,5e7,0.3,1
+{supports}
+POINT:Fy,-20000,5000,case:D
+POINT:Mz,4e6,2400,case:D
+POINT:Mz,-1.5e6,6000,case:L
+POINT:Fx,15000,1800,case:L
+POINT:Mx,2e5,3000,case:L
+DIST:Fx,-2,-6,500,4500,case:D
+DIST:Fy,-10,-25,0,6000,case:L
+"""
+
+SUPPORTS = ['0:P,6000:R', '0:F', '1000:P,3000:R,5000:R']
+
+COMBOS = {'D': {'D': 1.0}, 'L': {'L': 1.0}, 'ULS': {'D': 1.35, 'L': 1.5}}
+
+
+def beam_data(supports: str, without_torque: bool = False) -> dict:
+    text = BEAM_TEMPLATE.format(supports=supports)
+    if without_torque:
+        text = '\n'.join(line for line in text.splitlines() if not line.startswith('POINT:Mx'))
+    return beams.get_structured_beam_data(read_csv_text(text))
+
+
+def assert_close(actual, expected, rtol=1e-7):
+    np.testing.assert_allclose(actual, expected, atol=rtol * max(np.abs(expected).max(), 1e-12))
+
+
+@pytest.mark.parametrize('supports', SUPPORTS)
+def test_evaluate_matches_pynite(supports):
+    model = beams.beam_model_from_data(beam_data(supports), COMBOS)
+    model.analyze()
+    combo_names = beams.result_combo_names(model)
+    terms = beams.diagram_terms(model, combo_names)
+    assert terms is not None
+
+    reference = beams.extract_result_tensors(model, diagrams.KERNEL_RESULTS, 301, kernel=False)
+    x_locs = reference['moment'][0]
+    evaluated = diagrams.evaluate(terms, list(diagrams.KERNEL_RESULTS), x_locs)
+    for result_type in diagrams.KERNEL_RESULTS:
+        assert reference[result_type][1] == combo_names
+        assert_close(evaluated[result_type], reference[result_type][2])
+
+
+@pytest.mark.parametrize('supports', SUPPORTS)
+def test_sparse_solver_matches_pynite(supports):
+    data = beam_data(supports, without_torque=True)
+    result_types = dict(sparse_beam.SPARSE_RESULTS)
+    reference = beams.solve_unit_cases(data, result_types, 301)
+    solved = sparse_beam.solve_unit_cases_sparse(data, result_types, 301)
+    for result_type in result_types:
+        assert solved[result_type][1] == reference[result_type][1]
+        assert_close(solved[result_type][2], reference[result_type][2])
+    assert solved['reactions']['nodes'] == reference['reactions']['nodes']
+    assert_close(solved['reactions']['reactions'], reference['reactions']['reactions'])
+
+
+def test_sparse_solver_rejects_torques():
+    with pytest.raises(ValueError, match="in-plane"):
+        sparse_beam.solve_unit_cases_sparse(beam_data(SUPPORTS[0]), {'moment': 'Mz'})
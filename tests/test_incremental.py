@@ -0,0 +1,63 @@
+import numpy as np
+
+import beams
+import load_factors as lf
+from incremental import IncrementalAnalysis
+from utils import read_csv_text
+
+
+BEAM = """Three spans
+12000,200000,3.5e8
+0:P,4000:R,8000:R,12000:R
+POINT:Fy,-20000,2000,case:L
+POINT:Fy,-10000,10000,case:S
+DIST:Fy,-8,-12,0,12000,case:D
+"""
+
+RESULT_TYPES = {'moment': 'Mz', 'shear': 'Fy', 'deflection': 'dy'}
+
+
+def assert_matches_full_solve(model, beam_data, load_combos):
+    expected = beams.extract_result_tensors(beams.beam_model_from_data(beam_data, load_combos), RESULT_TYPES)
+    for result_type, (x_locs, combo_names, results) in beams.extract_result_tensors(model, RESULT_TYPES).items():
+        assert combo_names == expected[result_type][1]
+        np.testing.assert_allclose(results, expected[result_type][2], atol=1e-9 * np.abs(expected[result_type][2]).max())
+    np.testing.assert_allclose(beams.extract_reactions(model)['reactions'], beams.extract_reactions(beams.beam_model_from_data(beam_data, load_combos))['reactions'], atol=1e-6)
+
+
+def test_editing_one_load_only_solves_its_case():
+    load_combos = lf.flatten_combos(lf.ec_combo_library())
+    analysis = IncrementalAnalysis(load_combos)
+    beam_data = beams.get_structured_beam_data(read_csv_text(BEAM))
+    assert_matches_full_solve(analysis.analyze(beam_data), beam_data, load_combos)
+    assert analysis.last_change == 'stiffness'
+
+    loads = [dict(load) for load in beam_data["Loads"]]
+    loads[0]["Magnitude"] = -35000.0
+    edited = {**beam_data, "Loads": loads, "LoadTable": None}
+    model = analysis.analyze(edited)
+    assert analysis.last_change == 'loads'
+    assert analysis.last_solved_cases == ['L']
+    assert_matches_full_solve(model, edited, load_combos)
+
+    analysis.analyze(edited)
+    assert analysis.last_change == 'none'
+    assert analysis.last_solved_cases == []
+
+
+def test_editing_a_support_solves_every_case():
+    load_combos = lf.ec_eurocode_combs()
+    analysis = IncrementalAnalysis(load_combos)
+    beam_data = beams.get_structured_beam_data(read_csv_text(BEAM))
+    analysis.analyze(beam_data)
+    moved = {**beam_data, "Supports": {0.0: 'P', 4500.0: 'R', 8000.0: 'R', 12000.0: 'R'}}
+    model = analysis.analyze(moved)
+    assert analysis.last_change == 'stiffness'
+    assert sorted(analysis.last_solved_cases) == ['D', 'L', 'S']
+    assert_matches_full_solve(model, moved, load_combos)
+
+
+def test_no_load_combos():
+    beam_data = beams.get_structured_beam_data(read_csv_text(BEAM))
+    model = IncrementalAnalysis({}).analyze(beam_data)
+    assert beams.result_combo_names(model) == [beams.DEFAULT_COMBO]
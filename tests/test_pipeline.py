@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import pipeline
+from compact_results import CompactResults
+from result_store import ResultStore
+
+
+BEAM = """Two spans
+9000,200000,4e8
+0:P,4000:R,9000:R
+POINT:Fy,-25000,2000,case:L
+DIST:Fy,-15,-15,0,9000,case:D
+"""
+
+
+def assert_same_results(actual, expected, rtol=1e-12):
+    for result_type in pipeline.DEFAULT_RESULTS:
+        assert list(actual[result_type][1]) == list(expected[result_type][1])
+        np.testing.assert_allclose(actual[result_type][2], expected[result_type][2], atol=rtol * np.abs(expected[result_type][2]).max())
+
+
+def test_store_hit_returns_the_solved_results(tmp_path):
+    store = ResultStore(str(tmp_path))
+    expected = pipeline.analyze(BEAM)
+    miss = pipeline.analyze(BEAM, store=store)
+    n_entries = len(store.entries())
+    hit = pipeline.analyze(BEAM, store=store)
+    assert len(store.entries()) == n_entries
+    assert_same_results(miss, expected)
+    assert_same_results(hit, expected)
+    np.testing.assert_allclose(hit['reactions']['reactions'], expected['reactions']['reactions'])
+
+
+def test_compact_results(tmp_path):
+    expected = pipeline.analyze_many([BEAM, BEAM])
+    for compact in [*pipeline.analyze_many([BEAM, BEAM], compact=True), pipeline.analyze(BEAM, store=ResultStore(str(tmp_path), compact=True), compact=True)]:
+        assert isinstance(compact, CompactResults)
+        assert_same_results(compact, expected[0], rtol=1e-6)
+    with pytest.raises(ValueError):
+        pipeline.analyze(BEAM, compact=True, sensitivities=['E'])
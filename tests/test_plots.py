@@ -0,0 +1,21 @@
+import numpy as np
+
+from plots import minmax_indices
+
+
+def test_minmax_indices_example():
+    np.testing.assert_array_equal(minmax_indices(np.array([0, 5, 1, 2, -4, 3, 0, 0]), 6), [0, 1, 4, 5, 7])
+
+
+def test_minmax_indices_keeps_everything_below_max_points():
+    np.testing.assert_array_equal(minmax_indices(np.zeros((3, 50)), 100), np.arange(50))
+
+
+def test_minmax_indices_keeps_the_extremes_of_every_row():
+    results = np.random.default_rng(0).normal(size=(4, 10001))
+    keep = minmax_indices(results, 800)
+    assert len(keep) <= 800
+    assert keep[0] == 0 and keep[-1] == 10000
+    assert np.all(np.diff(keep) > 0)
+    np.testing.assert_array_equal(results[:, keep].max(axis=1), results.max(axis=1))
+    np.testing.assert_array_equal(results[:, keep].min(axis=1), results.min(axis=1))
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+import beams
+import reliability
+from utils import read_csv_text
+
+
+BEAM = """Reliability
+6000,200000,4e7
+0:P,6000:R
+POINT:Fy,-10000,3000,case:L
+DIST:Fy,-5,-5,0,6000,case:D
+"""
+
+FIXED = {'distribution': 'fixed', 'mean': 1.0}
+
+
+@pytest.mark.parametrize('distribution', ['normal', 'lognormal', 'gumbel'])
+def test_samples_have_the_model_mean_and_cov(distribution):
+    samples = reliability.sample(np.random.default_rng(1), {'distribution': distribution, 'mean': 0.7, 'cov': 0.3}, 200_000)
+    assert samples.mean() == pytest.approx(0.7, rel=1e-2)
+    assert samples.std() / samples.mean() == pytest.approx(0.3, rel=2e-2)
+
+
+def test_unknown_distribution_raises():
+    with pytest.raises(ValueError):
+        reliability.sample(np.random.default_rng(1), {'distribution': 'uniform', 'mean': 1.0}, 10)
+
+
+def test_failure_probability():
+    failure = reliability.failure_probability(np.array([1.0, 2.0, 3.0, 4.0]), 3.5)
+    assert failure['probability'] == 0.25 and failure['n_failures'] == 1
+    assert failure['reliability_index'] == pytest.approx(0.6745, abs=1e-4)
+    assert reliability.failure_probability(np.array([1.0]), 3.5)['reliability_index'] == np.inf
+
+
+def test_fixed_models_give_the_nominal_results():
+    beam_data = beams.get_structured_beam_data(read_csv_text(BEAM))
+    results = reliability.monte_carlo(beam_data, n_samples=50, seed=0, load_models={'D': FIXED, 'L': FIXED}, stiffness_models={}, n_points=61)
+    nominal = beams.superpose_results(beams.solve_unit_cases(beam_data, reliability.RELIABILITY_RESULTS, 61), {'nominal': {'D': 1.0, 'L': 1.0}})
+    for result_type in reliability.RELIABILITY_RESULTS:
+        atol = 1e-9 * np.abs(nominal[result_type][2]).max()
+        np.testing.assert_allclose(results[result_type]['mean'], nominal[result_type][2][0], atol=atol)
+        np.testing.assert_allclose(results[result_type]['std'], 0.0, atol=atol)
+
+
+def test_runs_with_a_seed_repeat():
+    first, second = (reliability.monte_carlo(BEAM, n_samples=500, seed=7, section={'S': 2e5, 'Fy': 355}) for _ in range(2))
+    np.testing.assert_array_equal(first['moment']['quantiles'][0.95], second['moment']['quantiles'][0.95])
+    assert first['failure'] == second['failure']
+    assert first['moment']['quantiles'][0.05].min() <= first['moment']['quantiles'][0.95].min()
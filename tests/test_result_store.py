@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+import pytest
+
+from result_store import TMP_PREFIX, ResultStore
+
+
+def all_combos(scale: float = 1.0, n_points: int = 50) -> dict:
+    x = np.linspace(0, 5000, n_points)
+    return {
+        'ULS': np.array([x, scale * np.sin(x / 1000)]),
+        'SLS': np.array([x, -scale * np.cos(x / 1000)]),
+    }
+
+
+def test_round_trip(tmp_path):
+    store = ResultStore(str(tmp_path))
+    key = store.key('beam', 1)
+    assert store.get(key) is None and store.get_envelope(key) is None
+    results = all_combos()
+    store.put(key, results)
+
+    stored = store.get(key)
+    assert list(stored) == ['ULS', 'SLS']
+    for combo_name, arrays in results.items():
+        np.testing.assert_array_equal(stored[combo_name], arrays)
+    x_locs, combo_names, tensor = store.get_tensor(key)
+    np.testing.assert_array_equal(x_locs, results['ULS'][0])
+    assert combo_names == ['ULS', 'SLS']
+    envelope = store.get_envelope(key)
+    np.testing.assert_array_equal(envelope[1], np.maximum(results['ULS'][1], results['SLS'][1]))
+    np.testing.assert_array_equal(envelope[2], np.minimum(results['ULS'][1], results['SLS'][1]))
+
+
+def test_compact_store_has_its_own_keys(tmp_path):
+    store, compact_store = ResultStore(str(tmp_path)), ResultStore(str(tmp_path), compact=True)
+    assert store.key('beam', 1) != compact_store.key('beam', 1)
+    key = compact_store.key('beam', 1)
+    compact_store.put(key, all_combos())
+    assert compact_store.get(key)['ULS'].dtype == np.float32
+
+
+def test_reactions_round_trip(tmp_path):
+    store = ResultStore(str(tmp_path))
+    reactions = {'nodes': ['N0', 'N1'], 'locations': np.array([0.0, 5000.0]), 'combo_names': ['ULS', 'SLS'], 'reactions': np.arange(24.0).reshape(2, 2, 6)}
+    store.put_reactions(store.key('reactions'), reactions)
+    stored = store.get_reactions(store.key('reactions'))
+    assert stored['nodes'] == ['N0', 'N1'] and stored['combo_names'] == ['ULS', 'SLS']
+    np.testing.assert_array_equal(stored['reactions'], reactions['reactions'])
+    np.testing.assert_array_equal(stored['max'], reactions['reactions'].max(axis=1))
+
+
+def test_empty_results_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ResultStore(str(tmp_path)).put('key', {})
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    entry_bytes = (2 * 2 * 50 + 3 * 50) * 8
+    store = ResultStore(str(tmp_path), max_bytes=int(2.5 * entry_bytes))
+    keys = [store.key('beam', idx) for idx in range(3)]
+    store.put(keys[0], all_combos(1))
+    store.put(keys[1], all_combos(2))
+    # Using the oldest entry, through its envelope alone, keeps it over the second one
+    os.utime(os.path.join(store._entry_dir(keys[0]), 'meta.json'), (0, 0))
+    os.utime(os.path.join(store._entry_dir(keys[1]), 'meta.json'), (1, 1))
+    store.get_envelope(keys[0])
+    store.put(keys[2], all_combos(3))
+
+    assert store.get(keys[1]) is None
+    assert store.get(keys[0]) is not None and store.get(keys[2]) is not None
+    assert sum(size for _, size, _ in store.entries()) <= store.max_bytes
+
+
+def test_storing_an_existing_key_does_not_count_twice(tmp_path):
+    store = ResultStore(str(tmp_path))
+    key = store.key('beam', 1)
+    store.put(key, all_combos())
+    n_bytes = store._bytes
+    store.put(key, all_combos())
+    assert store._bytes == n_bytes == sum(size for _, size, _ in store.entries())
+
+
+def test_entries_skip_unfinished_writes(tmp_path):
+    store = ResultStore(str(tmp_path))
+    key = store.key('beam', 1)
+    store.put(key, all_combos())
+    os.makedirs(os.path.join(os.path.dirname(store._entry_dir(key)), TMP_PREFIX + 'abc'))
+    assert [entry_dir for _, _, entry_dir in store.entries()] == [store._entry_dir(key)]
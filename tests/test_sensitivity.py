@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+import beams
+import sensitivity
+from benchmarks.beam_corpus import random_beam_lines
+from benchmarks.sensitivity_check import check_beam
+from utils import read_csv_text
+
+
+# Axial and transverse loads, a load on an internal support and a fixed end
+BEAM = """BEAM_FORMAT:2
+Sensitivity
+8000,200000,3e7,1,6000,1,0.3,1
+0:F,3000:R,8000:P
+POINT:Fy,-8000,3000,case:L
+POINT:Fx,5000,6000,case:L
+DIST:Fy,-10,-25,0,8000,case:D
+"""
+
+
+@pytest.mark.parametrize('beam_text', [BEAM] + ['\n'.join(random_beam_lines(np.random.default_rng(seed))) for seed in (3, 11)], ids=['loaded support', 'random 3', 'random 11'])
+def test_sensitivities_match_finite_differences(beam_text):
+    beam_data = beams.get_structured_beam_data(read_csv_text(beam_text))
+    for kind, error in check_beam(beam_data, rel_step=1e-3, n_points=101).items():
+        tolerance = 1e-2 if kind.startswith('x:') else 1e-4
+        assert error < tolerance, kind
+
+
+def test_unknown_parameters_raise():
+    beam_data = beams.get_structured_beam_data(read_csv_text(BEAM))
+    with pytest.raises(ValueError):
+        sensitivity.solve_unit_case_sensitivities(beam_data, {'moment': 'Mz'}, ['nu'])
+    with pytest.raises(ValueError):
+        sensitivity.solve_unit_case_sensitivities(beam_data, {'moment': 'Mz'}, [sensitivity.support_parameter(1234.0)])
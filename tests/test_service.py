@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import pytest
+
+import service
+from benchmarks.bench_pipeline import generate_beam_lines
+
+
+BEAM_TEXT = '\n'.join(generate_beam_lines(3, 2, 1))
+
+
+def request(app: service.AnalysisService, method: str, path: str, payload: dict = None) -> tuple[int, dict]:
+    """
+    Sends one request to the ASGI 'app' and returns the (status, JSON body) of the response.
+    """
+    sent = []
+    messages = [{'type': 'http.request', 'body': json.dumps(payload or {}).encode()}]
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'headers': [(b'content-type', b'application/json')]}
+    asyncio.run(app(scope, receive, send))
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+
+@pytest.fixture
+def app():
+    app = service.AnalysisService(max_workers=1, max_pending=4, batch_size=2)
+    yield app
+    app.shutdown()
+
+
+def test_health(app):
+    assert request(app, 'GET', '/health') == (200, {'status': 'ok', 'pending': 0, 'max_pending': 4})
+
+
+def test_analyze_batch(app):
+    status, body = request(app, 'POST', '/analyze', {'beams': [BEAM_TEXT] * 3, 'n_points': 50})
+    assert status == 200 and len(body['beams']) == 3
+    assert body['beams'][0] == body['beams'][2]
+    assert len(body['beams'][0]['results']['moment']['x']) == 50
+
+
+def test_oversize_batch_is_refused(app):
+    status, body = request(app, 'POST', '/analyze', {'beams': [BEAM_TEXT] * 5})
+    assert status == 413 and 'split' in body['error']
+
+
+@pytest.mark.parametrize('n_points', [0, 1, service.MAX_N_POINTS + 1, 'many'])
+def test_n_points_out_of_range(app, n_points):
+    status, body = request(app, 'POST', '/analyze', {'beam': BEAM_TEXT, 'n_points': n_points})
+    assert status == 400
+
+
+def test_unknown_path(app):
+    assert request(app, 'GET', '/nope')[0] == 404
@@ -0,0 +1,60 @@
+import json
+import threading
+
+import tracing
+
+
+@tracing.traced('work')
+def work(value: int) -> int:
+    return value * 2
+
+
+def test_nothing_is_recorded_without_an_active_tracer():
+    tracer = tracing.Tracer()
+    assert work(2) == 4
+    assert tracing.stage('parse') is tracing._NO_TRACE
+    assert tracer.summary() == {}
+
+
+def test_stages_and_traced_calls_are_recorded():
+    with tracing.Tracer() as tracer:
+        work(1)
+        work(2)
+        with tracing.stage('parse'):
+            pass
+    work(3)
+
+    summary = tracer.summary()
+    assert summary['work']['count'] == 2 and summary['parse']['count'] == 1
+    assert summary['work']['max'] <= summary['work']['total']
+    events = json.loads(tracer.to_chrome_trace())['traceEvents']
+    assert [event['name'] for event in events] == ['work', 'work', 'parse']
+    prometheus = tracer.to_prometheus()
+    assert 'beam_stage_calls_total{stage="work"} 2' in prometheus
+    assert 'beam_stage_seconds_bucket{stage="work",le="+Inf"} 2' in prometheus
+
+
+def test_tracers_of_other_threads_are_separate():
+    recorded = {}
+
+    def session(name: str, n_calls: int):
+        with tracing.Tracer() as tracer:
+            for value in range(n_calls):
+                work(value)
+        recorded[name] = tracer.summary()['work']['count']
+
+    threads = [threading.Thread(target=session, args=(f'session {idx}', idx + 1)) for idx in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert recorded == {f'session {idx}': idx + 1 for idx in range(4)}
+
+
+def test_export(tmp_path):
+    with tracing.Tracer() as tracer:
+        work(1)
+    tracer.export(str(tmp_path / 'trace.json'))
+    tracer.export(str(tmp_path / 'trace.prom'))
+    assert json.loads((tmp_path / 'trace.json').read_text())['traceEvents'][0]['name'] == 'work'
+    assert (tmp_path / 'trace.prom').read_text() == tracer.to_prometheus()
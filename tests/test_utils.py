@@ -0,0 +1,32 @@
+import numpy as np
+
+import beam_format
+from utils import content_hash
+
+
+def test_content_hash_ignores_dict_order():
+    assert content_hash({'a': 1, 'b': [1, 2]}) == content_hash({'b': [1, 2], 'a': 1})
+    assert content_hash({'a': 1}) != content_hash({'a': 2})
+
+
+def test_content_hash_sees_every_element_of_large_arrays():
+    # The repr of a large array is truncated with '...', so it can't tell these apart
+    values = np.zeros(5000)
+    changed = values.copy()
+    changed[2500] = 1e-9
+    assert repr(values) == repr(changed)
+    assert content_hash(values) != content_hash(changed)
+    assert content_hash(values) == content_hash(values.copy())
+    assert content_hash(np.int64(3)) == content_hash(3)
+
+
+def test_content_hash_of_a_load_table_is_its_loads():
+    loads = [
+        {"Type": "Dist", "Direction": "Fy", "Start Magnitude": -10.0, "End Magnitude": -10.0,
+         "Start Location": 0.0, "End Location": 1000.0 + idx, "Case": "D"}
+        for idx in range(2000)
+    ]
+    table = beam_format.LoadTable.from_dicts(loads)
+    changed = beam_format.LoadTable.from_dicts([*loads[:-1], {**loads[-1], "Start Magnitude": -11.0}])
+    assert content_hash(table) == content_hash(loads)
+    assert content_hash(table) != content_hash(changed)
@@ -0,0 +1,181 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
+
+HISTOGRAM_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+_ACTIVE_TRACER: ContextVar[Optional["Tracer"]] = ContextVar('active_tracer', default=None)
+_NO_TRACE = nullcontext()
+
+
+class Tracer:
+    """
+    Collects the time spent in each stage of the beam pipeline (parse, build, analyze, sample, plot).
+
+    Tracing is off unless a Tracer is active, and it is only active inside its own 'with' block:
+
+        with tracing.Tracer() as tracer:
+            model = beams.load_beam_model(filename, load_combos)
+            ...
+        tracer.summary()            # {'analyze': {'count': 1, 'total': 0.03, ...}, ...}
+        tracer.to_chrome_trace()    # JSON for chrome://tracing or https://ui.perfetto.dev
+        tracer.to_prometheus()      # Prometheus text exposition format
+
+    Each stage gets a call counter (e.g. how many times analyze() ran) and a duration histogram.
+    The active tracer is held in a context variable so that concurrent Streamlit sessions,
+    each running on their own thread, don't record into each other's tracers.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.counts = {}
+        self.totals = {}
+        self.buckets = {}
+        self._lock = threading.Lock()
+        self._token = None
+        self._origin = time.perf_counter()
+
+    def __enter__(self):
+        self._token = _ACTIVE_TRACER.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _ACTIVE_TRACER.reset(self._token)
+        self._token = None
+
+    def record(self, name: str, start: float, duration: float):
+        """
+        Records one call of the stage 'name' that started at 'start' (time.perf_counter()) and
+        lasted 'duration' seconds.
+        """
+        with self._lock:
+            self.events.append((name, start - self._origin, duration, threading.get_ident()))
+            self.counts[name] = self.counts.get(name, 0) + 1
+            self.totals[name] = self.totals.get(name, 0.0) + duration
+            buckets = self.buckets.setdefault(name, [0] * (len(HISTOGRAM_BUCKETS) + 1))
+            buckets[bisect_left(HISTOGRAM_BUCKETS, duration)] += 1
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """
+        Returns {stage: {'count', 'total', 'mean', 'max'}} with times in seconds.
+        """
+        summary = {}
+        for name, count in self.counts.items():
+            durations = [duration for event_name, _, duration, _ in self.events if event_name == name]
+            summary[name] = {
+                'count': count,
+                'total': self.totals[name],
+                'mean': self.totals[name] / count,
+                'max': max(durations),
+            }
+        return summary
+
+    def to_chrome_trace(self) -> str:
+        """
+        Returns the recorded stages as Chrome trace event JSON (complete "X" events, in microseconds).
+        """
+        pid = os.getpid()
+        trace_events = [
+            {
+                'name': name,
+                'cat': 'beam_pipeline',
+                'ph': 'X',
+                'ts': start * 1e6,
+                'dur': duration * 1e6,
+                'pid': pid,
+                'tid': thread_id,
+            }
+            for name, start, duration, thread_id in self.events
+        ]
+        return json.dumps({'traceEvents': trace_events})
+
+    def to_prometheus(self) -> str:
+        """
+        Returns the stage counters and duration histograms in the Prometheus text exposition format.
+        """
+        lines = [
+            '# HELP beam_stage_calls_total Number of calls of each beam pipeline stage.',
+            '# TYPE beam_stage_calls_total counter',
+        ]
+        for name, count in self.counts.items():
+            lines.append(f'beam_stage_calls_total{{stage="{name}"}} {count}')
+
+        lines += [
+            '# HELP beam_stage_seconds Duration of each beam pipeline stage.',
+            '# TYPE beam_stage_seconds histogram',
+        ]
+        for name, buckets in self.buckets.items():
+            cumulative = 0
+            for upper_bound, bucket_count in zip(HISTOGRAM_BUCKETS + ('+Inf',), buckets):
+                cumulative += bucket_count
+                lines.append(f'beam_stage_seconds_bucket{{stage="{name}",le="{upper_bound}"}} {cumulative}')
+            lines.append(f'beam_stage_seconds_sum{{stage="{name}"}} {self.totals[name]}')
+            lines.append(f'beam_stage_seconds_count{{stage="{name}"}} {self.counts[name]}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, filename: str):
+        """
+        Writes the trace to 'filename': Chrome trace JSON if it ends in '.json', otherwise the
+        Prometheus text format (e.g. for a node_exporter textfile collector '.prom' file).
+        """
+        if filename.endswith('.json'):
+            content = self.to_chrome_trace()
+        else:
+            content = self.to_prometheus()
+        with open(filename, 'w') as file:
+            file.write(content)
+
+
+
+class _Stage:
+    __slots__ = ('tracer', 'name', 'start')
+
+    def __init__(self, tracer: Tracer, name: str):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.tracer.record(self.name, self.start, time.perf_counter() - self.start)
+
+
+
+def stage(name: str):
+    """
+    Returns a context manager that records the time spent in its block as the stage 'name' of the
+    active Tracer. When no Tracer is active, a shared no-op context manager is returned.
+    """
+    tracer = _ACTIVE_TRACER.get()
+    if tracer is None:
+        return _NO_TRACE
+    return _Stage(tracer, name)
+
+
+
+def traced(name: str):
+    """
+    Decorator that records every call of the decorated function as the stage 'name'.
+    When no Tracer is active, the only overhead is one context variable lookup.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _ACTIVE_TRACER.get()
+            if tracer is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.record(name, start, time.perf_counter() - start)
+        return wrapper
+    return decorator
@@ -0,0 +1,101 @@
+"""
+Units at the edges, raw floats in the middle.
+
+The beam models and every result array are in one consistent set of model units (N, mm, N.mm, MPa)
+and the numeric core never sees anything else. A unit is only looked up here when a value crosses the
+boundary: the lookup returns one float scale factor, which is then applied to a whole NumPy array at once
+(e.g. 'moments * result_scale("moment", "kN.m")'), so there is no per-element unit object overhead.
+"""
+from typing import Optional
+
+
+MODEL_UNITS = {
+    'force': 'N',
+    'length': 'mm',
+    'moment': 'N.mm',
+    'stress': 'MPa',
+}
+
+# The size of one of each unit, in model units.
+UNIT_SIZES = {
+    'force': {'N': 1.0, 'kN': 1e3, 'MN': 1e6, 'lbf': 4.4482216152605, 'kip': 4448.2216152605},
+    'length': {'mm': 1.0, 'cm': 10.0, 'm': 1e3, 'in': 25.4, 'ft': 304.8},
+    'moment': {
+        'N.mm': 1.0,
+        'N.m': 1e3,
+        'kN.cm': 1e4,
+        'kN.m': 1e6,
+        'lbf.in': 4.4482216152605 * 25.4,
+        'kip.in': 4448.2216152605 * 25.4,
+        'kip.ft': 4448.2216152605 * 304.8,
+    },
+    'stress': {'Pa': 1e-6, 'kPa': 1e-3, 'MPa': 1.0, 'GPa': 1e3, 'psi': 0.006894757293168, 'ksi': 6.894757293168},
+}
+
+RESULT_QUANTITIES = {
+    'moment': 'moment',
+    'torque': 'moment',
+    'shear': 'force',
+    'axial': 'force',
+    'deflection': 'length',
+}
+
+DEFAULT_RESULT_UNITS = {
+    'moment': 'kN.m',
+    'torque': 'kN.m',
+    'shear': 'kN',
+    'axial': 'kN',
+    'deflection': 'mm',
+}
+
+
+def unit_size(quantity: str, unit: str) -> float:
+    """
+    Returns the size of one 'unit' of 'quantity' in model units.
+
+    e.g. unit_size('moment', 'kN.m') -> 1e6 (N.mm)
+    """
+    try:
+        return UNIT_SIZES[quantity][unit]
+    except KeyError:
+        known = ', '.join(UNIT_SIZES.get(quantity, {})) or ', '.join(UNIT_SIZES)
+        raise ValueError(f"Unknown unit '{unit}' for '{quantity}'. Use one of: {known}") from None
+
+
+
+def output_scale(quantity: str, unit: str) -> float:
+    """
+    Returns the factor that converts values of 'quantity' from model units to 'unit'.
+
+    e.g. output_scale('force', 'kN') -> 0.001
+    """
+    return 1 / unit_size(quantity, unit)
+
+
+
+def input_scale(quantity: str, unit: str) -> float:
+    """
+    Returns the factor that converts values of 'quantity' given in 'unit' to model units.
+
+    e.g. input_scale('length', 'm') -> 1000.0
+    """
+    return unit_size(quantity, unit)
+
+
+
+def result_unit(result_type: str, unit: Optional[str] = None) -> str:
+    """
+    Returns 'unit', or the default display unit of the 'result_type' if 'unit' is None.
+    """
+    return DEFAULT_RESULT_UNITS[result_type] if unit is None else unit
+
+
+
+def result_scale(result_type: str, unit: Optional[str] = None) -> float:
+    """
+    Returns the factor that converts results of 'result_type' (e.g. 'moment') from model units to 'unit'
+    (defaults to DEFAULT_RESULT_UNITS).
+
+    e.g. result_scale('moment', 'kN.cm') -> 0.0001
+    """
+    return output_scale(RESULT_QUANTITIES[result_type], result_unit(result_type, unit))
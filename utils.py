@@ -1,6 +1,10 @@
 import csv
+import hashlib
+import io
+import json
 from dataclasses import dataclass
 from math import pi
+import tracing
 
 
 def str_to_int(s: str) -> int|str:
@@ -27,18 +31,62 @@ def str_to_float(s: str) -> float|str:
 
 
 
+@tracing.traced('read')
 def read_csv_file(filename: str) -> str:
     """
     Returns data contained in the file, 'filename' as a list of lists.
     It is assumed that the data in the file is "csv-ish", meaning with 
-    comma-separated values.
+    comma-separated values. Blank lines are skipped.
     """
     acc = []
     with open(filename, 'r') as file:
         csv_file = csv.reader(file)
         for line in csv_file:
-            acc.append(line)
+            if not is_blank_line(line):
+                acc.append(line)
     return acc
 
 
 
+@tracing.traced('read')
+def read_csv_text(text: str) -> list[list[str]]:
+    """
+    Returns the "csv-ish" data in the string 'text' as a list of lists, the same way
+    read_csv_file does for a file (blank lines are skipped).
+    """
+    return [line for line in csv.reader(io.StringIO(text)) if not is_blank_line(line)]
+
+
+
+def is_blank_line(line: list[str]) -> bool:
+    """
+    Returns True if the csv row 'line' has no content, e.g. [] for an empty line or ['  '] for spaces only.
+    """
+    return not any(field.strip() for field in line)
+
+
+
+def _hashable(value):
+    """
+    Returns 'value', which JSON can't serialize, as content that it can: a beam_format.LoadTable as its
+    to_dicts(), a NumPy array or scalar as its exact tolist(), or anything else as its str().
+    """
+    if hasattr(value, 'to_dicts'):
+        return value.to_dicts()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+
+def content_hash(*parts) -> str:
+    """
+    Returns a hex SHA-256 digest of 'parts' (strings, numbers and nested dicts/lists of them, which may
+    include NumPy arrays and beam_format.LoadTable's).
+    Dicts are hashed with sorted keys, so equal content always gives the same hash.
+    """
+    canonical = json.dumps(parts, sort_keys=True, default=_hashable, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+